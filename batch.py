@@ -0,0 +1,212 @@
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from engine import RenderEngine, read_settings
+from incremental import DependencyIndex, input_root, is_up_to_date, output_base_for, settings_hash, write_manifest
+from profiling import profiled
+
+
+# One engine per worker process, built once by init_worker
+_worker_engine = None
+
+
+def collect_reports(target):
+    """Expand a directory or glob pattern into a sorted list of markdown files."""
+    path = Path(target)
+    if path.is_dir():
+        return sorted(p for p in path.rglob("*.md") if p.is_file())
+    return sorted(Path(p) for p in glob.glob(target, recursive=True) if p.endswith(".md"))
+
+
+def worker_settings(settings, workers):
+    """Settings for pool workers: split the cores between processes and their image threads.
+
+    PDF sharding is turned off when several workers already keep the cores busy.
+    """
+    settings = dict(settings)
+    if not settings.get("image_workers"):
+        settings["image_workers"] = max(1, (os.cpu_count() or 1) // workers)
+    if workers > 1:
+        settings["pdf_shards"] = 0
+    return settings
+
+
+def init_worker(settings, template_name=None, warm=False):
+    """Process pool initializer: build this worker's engine (and optionally warm it up)."""
+    global _worker_engine
+    warnings = []
+    _worker_engine = RenderEngine(settings, on_warning=warnings.append, template_name=template_name)
+    _worker_engine.warnings = warnings
+    if warm:
+        _worker_engine.warm_up()
+
+
+def worker_engine():
+    """The engine built by init_worker in this process, with its warning list cleared."""
+    _worker_engine.warnings.clear()
+    return _worker_engine
+
+
+def _render_one(md_path, output_base, profile=False, cprofile_path=None, config_hash=None):
+    """Render a single report inside a worker, to output_base.html/.pdf (see output_base_for).
+
+    Returns a dict with the output paths ("result"), "warnings", "error"
+    and, when profiling, the stage timings ("profile"). With config_hash
+    a dependency manifest is written for incremental builds.
+    """
+    engine = worker_engine()
+    outcome = {"path": md_path, "result": None, "warnings": engine.warnings, "error": None, "profile": None}
+    output_base = Path(output_base)
+    try:
+        output_base.parent.mkdir(parents=True, exist_ok=True)
+        if profile or cprofile_path:
+            with profiled(engine, md_path, cprofile_path) as report_profile:
+                outcome["result"] = engine.render_file(md_path, output_base)
+            outcome["profile"] = report_profile.to_dict()
+        else:
+            outcome["result"] = engine.render_file(md_path, output_base)
+        if config_hash and outcome["result"]:
+            write_manifest(md_path, output_base, outcome["result"], engine.dependencies, config_hash)
+    except Exception as e:
+        outcome["error"] = str(e)
+    return outcome
+
+
+def _outcomes(pool, jobs):
+    """Yield the outcome of each job (_render_one arguments) as it finishes.
+
+    pool is a ProcessPoolExecutor or a scheduler.Scheduler.
+    """
+    if hasattr(pool, "run"):
+        yield from pool.run(jobs)
+        return
+    for future in as_completed([pool.submit(_render_one, *job) for job in jobs]):
+        yield future.result()
+
+
+def _render_reports(pool, reports, output_dir=None, profile_path=None, cprofile_dir=None, config_hash=None,
+                    root=None):
+    """Fan reports out over pool, printing progress. Returns (failures, profiles)."""
+    failures = 0
+    profiles = []
+    jobs = [
+        (str(p), str(output_base_for(p, output_dir, root)), bool(profile_path),
+         str(Path(cprofile_dir) / f"{i:05d}-{Path(p).stem}.pstats") if cprofile_dir else None,
+         config_hash)
+        for i, p in enumerate(reports)
+    ]
+    for done, outcome in enumerate(_outcomes(pool, jobs), 1):
+        md_path, result, error = outcome["path"], outcome["result"], outcome["error"]
+        # Scheduler runs also report memory: estimated and measured peak, and reports still waiting
+        memory = ""
+        if "estimate" in outcome:
+            peak = f"{outcome['peak_rss'] / 2**20:.0f}" if outcome["peak_rss"] else "?"
+            memory = f" (peak {peak} MB, est. {outcome['estimate'] / 2**20:.0f} MB, {outcome['queued']} queued)"
+        if outcome["profile"]:
+            if "estimate" in outcome:
+                outcome["profile"]["peak_rss_bytes"] = outcome["peak_rss"]
+                outcome["profile"]["estimated_bytes"] = outcome["estimate"]
+            profiles.append(outcome["profile"])
+        for message in outcome["warnings"]:
+            print(f"  warning: {md_path}: {message}", file=sys.stderr)
+        if error:
+            failures += 1
+            print(f"[{done}/{len(reports)}] FAILED {md_path}: {error}{memory}", file=sys.stderr)
+        elif result is None:
+            print(f"[{done}/{len(reports)}] skipped {md_path} (empty)")
+        else:
+            print(f"[{done}/{len(reports)}] {md_path} -> {result[1]}{memory}")
+    return failures, profiles
+
+
+def run_batch(target, workers=None, output_dir=None, settings=None, template_name=None,
+              profile_path=None, cprofile_dir=None, incremental=False, watch=False, poll_interval=1.0,
+              memory_budget=None, max_jobs_per_worker=50, max_worker_rss_mb=0, stats_path=None):
+    """Render every report matched by target across a process pool.
+
+    profile_path collects per-stage timings of every report into one JSON
+    file; cprofile_dir gets a .pstats dump per report. incremental skips
+    reports whose recorded inputs are unchanged; watch (which implies
+    incremental) keeps polling and rebuilds only the reports a changed file
+    affects. With memory_budget (MB, or "auto") reports go through a
+    scheduler.Scheduler instead, which keeps their estimated memory under
+    the budget, recycles workers after max_jobs_per_worker reports or
+    max_worker_rss_mb, retries crashed reports and writes its events to
+    stats_path. Returns the number of reports that failed.
+    """
+    reports = collect_reports(target)
+    # Outputs under output_dir mirror the reports' paths relative to this
+    root = input_root(target)
+    if not reports and not watch:
+        print(f"No markdown reports found for {target}", file=sys.stderr)
+        return 0
+
+    settings = read_settings() if settings is None else settings
+    workers = workers or os.cpu_count() or 1
+    if output_dir:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+    if cprofile_dir:
+        Path(cprofile_dir).mkdir(parents=True, exist_ok=True)
+    config_hash = settings_hash(settings, template_name) if incremental or watch else None
+
+    if memory_budget:
+        from scheduler import Scheduler, memory_budget as budget_bytes
+
+        budget = budget_bytes(memory_budget)
+        print(f"Memory budget {budget / 2**20:.0f} MB for {len(reports)} reports")
+        pool = Scheduler(worker_settings(settings, workers), template_name, workers, budget,
+                         max_jobs_per_worker, int(max_worker_rss_mb * 2**20), stats_path)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                   initargs=(worker_settings(settings, workers), template_name))
+    with pool:
+        pending = reports
+        if config_hash:
+            pending = [p for p in reports if not is_up_to_date(p, output_base_for(p, output_dir, root), config_hash)]
+            print(f"{len(reports) - len(pending)}/{len(reports)} reports up to date")
+        failures, profiles = _render_reports(pool, pending, output_dir, profile_path, cprofile_dir, config_hash, root)
+
+        if profile_path:
+            profiles.sort(key=lambda p: p["label"])
+            Path(profile_path).write_text(json.dumps({"workers": workers, "reports": profiles}, indent=2),
+                                          encoding="utf-8")
+            print(f"Profile written to {profile_path}")
+        print(f"Rendered {len(pending) - failures}/{len(pending)} reports with {workers} workers")
+
+        if watch:
+            _watch(pool, target, output_dir, config_hash, poll_interval, root)
+    return failures
+
+
+def _watch(pool, target, output_dir, config_hash, poll_interval, root=None):
+    """Poll the reports and everything their manifests list; rebuild what a change affects."""
+    index = DependencyIndex()
+    reports = collect_reports(target)
+    index.rebuild(reports, output_dir, root)
+    before = index.snapshot()
+    print(f"Watching {len(reports)} reports and {len(before)} files (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(poll_interval)
+            current = collect_reports(target)
+            new_reports = set(map(str, current)) - set(map(str, reports))
+            after = index.snapshot()
+            affected = index.changed_reports(before, after) | new_reports
+            affected = sorted(p for p in affected
+                              if Path(p).exists()
+                              and not is_up_to_date(p, output_base_for(p, output_dir, root), config_hash))
+            if affected:
+                print(f"{len(affected)} report(s) affected by changes")
+                _render_reports(pool, affected, output_dir, config_hash=config_hash, root=root)
+            if affected or new_reports or len(current) != len(reports):
+                reports = current
+                index.rebuild(reports, output_dir, root)
+                after = index.snapshot()
+            before = after
+    except KeyboardInterrupt:
+        print("Stopped watching")
@@ -0,0 +1,113 @@
+"""Catalog queries over a large corpus: frontmatter words, exact IOCs, field filters.
+
+Run from the repository root:
+
+    python benchmarks/bench_catalog.py [--reports 50000] [--files 0]
+
+The catalog is filled with synthetic reports (each with a family, TLP, tags
+and a few dozen hashes, IPs and domains) in a temporary database, then every
+query is timed. With --files N, N report files are also written to a
+temporary directory and indexed for real, twice, to time a full and an
+incremental (nothing changed) run.
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import catalog
+
+
+FAMILIES = ["Nim RAT", "AgentTesla", "QakBot", "IcedID", "Cobalt Strike", "AsyncRAT", "Lumma Stealer", "PlugX"]
+TLPS = ["CLEAR", "GREEN", "AMBER", "RED"]
+TAGS = ["loader", "stealer", "c2", "phishing", "nim", "dotnet", "rat", "ransomware", "apt"]
+
+
+def synthetic_entry(n, rng):
+    iocs = {f"{rng.getrandbits(256):064x}": "sha256" for _ in range(10)}
+    iocs.update({f"{rng.getrandbits(128):032x}": "md5" for _ in range(10)})
+    iocs.update({f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}": "ipv4" for _ in range(5)})
+    iocs.update({f"c2-{rng.getrandbits(32):x}.example.net": "domain" for _ in range(5)})
+    family = rng.choice(FAMILIES)
+    meta = {"title": f"{family} sample {n}", "family": family, "verdict": "malicious", "tlp": rng.choice(TLPS),
+            "tags": rng.sample(TAGS, 3), "analyst": f"analyst{n % 40}",
+            "date": f"20{rng.randrange(18, 25)}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}"}
+    return {"path": f"/reports/{n // 1000}/{n}.md", "sources": [], "error": None, "meta": meta,
+            "iocs": iocs, "html_path": None, "pdf_path": f"/out/{n}.pdf"}
+
+
+def report_text(entry):
+    meta = entry["meta"]
+    rows = "\n".join(f"| {kind} | `{value}` |" for value, kind in entry["iocs"].items())
+    return (f"---\ntitle: {meta['title']}\nfamily: {meta['family']}\ntlp: {meta['tlp']}\n"
+            f"tags: [{', '.join(meta['tags'])}]\ndate: {meta['date']}\n---\n# Summary\n\n"
+            f"| Type | Value |\n|--|--|\n{rows}\n")
+
+
+def timed(fn, repeat=20):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=50000, help="Reports in the catalog (default: 50000)")
+    parser.add_argument("--files", type=int, default=0, help="Also write and index this many real report files")
+    parser.add_argument("--budget-ms", type=float, default=50.0,
+                        help="Exit with status 1 if a query's median time is over this (default: 50)")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = catalog.connect(Path(tmp) / "catalog.sqlite")
+        started = time.perf_counter()
+        sample = None
+        for n in range(args.reports):
+            entry = synthetic_entry(n, rng)
+            catalog._store(conn, entry, 0)
+            if n == args.reports // 2:
+                sample = entry
+        conn.commit()
+        print(f"{args.reports} reports stored in {time.perf_counter() - started:.1f}s")
+
+        sha256 = next(v for v, k in sample["iocs"].items() if k == "sha256")
+        domain = next(v for v, k in sample["iocs"].items() if k == "domain")
+        queries = {
+            "words 'nim ra'": dict(text="nim ra"),
+            "family + TLP + SHA256": dict(text=sample["meta"]["family"], tlp=sample["meta"]["tlp"], ioc=sha256),
+            "IOC typed in the search box": dict(text=sha256),
+            "defanged domain": dict(ioc=domain.replace(".", "[.]")),
+            "tag + family": dict(tag="loader", family="Qak"),
+            "recent (no criteria)": dict(),
+        }
+        failed = False
+        for label, criteria in queries.items():
+            seconds, rows = timed(lambda: catalog.search(conn, limit=200, **criteria))
+            over = seconds * 1000 > args.budget_ms
+            failed |= over
+            print(f"  {label:30} {seconds * 1000:7.2f} ms  {len(rows):4} rows" + ("  OVER BUDGET" if over else ""))
+
+        if args.files:
+            root = Path(tmp) / "reports"
+            root.mkdir()
+            for n in range(args.files):
+                (root / f"{n}.md").write_text(report_text(synthetic_entry(n, rng)), encoding="utf-8")
+            for run in ("full", "incremental"):
+                started = time.perf_counter()
+                counts = catalog.index(conn, [str(root)])
+                print(f"  index {args.files} files ({run}): {time.perf_counter() - started:.2f}s, "
+                      f"{counts['indexed']} indexed, {counts['unchanged']} unchanged")
+        conn.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Large documents in the editor: one-shot insert vs. EditorBuffer's sliced load, plus render time.
+
+Run from the repository root:
+
+    python benchmarks/bench_editor.py [--mb 10] [--skip-render]
+
+The corpus is a report whose last section is a pasted hexdump of the given
+size. The editor numbers need a display (they are skipped without one); the
+render numbers don't. "Longest stall" is the longest time the Tk event loop
+went without running, i.e. how long the window froze.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from editorbuffer import EditorBuffer, plan_sections
+from engine import DEFAULT_SETTINGS, RenderEngine
+
+
+HEADER = """---
+title: Loader with a large hexdump
+tlp: amber
+---
+# Executive Summary
+
+The sample unpacks a second stage; its full dump is in the appendix.
+
+# Appendix A: Hexdump of stage 2
+
+```
+"""
+
+
+def corpus(megabytes):
+    target = int(megabytes * 1024 * 1024)
+    lines = [HEADER]
+    size = len(HEADER)
+    offset = 0
+    while size < target:
+        data = bytes((offset + i) * 7 & 255 for i in range(16))
+        text = "".join(chr(b) if 32 <= b < 127 else "." for b in data)
+        line = f"{offset:08x}  {data[:8].hex(' ')}  {data[8:].hex(' ')}  |{text}|\n"
+        lines.append(line)
+        size += len(line)
+        offset += 16
+    lines.append("```\n")
+    return "".join(lines)
+
+
+def pump(root, done):
+    """Run the event loop until done() is true. Returns (seconds, longest stall)."""
+    started = last = time.perf_counter()
+    stall = 0.0
+    while not done():
+        root.update()
+        now = time.perf_counter()
+        stall = max(stall, now - last)
+        last = now
+    return time.perf_counter() - started, stall
+
+
+def bench_editor(text, args):
+    import tkinter as tk
+    from tkinter import scrolledtext
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"  editor: skipped, no display ({e})")
+        return
+    widget = scrolledtext.ScrolledText(root, height=30, width=100, wrap=tk.WORD)
+    widget.pack()
+    root.update()
+
+    started = time.perf_counter()
+    widget.insert("1.0", text)
+    root.update()
+    print(f"  one-shot insert:                {time.perf_counter() - started:8.2f} s (window frozen throughout)")
+    started = time.perf_counter()
+    widget.get("1.0", tk.END)
+    print(f"  widget.get() per render:        {(time.perf_counter() - started) * 1000:8.1f} ms")
+    widget.delete("1.0", tk.END)
+    root.update()
+
+    for mode in ("edit", "readonly", "collapsed"):
+        settings = dict(DEFAULT_SETTINGS, editor_large_sections=mode, editor_chunk_kb=args.chunk_kb)
+        editor = EditorBuffer(widget, settings)
+        editor.load(text)
+        seconds, stall = pump(root, lambda: not editor.loading)
+        started = time.perf_counter()
+        editor.text()
+        first = time.perf_counter() - started
+        started = time.perf_counter()
+        editor.text()
+        cached = time.perf_counter() - started
+        print(f"  sliced load ({mode + '):':10}        {seconds:8.2f} s, longest stall {stall * 1000:6.0f} ms; "
+              f"text() {first * 1000:.1f} ms, cached {cached * 1000:.3f} ms")
+        editor.clear()
+        root.update()
+    root.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=float, default=10, help="Document size in MB (default: 10)")
+    parser.add_argument("--chunk-kb", type=int, default=256, help="editor_chunk_kb for the sliced load (default: 256)")
+    parser.add_argument("--skip-render", action="store_true", help="Only time the editor")
+    args = parser.parse_args()
+
+    text = corpus(args.mb)
+    print(f"{len(text) / 1024 / 1024:.1f} MB document")
+    started = time.perf_counter()
+    pieces = plan_sections(text, int(DEFAULT_SETTINGS["editor_large_section_kb"]) * 1024)
+    print(f"  plan_sections:                  {(time.perf_counter() - started) * 1000:8.1f} ms, "
+          f"{sum(large for large, _ in pieces)} large section(s)")
+    bench_editor(text, args)
+    if not args.skip_render:
+        engine = RenderEngine(dict(DEFAULT_SETTINGS))
+        started = time.perf_counter()
+        html = engine.generate_html(text)
+        print(f"  generate_html:                  {time.perf_counter() - started:8.2f} s, "
+              f"{len(html) / 1024 / 1024:.1f} MB of HTML")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Huge IOC tables: Python-Markdown's tables extension vs. the ioctable fast path.
+
+Run from the repository root:
+
+    python benchmarks/bench_ioc_table.py [--rows 100000] [--chunk-rows 1000]
+
+The corpus is one markdown table of hashes, domains and IPs. Both paths turn
+it into HTML. With --memory each path runs a second time under tracemalloc
+to report its peak Python heap (tracing slows it down too much to time).
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from engine import get_markdown_converter
+from ioctable import substitute_tables
+from preprocess import join, scan, table_blocks
+
+
+def corpus(rows):
+    lines = ["## Appendix A: Indicators", "", "| SHA256 | Domain | IP |", "|----|----|----|"]
+    lines += [f"| `{n:064x}` | c2-{n}.example.net | 10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255} |"
+              for n in range(rows)]
+    return "\n".join(lines) + "\n"
+
+
+def run_markdown(text, chunk_rows):
+    return get_markdown_converter().convert(text)
+
+
+def run_fast_path(text, chunk_rows):
+    parts = scan(text, 0, table_min_rows=500, table_chunk_rows=chunk_rows)
+    return substitute_tables(get_markdown_converter().convert(join(parts)), table_blocks(parts))
+
+
+def measure(fn, text, chunk_rows, memory=False):
+    """Return (seconds, peak heap bytes or None, html)."""
+    start = time.perf_counter()
+    html = fn(text, chunk_rows)
+    elapsed = time.perf_counter() - start
+    peak = None
+    if memory:
+        tracemalloc.start()
+        fn(text, chunk_rows)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak, html
+
+
+def describe(seconds, peak):
+    return f"{seconds:8.2f} s" + (f", peak heap {peak / 1024 / 1024:7.1f} MB" if peak is not None else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="Table rows (default: 100000)")
+    parser.add_argument("--chunk-rows", type=int, default=1000,
+                        help="Rows per <table> on the fast path, 0 for one table (default: 1000)")
+    parser.add_argument("--skip-markdown", action="store_true", help="Only time the fast path")
+    parser.add_argument("--memory", action="store_true", help="Also report the peak Python heap of each path")
+    args = parser.parse_args()
+
+    text = corpus(args.rows)
+    print(f"{args.rows} rows, {len(text) / 1024 / 1024:.1f} MB of markdown")
+    fast, fast_peak, html = measure(run_fast_path, text, args.chunk_rows, args.memory)
+    print(f"  fast path:       {describe(fast, fast_peak)}, {html.count('<table')} <table>s")
+    if not args.skip_markdown:
+        slow, slow_peak, _ = measure(run_markdown, text, args.chunk_rows, args.memory)
+        print(f"  Python-Markdown: {describe(slow, slow_peak)}")
+        print(f"  speedup: {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
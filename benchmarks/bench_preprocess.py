@@ -0,0 +1,106 @@
+"""Markdown preprocessing on large reports: chained regex passes vs. preprocess.scan.
+
+Run from the repository root:
+
+    python benchmarks/bench_preprocess.py [--sizes 1,5,20]
+
+The corpus is a report with frontmatter, a few sections and a pasted IOC dump
+of the given size in MB, with image references every so often. Image
+references point at URLs so no image is read; only the text handling is timed.
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preprocess import content_start, image_refs, join, scan, split_frontmatter
+
+
+HEADER = """---
+title: Large IOC dump
+tlp: amber
+tags: [loader, c2]
+---
+\\## Executive Summary
+
+The sample talks to a long list of infrastructure, listed below.
+
+| Type | Value | First seen |
+|----|----|----|
+"""
+
+ROW = "| sha256 | {n:064x} | 2024-01-{day:02d} |\n| domain | c2-{n}.example.net | 2024-02-{day:02d} |\n"
+IMAGE = "\n![Beacon {n}](https://example.net/shots/{n}.png)\n\n| Type | Value | First seen |\n|----|----|----|\n"
+
+
+def corpus(megabytes):
+    target = int(megabytes * 1024 * 1024)
+    pieces = [HEADER]
+    size = len(HEADER)
+    n = 0
+    while size < target:
+        piece = ROW.format(n=n, day=n % 28 + 1)
+        if n % 500 == 499:
+            piece += IMAGE.format(n=n)
+        pieces.append(piece)
+        size += len(piece)
+        n += 1
+    return "".join(pieces)
+
+
+def run_chained(text):
+    """What RenderEngine did before preprocess.py: splitlines/join, then two re.sub passes."""
+    lines = text.strip().splitlines()
+    end_index = lines[1:].index("---") + 1
+    yaml.safe_load("\n".join(lines[1:end_index]))
+    body = "\n".join(lines[end_index + 1:])
+    body = re.sub(r"\\(#+)", r"\1", body)
+
+    def replace_image(match):
+        return match.group(0)
+
+    return re.sub(r'!\[(.*?)\]\((.*?)\)', replace_image, body)
+
+
+def run_scan(text):
+    start = content_start(text)
+    yaml_text, body_start, _ = split_frontmatter(text, start)
+    yaml.safe_load(yaml_text)
+    parts = scan(text, body_start)
+    image_refs(parts)
+    return join(parts)
+
+
+def measure(fn, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,5,20", help="Report sizes in MB, comma separated (default: 1,5,20)")
+    parser.add_argument("--repeat", type=int, default=3, help="Take the best of this many runs (default: 3)")
+    args = parser.parse_args()
+
+    for megabytes in (float(s) for s in args.sizes.split(",")):
+        text = corpus(megabytes)
+        if run_chained(text).strip() != run_scan(text).strip():
+            sys.exit(f"Outputs differ for the {megabytes:g} MB report")
+        chained = measure(run_chained, text, args.repeat)
+        scanned = measure(run_scan, text, args.repeat)
+        print(f"{megabytes:g} MB report, best of {args.repeat}")
+        print(f"  chained passes: {chained * 1000:8.1f} ms")
+        print(f"  single scan:    {scanned * 1000:8.1f} ms")
+        print(f"  speedup: {chained / scanned:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""GUI startup cost: `python -X importtime -c "import reportgen, gui"`, checked against a budget.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--budget-ms 150] [--runs 5]
+
+reportgen is the command line (argparse only); gui is the editor it starts.
+Exits with status 1 when the median import time is over budget, or when
+importing them pulls in one of the rendering libraries that should only
+load after the window is up (see engine.preload). tests/test_startup.py
+runs the same check.
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+BUDGET_MS = 150.0
+# Loaded in the background or on first render, never by the import itself
+DEFERRED_MODULES = ["weasyprint", "PIL", "markdown", "pygments", "jinja2", "yaml", "pypdf"]
+# What `python reportgen.py` imports before the window appears
+STARTUP_MODULES = ["reportgen", "gui"]
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_times():
+    """One cold import of the startup modules. Returns (total, {direct import: cumulative}) in microseconds."""
+    statement = "import " + ", ".join(STARTUP_MODULES)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(f"{statement} failed:\n{result.stderr}")
+    # -X importtime lists a module after everything it imported, indented two spaces per level
+    total = 0
+    found = 0
+    imports = {}
+    children = {}
+    for line in result.stderr.splitlines():
+        m = IMPORTTIME_RE.match(line)
+        if not m:
+            continue
+        depth = len(m.group(3)) // 2
+        if depth == 1:
+            children[m.group(4)] = int(m.group(2))
+        elif depth == 0:
+            if m.group(4) in STARTUP_MODULES:
+                total += int(m.group(2))
+                imports.update(children)
+                found += 1
+            children = {}
+    if found != len(STARTUP_MODULES):
+        sys.exit(f"{', '.join(STARTUP_MODULES)} not found in -X importtime output")
+    return total, imports
+
+
+def loaded_deferred_modules():
+    check = (f"import sys, {', '.join(STARTUP_MODULES)}; "
+             f"print(' '.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", check], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.split()
+
+
+def check(runs=5):
+    """Cold-import the startup modules runs times.
+
+    Returns the median time in ms, the direct imports of the last run by
+    cumulative time (slowest first, in microseconds), and the deferred
+    modules that got loaded.
+    """
+    samples = [import_times() for _ in range(runs)]
+    total_ms = statistics.median(total for total, _ in samples) / 1000
+    slowest = sorted(samples[-1][1].items(), key=lambda item: item[1], reverse=True)
+    return total_ms, slowest, loaded_deferred_modules()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS,
+                        help=f"Maximum median import time of the startup modules in ms (default: {BUDGET_MS:g})")
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold imports (default: 5)")
+    parser.add_argument("--top", type=int, default=8, help="Show this many of the slowest imports made at startup")
+    args = parser.parse_args()
+
+    total_ms, slowest, loaded = check(args.runs)
+    print(f"import {', '.join(STARTUP_MODULES)}: {total_ms:.1f} ms (median of {args.runs}, budget {args.budget_ms:g} ms)")
+    for module, micros in slowest[:args.top]:
+        print(f"  {micros / 1000:7.1f} ms  {module}")
+
+    failed = False
+    if total_ms > args.budget_ms:
+        print(f"FAIL: over budget by {total_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if loaded:
+        print(f"FAIL: imported at startup: {', '.join(loaded)}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
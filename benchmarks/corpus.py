@@ -0,0 +1,214 @@
+"""Synthetic report corpus shaped like Sample_Malware_Report.md.
+
+Used by run_benchmarks.py; can also be run on its own to write a corpus:
+
+    python benchmarks/corpus.py OUT_DIR [--reports 10] [--images 10] [--image-size 900x500]
+        [--code-blocks 1] [--code-lines 12] [--table-rows 20] [--length-kb 0] [--fields 0]
+
+Each report gets the sample's frontmatter fields (plus --fields extra ones),
+its sections and tables, --images screenshot-like PNGs in a <name>-media
+folder, --code-blocks fenced blocks, an IOC table of --table-rows rows, and
+filler prose until it is at least --length-kb long. The same options and
+--seed always give the same files.
+"""
+import argparse
+import hashlib
+import random
+from io import BytesIO
+from pathlib import Path
+
+
+FRONTMATTER = """---
+analyst: analyst{n}
+date: 2025-04-{day:02d}
+family: {family}
+file: {file}
+source: N/A
+tags:
+- malware-analysis
+- {tag}
+- C2
+title: Malware Report - {file}
+verdict: Malicious
+tlp: {tlp}
+{extra}---
+"""
+
+SUMMARY = """
+## Executive Summary
+
+| File | SHA256 |
+|----|----|
+| {file} | {sha256} |
+
+- **Purpose**: Summarize findings for non-technical stakeholders.
+- **Malware Description**: A {family} sample that installs a backdoor and beacons to its C2.
+- **Key Findings**: Delivered as an attachment, persists with a Run key, exfiltrates over HTTPS.
+- **Impact Assessment**: Remote command execution on the infected host.
+
+## Identification
+
+| Type | Value |
+|----|----|
+| File Name | {file} |
+| File Size | {size} KB |
+| SHA256 | {sha256} |
+| MD5 | {md5} |
+| Platform | Windows |
+
+------------------------------------------------------------------------
+"""
+
+PROSE = ("The sample resolves its imports at runtime and decrypts the configuration with a "
+         "single-byte XOR key before contacting the command and control server. ")
+FAMILIES = ["Nim RAT", "AgentTesla", "QakBot", "IcedID", "AsyncRAT", "PlugX"]
+LANGUAGES = ["python", "c", "powershell", "yara", "json"]
+CODE_LINE = {
+    "python": "    key = bytes(b ^ 0x{n:02x} for b in blob[{n}:{n} + 16])  # stage {n}",
+    "c": "    buf[{n}] = (char)(payload[{n}] ^ 0x{n:02x}); /* decode byte {n} */",
+    "powershell": "$s{n} = [Convert]::FromBase64String($b64[{n}]); Invoke-Stage -Id {n}",
+    "yara": "        $s{n} = {{ 4D 5A {n:02X} 00 03 00 00 00 04 00 }}",
+    "json": '    "beacon_{n}": {{"interval": {n}, "jitter": 0.{n}, "host": "c2-{n}.example.net"}},',
+}
+
+
+def screenshot_png(rng, width, height):
+    """A PNG that compresses like a terminal/debugger screenshot: dark background, rows of "text"."""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (width, height), (30, 30, 30))
+    draw = ImageDraw.Draw(image)
+    for y in range(8, height - 12, 16):
+        x = 8
+        while x < width - 40:
+            word = rng.randrange(12, 90)
+            shade = rng.choice([(200, 200, 200), (120, 200, 120), (220, 180, 90), (120, 160, 230)])
+            draw.rectangle([x, y, x + word, y + 9], fill=shade)
+            x += word + rng.randrange(6, 20)
+            if rng.random() < 0.08:
+                break
+    # A little noise so the encoder has real work to do, as with antialiased text
+    # Drawn from rng (Image.effect_noise isn't seeded), narrowed to 128 +/- 12 like its sigma
+    noise = Image.frombytes("L", (width, height), rng.randbytes(width * height))
+    noise = noise.point(lambda v: 116 + v * 24 // 255).convert("RGB")
+    image = Image.blend(image, noise, 0.06)
+    out = BytesIO()
+    image.save(out, format="PNG")
+    return out.getvalue()
+
+
+def code_block(rng, lines):
+    language = rng.choice(LANGUAGES)
+    body = "\n".join(CODE_LINE[language].format(n=rng.randrange(256)) for _ in range(lines))
+    return f"``` {language}\n{body}\n```\n"
+
+
+def ioc_table(rng, rows):
+    lines = ["| Type | Value | Note |", "|----|----|----|"]
+    for i in range(rows):
+        kind = i % 3
+        if kind == 0:
+            lines.append(f"| SHA256 | `{rng.getrandbits(256):064X}` | dropped payload |")
+        elif kind == 1:
+            lines.append(f"| Domain | c2-{rng.getrandbits(24):x}[.]example[.]net | beacon |")
+        else:
+            lines.append(f"| IP | 10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)} | fallback C2 |")
+    return "\n".join(lines) + "\n"
+
+
+def report(rng, n, name, images, code_blocks, code_lines, table_rows, length_kb, fields):
+    """Markdown of one report; images is the list of media-relative image paths to reference."""
+    family = rng.choice(FAMILIES)
+    file_name = f"{family.replace(' ', '')}.Sample{n}.exe"
+    extra = "".join(f"field_{i}: value {rng.getrandbits(32):08x}\n" for i in range(fields))
+    parts = [FRONTMATTER.format(n=n, day=n % 28 + 1, family=family, file=file_name, tag=rng.choice(["RAT", "Loader"]),
+                                tlp=rng.choice(["CLEAR", "GREEN", "AMBER", "RED"]), extra=extra)]
+    parts.append(SUMMARY.format(file=file_name, family=family, sha256=f"{rng.getrandbits(256):064X}",
+                                md5=f"{rng.getrandbits(128):032X}", size=rng.randrange(100, 900)))
+
+    # Screenshots are spread over the analysis sections and the appendix, as in the sample
+    sections = ["Static Analysis", "Dynamic Analysis", "Appendix A"]
+    per_section = [images[i::len(sections)] for i in range(len(sections))]
+    blocks = [code_block(rng, code_lines) for _ in range(code_blocks)]
+    for section, section_images in zip(sections, per_section):
+        parts.append(f"\n## {section}\n\n{PROSE}\n")
+        for i, image in enumerate(section_images):
+            parts.append(f"\n#### {section[0]}.{i + 1}\n\n![]({image})\n")
+        if blocks:
+            parts.append("\n" + blocks.pop())
+        if section == "Dynamic Analysis":
+            parts.append(f"\n## Indicators of Compromise (IOCs)\n\n{ioc_table(rng, table_rows)}")
+    for block in blocks:
+        parts.append("\n" + block)
+    parts.append("\n## Conclusion\n\n" + PROSE + "\n")
+
+    text = "".join(parts)
+    filler = []
+    while len(text) + sum(len(p) for p in filler) < length_kb * 1024:
+        filler.append(PROSE * 8 + "\n\n")
+    if filler:
+        text = text.replace("\n## Conclusion", "\n## Analyst Notes\n\n" + "".join(filler) + "\n## Conclusion", 1)
+    return text
+
+
+def generate(out_dir, reports=10, images=10, image_size=(900, 500), code_blocks=1, code_lines=12,
+             table_rows=20, length_kb=0, fields=0, seed=0):
+    """Write the corpus to out_dir; returns the report paths."""
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for n in range(reports):
+        name = f"report_{n:04d}"
+        media = out_dir / f"{name}-media"
+        media.mkdir(exist_ok=True)
+        image_paths = []
+        for _ in range(images):
+            data = screenshot_png(rng, *image_size)
+            image_name = f"{hashlib.sha1(data).hexdigest()}.png"
+            (media / image_name).write_bytes(data)
+            image_paths.append(f"{name}-media/{image_name}")
+        md_path = out_dir / f"{name}.md"
+        md_path.write_text(report(rng, n, name, image_paths, code_blocks, code_lines, table_rows, length_kb, fields),
+                           encoding="utf-8")
+        paths.append(md_path)
+    return paths
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def add_arguments(parser):
+    """The corpus shape options, shared with run_benchmarks.py."""
+    parser.add_argument("--reports", type=int, default=10, help="Number of reports (default: 10)")
+    parser.add_argument("--images", type=int, default=10, help="Screenshots per report (default: 10)")
+    parser.add_argument("--image-size", type=parse_size, default=(900, 500), help="Screenshot size (default: 900x500)")
+    parser.add_argument("--code-blocks", type=int, default=1, help="Fenced code blocks per report (default: 1)")
+    parser.add_argument("--code-lines", type=int, default=12, help="Lines per code block (default: 12)")
+    parser.add_argument("--table-rows", type=int, default=20, help="Rows of the IOC table (default: 20)")
+    parser.add_argument("--length-kb", type=int, default=0, help="Pad each report with prose to this size (default: 0)")
+    parser.add_argument("--fields", type=int, default=0, help="Extra frontmatter fields (default: 0)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+
+
+def corpus_options(args):
+    return {"reports": args.reports, "images": args.images, "image_size": list(args.image_size),
+            "code_blocks": args.code_blocks, "code_lines": args.code_lines, "table_rows": args.table_rows,
+            "length_kb": args.length_kb, "fields": args.fields, "seed": args.seed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir", help="Directory to write the reports to")
+    add_arguments(parser)
+    args = parser.parse_args()
+    options = corpus_options(args)
+    options["image_size"] = tuple(options["image_size"])
+    paths = generate(args.out_dir, **options)
+    print(f"Wrote {len(paths)} reports to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
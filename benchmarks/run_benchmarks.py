@@ -0,0 +1,254 @@
+"""Render benchmarks over a synthetic corpus, saved as JSON and checked against a baseline.
+
+Run from the repository root:
+
+    python benchmarks/run_benchmarks.py [corpus options, see corpus.py] [--repeat 3] [--workers N]
+        [--skip-pdf] [--skip-batch] [--output results.json]
+        [--baseline benchmarks/baseline.json] [--save-baseline]
+        [--threshold 0.25] [--threshold-for stage.pdf=0.5] [--min-delta-ms 2]
+
+A corpus of --reports reports is generated into a temporary directory (or
+read from --corpus, which must have been written by corpus.py with the same
+options) and measured with cold image caches:
+
+  encode_image_base64   seconds per image, each encoded from scratch
+  stage.<name>          seconds per report in each RenderEngine stage
+                        (stage.markdown is markdown.markdown, stage.template
+                        is Template.render, stage.pdf is write_pdf)
+  render.total          seconds per report, end to end, in one process
+  batch.reports_per_s   throughput of batch.run_batch with --workers processes
+
+Each number is the median of --repeat runs, after an untimed warm-up pass. When a baseline exists the
+results are compared to it and the script exits with status 1 if a metric
+got worse by more than its threshold (a fraction: 0.25 = 25% slower), and
+with status 2 if the baseline was taken with a different corpus. Differences
+under --min-delta-ms are ignored, so sub-millisecond stages don't flap.
+Everything runs offline and without a display.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import corpus
+from engine import DEFAULT_SETTINGS, RenderEngine
+from imagecache import ImageCache
+from profiling import profiled
+
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+RESULTS_VERSION = 1
+
+
+def engine_settings(cache_dir):
+    """Default settings with the image cache in cache_dir, so every run starts cold."""
+    return dict(DEFAULT_SETTINGS, image_cache_dir=str(cache_dir))
+
+
+def bench_encode(reports, scratch):
+    """Seconds per image for encode_image_base64 with nothing cached."""
+    images = [p for md in reports for p in sorted(md.parent.glob(f"{md.stem}-media/*.png"))]
+    if not images:
+        return None
+    engine = RenderEngine(engine_settings(scratch))
+    started = time.perf_counter()
+    for image in images:
+        engine.image_cache = ImageCache(None)
+        engine._image_srcs = {}
+        if not engine.encode_image_base64(image):
+            raise Exception(f"Failed to encode {image}")
+    return (time.perf_counter() - started) / len(images)
+
+
+def bench_render(reports, scratch, skip_pdf):
+    """Seconds per report for each stage and in total, rendering every report in one engine."""
+    warnings = []
+    engine = RenderEngine(engine_settings(scratch / "cache"), on_warning=warnings.append)
+    out_dir = scratch / "out"
+    out_dir.mkdir(parents=True)
+    stages = {}
+    total = 0.0
+    for md_path in reports:
+        with profiled(engine, md_path.name) as profile:
+            if skip_pdf:
+                # What the GUI's preview renders: images linked from the cache, not base64
+                html = engine.generate_html(md_path.read_text(encoding="utf-8"), base_dir=md_path.parent,
+                                            embed="reference")
+            else:
+                html = engine.render_file(md_path, out_dir / md_path.stem)
+        if not html:
+            raise Exception(f"Nothing rendered for {md_path}")
+        for name, seconds in profile.totals().items():
+            stages[name] = stages.get(name, 0.0) + seconds
+        total += profile.wall_s
+    if warnings:
+        raise Exception(f"Render warnings: {warnings[:3]}")
+    metrics = {f"stage.{name}": seconds / len(reports) for name, seconds in stages.items()}
+    metrics["render.total"] = total / len(reports)
+    return metrics
+
+
+def bench_batch(corpus_dir, scratch, workers):
+    """Reports per second through run_batch, pool start-up included."""
+    from batch import collect_reports, run_batch
+
+    count = len(collect_reports(str(corpus_dir)))
+    started = time.perf_counter()
+    # run_batch prints a line per report; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        failures = run_batch(str(corpus_dir), workers=workers, output_dir=str(scratch / "batch"),
+                             settings=engine_settings(scratch / "batch-cache"))
+    if failures:
+        raise Exception(f"{failures} reports failed in the batch run")
+    return count / (time.perf_counter() - started)
+
+
+def measure(corpus_dir, args):
+    """Run every benchmark args.repeat times. Returns {metric: [samples]}."""
+    reports = sorted(Path(corpus_dir).glob("*.md"))
+    if not reports:
+        raise Exception(f"No reports in {corpus_dir}")
+
+    # One untimed pass: imports, fontconfig and Pygments lexers are not what we're measuring
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_render(reports, Path(tmp), args.skip_pdf)
+
+    samples = {}
+    for run in range(args.repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            metrics = {"encode_image_base64": bench_encode(reports, tmp / "encode")}
+            metrics.update(bench_render(reports, tmp / "render", args.skip_pdf))
+            if not args.skip_pdf and not args.skip_batch:
+                metrics["batch.reports_per_s"] = bench_batch(corpus_dir, tmp, args.workers)
+        for name, value in metrics.items():
+            if value is not None:
+                samples.setdefault(name, []).append(value)
+        print(f"  run {run + 1}/{args.repeat}: {metrics['render.total'] * 1000:.0f} ms per report")
+    return samples
+
+
+def results_for(samples, args, options):
+    metrics = {}
+    for name, values in samples.items():
+        higher = name.endswith("_per_s")
+        metrics[name] = {"value": statistics.median(values), "samples": values,
+                         "unit": "reports/s" if higher else "s", "better": "higher" if higher else "lower"}
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "corpus": options,
+        "run": {"repeat": args.repeat, "workers": args.workers, "skip_pdf": args.skip_pdf},
+        "metrics": metrics,
+    }
+
+
+def format_value(metric):
+    if metric["unit"] == "s":
+        return f"{metric['value'] * 1000:.1f} ms"
+    return f"{metric['value']:.2f} {metric['unit']}"
+
+
+def compare(results, baseline, threshold, thresholds, min_delta):
+    """Print current vs. baseline per metric. Returns the names of the metrics that regressed."""
+    regressed = []
+    print(f"\n{'metric':24} {'baseline':>14} {'current':>14} {'change':>8}")
+    for name, metric in results["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None:
+            print(f"{name:24} {'-':>14} {format_value(metric):>14}      new")
+            continue
+        before, now = base["value"], metric["value"]
+        change = (now - before) / before if before else 0.0
+        # Positive "worse" means a regression whichever direction is better
+        worse = -change if metric["better"] == "higher" else change
+        limit = thresholds.get(name, threshold)
+        failed = worse > limit and (metric["unit"] != "s" or abs(now - before) * 1000 >= min_delta)
+        if failed:
+            regressed.append(name)
+        print(f"{name:24} {format_value(base):>14} {format_value(metric):>14} {change:+8.1%}"
+              + (f"  REGRESSION (limit {limit:.0%})" if failed else ""))
+    return regressed
+
+
+def parse_threshold(text):
+    name, _, value = text.partition("=")
+    if not name or not value:
+        raise argparse.ArgumentTypeError(f"expected METRIC=FRACTION, got {text!r}")
+    return name, float(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    corpus.add_arguments(parser)
+    parser.add_argument("--corpus", help="Use reports already written by corpus.py instead of generating them")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the median is kept (default: 3)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes for the batch benchmark (default: CPU count)")
+    parser.add_argument("--skip-pdf", action="store_true",
+                        help="Stop at the HTML, with images linked from the cache as in the preview "
+                             "(also skips the batch benchmark)")
+    parser.add_argument("--skip-batch", action="store_true", help="Don't measure batch throughput")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH),
+                        help=f"Baseline to compare with, if it exists (default: {BASELINE_PATH})")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown as a fraction of the baseline (default: 0.25)")
+    parser.add_argument("--threshold-for", type=parse_threshold, action="append", default=[], metavar="METRIC=FRACTION",
+                        help="Allowed slowdown for one metric, e.g. stage.pdf=0.5 (repeatable)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="Ignore slowdowns smaller than this many ms (default: 2)")
+    args = parser.parse_args()
+
+    options = corpus.corpus_options(args)
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir = args.corpus
+        if not corpus_dir:
+            corpus_dir = Path(tmp) / "corpus"
+            started = time.perf_counter()
+            corpus.generate(corpus_dir, **dict(options, image_size=args.image_size))
+            print(f"Generated {args.reports} reports in {time.perf_counter() - started:.1f}s")
+        samples = measure(corpus_dir, args)
+    results = results_for(samples, args, options)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Results written to {args.output}")
+
+    status = 0
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Baseline written to {baseline_path}")
+    elif baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        if baseline.get("corpus") != options or baseline.get("run", {}).get("skip_pdf") != args.skip_pdf:
+            print(f"{baseline_path} was taken with a different corpus or --skip-pdf; "
+                  f"re-run with the same options or --save-baseline", file=sys.stderr)
+            sys.exit(2)
+        regressed = compare(results, baseline, args.threshold, dict(args.threshold_for), args.min_delta_ms)
+        if regressed:
+            print(f"\n{len(regressed)} metric(s) regressed: {', '.join(regressed)}", file=sys.stderr)
+            status = 1
+    else:
+        for name, metric in results["metrics"].items():
+            print(f"  {name:24} {format_value(metric):>14}")
+        print(f"No baseline at {baseline_path}; run with --save-baseline to create one")
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
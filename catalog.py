@@ -0,0 +1,387 @@
+import json
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from batch import collect_reports
+from engine import CACHE_DIR, read_settings
+from incremental import input_root, output_base_for
+from ioctable import read_sidecar
+from preprocess import content_start, split_frontmatter
+
+
+SCHEMA_VERSION = 1
+# Frontmatter fields with their own column (and FTS column); the rest is searchable as "other"
+FIELDS = ["title", "family", "verdict", "tlp", "analyst", "date"]
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    title TEXT, family TEXT, verdict TEXT, tlp TEXT, analyst TEXT, date TEXT,
+    tags TEXT,
+    meta TEXT,
+    html_path TEXT,
+    pdf_path TEXT,
+    sources TEXT,
+    indexed_at REAL,
+    opened_at REAL
+);
+CREATE INDEX IF NOT EXISTS reports_recent ON reports (opened_at DESC, date DESC);
+CREATE TABLE IF NOT EXISTS iocs (
+    value TEXT NOT NULL,
+    report_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    PRIMARY KEY (value, report_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS iocs_report ON iocs (report_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(title, family, verdict, tlp, analyst, tags, other, prefix='2 3');
+"""
+
+HASH_RE = re.compile(r"\b(?:[0-9a-fA-F]{64}|[0-9a-fA-F]{40}|[0-9a-fA-F]{32})\b")
+IPV4_RE = re.compile(r"\b(?:(?:25[0-5]|2[0-4]\d|1?\d?\d)\.){3}(?:25[0-5]|2[0-4]\d|1?\d?\d)\b")
+DOMAIN_RE = re.compile(r"\b(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,24}\b")
+HASH_KINDS = {32: "md5", 40: "sha1", 64: "sha256"}
+# "Domains" that are really file names
+FILE_SUFFIXES = {"md", "png", "jpg", "jpeg", "gif", "svg", "webp", "bmp", "ico", "pdf", "html", "htm", "css",
+                 "js", "json", "yaml", "yml", "xml", "txt", "log", "csv", "tsv", "py", "ps1", "sh", "bat",
+                 "cmd", "vbs", "exe", "dll", "sys", "bin", "dat", "tmp", "zip", "rar", "gz", "tar", "doc",
+                 "docx", "xls", "xlsx", "ppt", "pptx", "lnk", "msi", "jar", "class", "so", "elf", "ini"}
+DEFANG = [("[.]", "."), ("(.)", "."), ("{.}", "."), ("[:]", ":"), ("hxxp", "http"), ("[@]", "@")]
+WORD_RE = re.compile(r"\w+")
+
+
+def default_path(settings=None):
+    return Path((settings or {}).get("catalog_path") or CACHE_DIR / "catalog.sqlite")
+
+
+def connect(path=None):
+    """Open (creating if needed) the catalog database."""
+    path = Path(path or default_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path))
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        # An index, not a source of truth: rebuild rather than migrate
+        conn.executescript("DROP TABLE IF EXISTS reports; DROP TABLE IF EXISTS iocs; DROP TABLE IF EXISTS reports_fts;")
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    return conn
+
+
+def refang(text):
+    for old, new in DEFANG:
+        if old in text:
+            text = text.replace(old, new)
+    return text
+
+
+def normalize_ioc(value):
+    return refang(value.strip()).lower()
+
+
+def _suffix_at(text, pos):
+    m = WORD_RE.match(text, pos)
+    return m.group(0).lower() if m else ""
+
+
+def extract_iocs(text):
+    """{value: kind} of the hashes, IPv4 addresses and domains in text (defanged forms included)."""
+    text = refang(text)
+    iocs = {}
+    for m in HASH_RE.finditer(text):
+        if text.startswith(".", m.end()) and _suffix_at(text, m.end() + 1) in FILE_SUFFIXES:
+            continue  # A file named after its hash, e.g. a screenshot
+        iocs[m.group(0).lower()] = HASH_KINDS[len(m.group(0))]
+    for m in IPV4_RE.finditer(text):
+        iocs[m.group(0)] = "ipv4"
+    for m in DOMAIN_RE.finditer(text):
+        domain = m.group(0).lower()
+        if domain.rsplit(".", 1)[1] not in FILE_SUFFIXES:
+            iocs.setdefault(domain, "domain")
+    return iocs
+
+
+def _fingerprint(path):
+    st = Path(path).stat()
+    return [str(path), st.st_mtime_ns, st.st_size]
+
+
+def _artifacts(md_path, output_dir=None, root=None):
+    base = output_base_for(md_path, output_dir, root)
+    html_path, pdf_path = base.with_suffix(".html"), base.with_suffix(".pdf")
+    return (str(html_path.resolve()) if html_path.exists() else None,
+            str(pdf_path.resolve()) if pdf_path.exists() else None)
+
+
+def extract_report(md_path, output_dir=None, root=None):
+    """Catalog entry for one report (runs in pool workers): frontmatter, IOCs and output paths.
+
+    output_dir and root locate the outputs as batch lays them out.
+    """
+    import yaml
+
+    md_path = Path(md_path).resolve()
+    entry = {"path": str(md_path), "sources": [_fingerprint(md_path)], "error": None}
+    text = md_path.read_text(encoding="utf-8")
+    meta = {}
+    start = content_start(text)
+    if start is not None:
+        yaml_text, _, _ = split_frontmatter(text, start)
+        if yaml_text is not None:
+            try:
+                meta = yaml.safe_load(yaml_text) or {}
+            except Exception as e:
+                entry["error"] = f"Invalid YAML frontmatter: {e}"
+            if not isinstance(meta, dict):
+                meta = {}
+
+    iocs = extract_iocs(text)
+    sidecars = meta.get("ioc_file") or []
+    # A path or a list of them, as for RenderEngine.ioc_appendix
+    for name in sidecars if isinstance(sidecars, list) else [sidecars]:
+        sidecar = md_path.parent / str(name)
+        try:
+            header, rows = read_sidecar(sidecar)
+            for row in rows:
+                iocs.update((k, v) for k, v in extract_iocs(" ".join(str(c) for c in row)).items() if k not in iocs)
+            entry["sources"].append(_fingerprint(sidecar))
+        except Exception as e:
+            entry["error"] = f"Failed to read IOC file {sidecar}: {e}"
+
+    entry["meta"] = meta
+    entry["iocs"] = iocs
+    entry["html_path"], entry["pdf_path"] = _artifacts(md_path, output_dir, root)
+    return entry
+
+
+def _text(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value)
+    return str(value)
+
+
+def _store(conn, entry, now):
+    meta = entry["meta"]
+    fields = {name: _text(meta.get(name)) for name in FIELDS}
+    if fields["analyst"] is None:
+        fields["analyst"] = _text(meta.get("author"))
+    tags = meta.get("tags") or []
+    tags = [str(t).strip().lower() for t in (tags if isinstance(tags, (list, tuple)) else str(tags).split(","))]
+    tags_column = "," + ",".join(t for t in tags if t) + "," if tags else None
+
+    conn.execute(
+        f"""INSERT INTO reports (path, {", ".join(FIELDS)}, tags, meta, html_path, pdf_path, sources, indexed_at)
+            VALUES (?, {", ".join("?" for _ in FIELDS)}, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (path) DO UPDATE SET {", ".join(f"{f} = excluded.{f}" for f in FIELDS)},
+                tags = excluded.tags, meta = excluded.meta, html_path = excluded.html_path,
+                pdf_path = excluded.pdf_path, sources = excluded.sources, indexed_at = excluded.indexed_at""",
+        [entry["path"], *fields.values(), tags_column, json.dumps(meta, default=str),
+         entry["html_path"], entry["pdf_path"], json.dumps(entry["sources"]), now])
+    report_id = conn.execute("SELECT id FROM reports WHERE path = ?", (entry["path"],)).fetchone()[0]
+
+    other = " ".join(_text(v) or "" for k, v in meta.items() if k not in FIELDS and k != "tags")
+    conn.execute("DELETE FROM reports_fts WHERE rowid = ?", (report_id,))
+    conn.execute("INSERT INTO reports_fts (rowid, title, family, verdict, tlp, analyst, tags, other) "
+                 "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                 (report_id, fields["title"], fields["family"], fields["verdict"], fields["tlp"],
+                  fields["analyst"], " ".join(tags), other))
+    conn.execute("DELETE FROM iocs WHERE report_id = ?", (report_id,))
+    conn.executemany("INSERT INTO iocs (value, report_id, kind) VALUES (?, ?, ?)",
+                     ((value, report_id, kind) for value, kind in entry["iocs"].items()))
+    return report_id
+
+
+def _delete(conn, report_id):
+    conn.execute("DELETE FROM reports WHERE id = ?", (report_id,))
+    conn.execute("DELETE FROM reports_fts WHERE rowid = ?", (report_id,))
+    conn.execute("DELETE FROM iocs WHERE report_id = ?", (report_id,))
+
+
+def _up_to_date(sources):
+    try:
+        return all(_fingerprint(path) == [path, mtime_ns, size] for path, mtime_ns, size in json.loads(sources))
+    except OSError:
+        return False
+
+
+def index(conn, targets, output_dir=None, workers=None, on_progress=None):
+    """Add or refresh the reports matched by targets (directories or globs); returns counts.
+
+    A report is only read again when it or its ioc_file changed since it
+    was indexed (mtime and size). Entries under a directory target whose
+    file is gone are removed.
+    """
+    reports = {}
+    roots = {}
+    for target in targets:
+        for md_path in collect_reports(target):
+            path = str(md_path.resolve())
+            reports.setdefault(path, md_path)
+            roots.setdefault(path, str(input_root(target)))
+    known = {row["path"]: row for row in conn.execute("SELECT id, path, sources, html_path, pdf_path FROM reports")}
+
+    stale = []
+    for path, md_path in reports.items():
+        row = known.get(path)
+        if row is None or not _up_to_date(row["sources"]):
+            stale.append(path)
+            continue
+        # The report is unchanged, but it may have been rendered (or its outputs removed) since
+        artifacts = _artifacts(md_path, output_dir, roots[path])
+        if artifacts != (row["html_path"], row["pdf_path"]):
+            conn.execute("UPDATE reports SET html_path = ?, pdf_path = ? WHERE id = ?", (*artifacts, row["id"]))
+
+    counts = {"indexed": 0, "unchanged": len(reports) - len(stale), "removed": 0, "failed": 0, "errors": []}
+    now = time.time()
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(stale) > 50:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        entries = pool.map(_extract_or_error, stale, [output_dir] * len(stale), [roots[p] for p in stale],
+                           chunksize=32)
+    else:
+        pool = None
+        entries = (_extract_or_error(path, output_dir, roots[path]) for path in stale)
+    try:
+        for entry in entries:
+            if entry.get("meta") is None:
+                counts["errors"].append((entry["path"], entry["error"]))
+                counts["failed"] += 1
+                continue
+            if entry["error"]:
+                counts["errors"].append((entry["path"], entry["error"]))
+            _store(conn, entry, now)
+            counts["indexed"] += 1
+            if on_progress:
+                on_progress(counts["indexed"], len(stale))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    for target in targets:
+        if Path(target).is_dir():
+            prefix = str(Path(target).resolve()) + os.sep
+            for path, row in known.items():
+                if path.startswith(prefix) and path not in reports:
+                    _delete(conn, row["id"])
+                    counts["removed"] += 1
+    conn.commit()
+    return counts
+
+
+def _extract_or_error(path, output_dir=None, root=None):
+    try:
+        return extract_report(path, output_dir, root)
+    except Exception as e:
+        return {"path": path, "meta": None, "error": str(e)}
+
+
+def index_file(conn, md_path, opened=False):
+    """Refresh one report (e.g. on open or save in the GUI); opened marks it as just used."""
+    entry = extract_report(md_path)
+    report_id = _store(conn, entry, time.time())
+    if opened:
+        conn.execute("UPDATE reports SET opened_at = ? WHERE id = ?", (time.time(), report_id))
+    conn.commit()
+    return report_id
+
+
+def fts_query(text):
+    """FTS5 query matching every word of text, the last one as a prefix (for search-as-you-type)."""
+    words = WORD_RE.findall(text)
+    if not words:
+        return None
+    return " ".join(f'"{w}"' for w in words[:-1]) + (" " if len(words) > 1 else "") + f'"{words[-1]}"*'
+
+
+def search(conn, text=None, ioc=None, tlp=None, verdict=None, family=None, analyst=None, tag=None, limit=50):
+    """Reports matching all the given criteria, most recently opened (then newest) first.
+
+    text is matched against the frontmatter (word prefixes); when it looks
+    like a single IOC, reports containing that IOC match too. ioc is an
+    exact hash/IP/domain (defanged forms accepted). tlp and verdict are
+    exact, family and analyst substrings, tag one exact tag; all ignore case.
+    """
+    where, params = [], []
+    # Exact IOCs first: SQLite drives the query from the first rowid IN (...), and they are the most selective
+    if ioc:
+        where.append("r.id IN (SELECT report_id FROM iocs WHERE value = ?)")
+        params.append(normalize_ioc(ioc))
+    if text and text.strip():
+        query = fts_query(text)
+        value = normalize_ioc(text)
+        conditions = []
+        if query:
+            conditions.append("r.id IN (SELECT rowid FROM reports_fts WHERE reports_fts MATCH ?)")
+            params.append(query)
+        if extract_iocs(value).get(value):
+            conditions.append("r.id IN (SELECT report_id FROM iocs WHERE value = ?)")
+            params.append(value)
+        if conditions:
+            where.append("(" + " OR ".join(conditions) + ")")
+    for column, value in (("tlp", tlp), ("verdict", verdict)):
+        if value:
+            where.append(f"r.{column} = ? COLLATE NOCASE")
+            params.append(value)
+    for column, value in (("family", family), ("analyst", analyst)):
+        if value:
+            where.append(f"r.{column} LIKE ?")
+            params.append(f"%{value}%")
+    if tag:
+        where.append("r.tags LIKE ?")
+        params.append(f"%,{tag.strip().lower()},%")
+
+    sql = "SELECT r.* FROM reports r"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    # NULLs sort last in DESC order, and this matches the reports_recent index
+    sql += " ORDER BY r.opened_at DESC, r.date DESC LIMIT ?"
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def iocs_for(conn, report_id):
+    return conn.execute("SELECT value, kind FROM iocs WHERE report_id = ? ORDER BY kind, value",
+                        (report_id,)).fetchall()
+
+
+def _cli_db_path(db_path, settings):
+    """--db if given, else the catalog_path setting the GUI uses too."""
+    return Path(db_path) if db_path else default_path(read_settings() if settings is None else settings)
+
+
+def run_index(targets, output_dir=None, workers=None, db_path=None, settings=None):
+    """CLI: index targets and print a summary. Returns the number of reports that couldn't be read."""
+    db_path = _cli_db_path(db_path, settings)
+    conn = connect(db_path)
+    started = time.perf_counter()
+    counts = index(conn, targets, output_dir=output_dir, workers=workers)
+    for path, error in counts["errors"]:
+        print(f"WARNING {path}: {error}")
+    print(f"Indexed {counts['indexed']}, unchanged {counts['unchanged']}, removed {counts['removed']} "
+          f"in {time.perf_counter() - started:.2f}s -> {db_path}")
+    return counts["failed"]
+
+
+def run_search(db_path=None, as_json=False, settings=None, **criteria):
+    """CLI: print the reports matching criteria (see search)."""
+    conn = connect(_cli_db_path(db_path, settings))
+    started = time.perf_counter()
+    rows = search(conn, **criteria)
+    elapsed = time.perf_counter() - started
+    if as_json:
+        print(json.dumps([{k: row[k] for k in row.keys() if k not in ("sources", "meta")} for row in rows],
+                         indent=2))
+        return
+    for row in rows:
+        outputs = " ".join(p for p in (row["pdf_path"], row["html_path"]) if p)
+        print(f"{row['date'] or '-':10}  {(row['tlp'] or '-'):6}  {row['family'] or '-':15}  "
+              f"{row['title'] or Path(row['path']).stem}\n    {row['path']}" + (f"\n    {outputs}" if outputs else ""))
+    print(f"{len(rows)} report(s) in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,256 @@
+import time
+import tkinter as tk
+
+from preprocess import content_start, split_frontmatter
+
+
+# How large sections are opened: "edit" (like the rest), "readonly" or "collapsed"
+LARGE_SECTION_MODES = ("edit", "readonly", "collapsed")
+# Milliseconds of inserting per event-loop turn while loading
+LOAD_SLICE_MS = 30
+
+
+def plan_sections(text, threshold):
+    """Split text into (large, piece) pairs that concatenate back to text.
+
+    A large piece is the body of a #/## section (its heading line stays in
+    the piece before) with at least threshold characters; frontmatter is
+    never part of one.
+    """
+    from livepreview import split_sections
+
+    start = content_start(text)
+    if not threshold or start is None or len(text) < threshold:
+        return [(False, text)]
+    _, body_start, _ = split_frontmatter(text, start)
+    pieces = []
+    pos = body_start
+    plain_from = 0
+    for section in split_sections(text[body_start:]):
+        heading_end = section.find("\n") + 1
+        if heading_end and len(section) - heading_end >= threshold:
+            pieces.append((False, text[plain_from:pos + heading_end]))
+            pieces.append((True, section[heading_end:]))
+            plain_from = pos + len(section)
+        pos += len(section) + 1
+    pieces.append((False, text[plain_from:]))
+    return [piece for piece in pieces if piece[1]]
+
+
+def chunks(text, size):
+    """Pieces of text of about size characters, cut after a newline where there is one."""
+    pos = 0
+    while pos < len(text):
+        end = pos + size
+        if end < len(text):
+            newline = text.rfind("\n", pos, end)
+            end = newline + 1 if newline >= 0 else end
+        yield text[pos:end]
+        pos = end
+
+
+class EditorBuffer:
+    """The editor's Text widget with chunked loading and a cached copy of its text.
+
+    text() only reads the widget again after an edit: it owns the widget's
+    modified flag (resetting it on every <<Modified>>, which bumps version)
+    and callers subscribe with on_change() instead of binding <<Modified>>
+    themselves. Large sections can be opened read-only or collapsed behind
+    an "expand" button; a collapsed section's text stays here, not in the
+    widget, and is spliced back into text().
+    """
+
+    def __init__(self, widget, settings):
+        self.widget = widget
+        self.settings = settings
+        self.version = 0
+        self._snapshot = None
+        self._snapshot_version = None
+        self._listeners = []
+        # mark name -> (section text, expand button) for collapsed sections
+        self._collapsed = {}
+        self._next_mark = 0
+        # Full text while a chunked load is running
+        self._loading = None
+        self._load_job = None
+
+        widget.tag_configure("readonly", background="#f2f2f2", foreground="#555555")
+        widget.bind("<<Modified>>", self._on_modified)
+        widget.bind("<Key>", self._on_key, add="+")
+        for sequence in ("<<Paste>>", "<<Cut>>"):
+            widget.bind(sequence, self._on_paste_or_cut, add="+")
+
+    @property
+    def loading(self):
+        return self._loading is not None
+
+    def on_change(self, callback):
+        """Call callback() after each edit (not for the inserts of a load)."""
+        self._listeners.append(callback)
+
+    def _on_modified(self, event=None):
+        if not self.widget.edit_modified():
+            return
+        self.widget.edit_modified(False)
+        self.version += 1
+        if self._loading is None:
+            for callback in self._listeners:
+                callback()
+
+    def text(self):
+        """The document, like widget.get("1.0", END), read again only after an edit."""
+        if self._loading is not None:
+            return self._loading
+        # <<Modified>> is delivered through the event queue, so an edit may not have bumped version yet
+        if self._snapshot_version != self.version or self.widget.edit_modified():
+            self._snapshot = self._read()
+            self._snapshot_version = None if self.widget.edit_modified() else self.version
+        return self._snapshot
+
+    def _read(self):
+        if not self._collapsed:
+            return self.widget.get("1.0", tk.END)
+        parts = []
+        start = "1.0"
+        for mark in self._marks_in_order():
+            parts.append(self.widget.get(start, mark))
+            parts.append(self._collapsed[mark][0])
+            start = mark
+        parts.append(self.widget.get(start, tk.END))
+        return "".join(parts)
+
+    def _marks_in_order(self):
+        # A section whose button was deleted along with the text around it is gone
+        for mark, (_, button) in list(self._collapsed.items()):
+            if not button.winfo_exists():
+                del self._collapsed[mark]
+                self.widget.mark_unset(mark)
+        return sorted(self._collapsed, key=lambda m: tuple(int(n) for n in self.widget.index(m).split(".")))
+
+    def clear(self):
+        self._cancel_load()
+        for mark, (_, button) in self._collapsed.items():
+            button.destroy()
+            self.widget.mark_unset(mark)
+        self._collapsed = {}
+        self.widget.config(state=tk.NORMAL)
+        self.widget.delete("1.0", tk.END)
+
+    def set_text(self, text):
+        """Replace the contents at once (for short text such as a new document's template)."""
+        self.clear()
+        self.widget.insert("1.0", text)
+
+    def load(self, text, on_done=None):
+        """Replace the contents with text, inserting it a slice at a time so the window stays responsive.
+
+        Until the load finishes the widget is read-only and text() returns
+        the text being loaded. on_done() is called at the end.
+        """
+        self.clear()
+        mode = self.settings.get("editor_large_sections", "collapsed")
+        threshold = int(self.settings.get("editor_large_section_kb") or 0) * 1024
+        size = max(1, int(self.settings.get("editor_chunk_kb") or 256)) * 1024
+        pieces = plan_sections(text, threshold if mode in ("readonly", "collapsed") else 0)
+
+        def steps():
+            for large, piece in pieces:
+                if large and mode == "collapsed":
+                    yield lambda piece=piece: self._collapse(piece)
+                else:
+                    tags = ("readonly",) if large else ()
+                    for chunk in chunks(piece, size):
+                        yield lambda chunk=chunk, tags=tags: self.widget.insert("load_end", chunk, tags)
+
+        self._loading = text
+        self.widget.mark_set("load_end", "1.0")
+        self.widget.mark_gravity("load_end", tk.RIGHT)
+        self.widget.config(state=tk.DISABLED)
+        self._load_job = self.widget.after_idle(self._load_slice, steps(), on_done)
+
+    def _load_slice(self, steps, on_done):
+        deadline = time.perf_counter() + LOAD_SLICE_MS / 1000
+        self.widget.config(state=tk.NORMAL)
+        try:
+            for step in steps:
+                step()
+                if time.perf_counter() > deadline:
+                    self.widget.config(state=tk.DISABLED)
+                    self._load_job = self.widget.after(1, self._load_slice, steps, on_done)
+                    return
+        except Exception:
+            self._finish_load()
+            raise
+        self._finish_load()
+        if on_done:
+            on_done()
+
+    def _finish_load(self):
+        self._load_job = None
+        self._loading = None
+        self.widget.config(state=tk.NORMAL)
+        self.widget.mark_unset("load_end")
+        self.widget.mark_set(tk.INSERT, "1.0")
+        self.widget.see("1.0")
+        self.widget.edit_reset()
+
+    def _cancel_load(self):
+        if self._load_job is not None:
+            self.widget.after_cancel(self._load_job)
+            self._load_job = None
+        self._loading = None
+
+    def _collapse(self, section):
+        mark = f"collapsed{self._next_mark}"
+        self._next_mark += 1
+        lines = section.count("\n") + 1
+        button = tk.Button(self.widget, text=f"▸ {lines:,} lines ({len(section) / 1024:,.0f} KB) collapsed, click to expand",
+                           relief=tk.FLAT, cursor="hand2", command=lambda: self.expand(mark))
+        self.widget.mark_set(mark, "load_end")
+        self.widget.mark_gravity(mark, tk.LEFT)
+        self.widget.window_create(mark, window=button)
+        self._collapsed[mark] = (section, button)
+
+    def expand(self, mark, on_done=None):
+        """Put a collapsed section back into the widget (in slices, like load)."""
+        if self.loading:
+            return
+        text = self.text()
+        section, button = self._collapsed.pop(mark)
+        self.widget.delete(mark)  # The button
+        size = max(1, int(self.settings.get("editor_chunk_kb") or 256)) * 1024
+        self.widget.mark_set("load_end", mark)
+        self.widget.mark_gravity("load_end", tk.RIGHT)
+        self.widget.mark_unset(mark)
+        self._loading = text
+        self.widget.config(state=tk.DISABLED)
+        steps = (lambda chunk=chunk: self.widget.insert("load_end", chunk) for chunk in chunks(section, size))
+        self._load_job = self.widget.after_idle(self._load_slice, steps, on_done)
+
+    def _on_key(self, event):
+        if event.keysym in ("BackSpace", "Delete", "Return", "Tab") or (event.char and event.char.isprintable()):
+            return self._block_readonly(event.keysym)
+        return None
+
+    def _on_paste_or_cut(self, event):
+        return self._block_readonly(None)
+
+    def _block_readonly(self, keysym):
+        """"break" (and a bell) when an edit would change read-only text."""
+        if not self.widget.tag_ranges("readonly"):
+            return None
+        if self.widget.tag_ranges(tk.SEL):
+            blocked = ("readonly" in self.widget.tag_names(tk.SEL_FIRST)
+                       or bool(self.widget.tag_nextrange("readonly", tk.SEL_FIRST, tk.SEL_LAST)))
+        elif keysym == "BackSpace":
+            blocked = "readonly" in self.widget.tag_names("insert -1c")
+        elif keysym == "Delete":
+            blocked = "readonly" in self.widget.tag_names(tk.INSERT)
+        else:
+            blocked = ("readonly" in self.widget.tag_names(tk.INSERT)
+                       and "readonly" in self.widget.tag_names("insert -1c"))
+        if blocked:
+            self.widget.bell()
+            return "break"
+        return None
+
@@ -0,0 +1,822 @@
+import hashlib
+import json
+import base64
+from datetime import datetime
+from pathlib import Path
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
+from html import escape
+from urllib.parse import unquote
+
+# WeasyPrint, Markdown, Pygments, Pillow, Jinja2 and YAML are imported where they
+# are first used (see preload()), so the GUI window can appear before they load.
+from imagecache import ImageCache
+from imagepipeline import prepare_image, print_box
+from ioctable import read_sidecar, render_table, substitute_tables
+from preprocess import content_start, image_refs, join, scan, split_frontmatter, table_blocks
+from templates import TemplateRegistry
+
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+SETTINGS_PATH = SCRIPT_DIR / "settings.json"
+CACHE_DIR = SCRIPT_DIR / ".cache"
+
+DEFAULT_SETTINGS = {
+    "font": "Arial, sans-serif",
+    "margin": "1.5cm",
+    "style": "default",
+    "logo_path": "",
+    "template": "default",
+    "image_cache_dir": "",
+    "image_cache_mb": 64,
+    "image_dpi": 192,
+    "page_width": "210mm",
+    "image_max_height": "500px",
+    "pdf_image_mode": "reference",
+    "image_workers": 0,
+    "ioc_table_min_rows": 500,
+    "ioc_table_chunk_rows": 1000,
+    "pdf_shards": 0,
+    "pdf_shard_min_kb": 1024,
+    "pdf_optimize_images": False,
+    "pdf_jpeg_quality": 0,
+    "pdf_full_fonts": False,
+    "pdf_hinting": False,
+    "pdf_variant": "",
+    "pdf_thumbnail_width": 0,
+    "live_preview_delay_ms": 300,
+    "editor_chunk_kb": 256,
+    "editor_large_section_kb": 512,
+    "editor_large_sections": "collapsed",
+    "catalog_path": "",
+    "highlight_cache": True,
+    "highlight_cache_dir": "",
+    "highlight_cache_mb": 64,
+    "highlight_max_bytes": 262144,
+    "highlight_guess_max_bytes": 16384,
+    "recent_files": []
+}
+
+# Keys to skip from rendering in the meta section (handled specially or elsewhere)
+EXCLUDED_KEYS = {"title", "tlp", "tags", "template", "ioc_file", "ioc_title"}
+# My preferred order for yaml
+FIELD_ORDER = ["title", "date", "analyst", "file", "tlp", "tags", "aliases", "family", "campaign", "source", "confidence","verdict"]
+
+# Matches the .logo rule in the templates
+LOGO_CSS_WIDTH = "140px"
+# Transparent 1x1 GIF for <img> tags whose picture comes from a shared CSS rule
+PLACEHOLDER_SRC = "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
+
+MARKDOWN_EXTENSIONS = ["extra", "tables", "fenced_code", "codehilite", "sane_lists", "nl2br"]
+
+
+# Markdown converters are stateful and not thread-safe: one per thread per extension list
+_converters = threading.local()
+
+
+def get_markdown_converter(extensions=tuple(MARKDOWN_EXTENSIONS), highlight_options=None):
+    """Long-lived markdown.Markdown for this thread, reset and ready for a new document.
+
+    Building the pipeline (six extensions, their processors and patterns)
+    costs more than converting a short report, so it is done once.
+    highlight_options (a tuple of CachedHighlightExtension config items)
+    adds the cached code highlighter in front of fenced_code.
+    """
+    cache = getattr(_converters, "by_extensions", None)
+    if cache is None:
+        cache = _converters.by_extensions = {}
+    key = (extensions, highlight_options)
+    converter = cache.get(key)
+    if converter is None:
+        import markdown
+        from highlight import CachedHighlightExtension
+
+        extension_list = list(extensions)
+        if highlight_options is not None:
+            extension_list.append(CachedHighlightExtension(**dict(highlight_options)))
+        converter = cache[key] = markdown.Markdown(extensions=extension_list)
+    return converter.reset()
+
+
+@lru_cache(maxsize=None)
+def pygments_css(style):
+    """Pygments stylesheet for .codehilite blocks, generated once per style."""
+    from pygments.formatters import HtmlFormatter
+
+    return HtmlFormatter(style=style).get_style_defs('.codehilite')
+
+
+def data_uri(mime, data):
+    """Base64 data URI for encoded image bytes."""
+    return f"data:image/{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def preload():
+    """Import the rendering libraries ahead of the first render (the GUI does this on a background thread)."""
+    import markdown
+    import yaml
+    import jinja2
+    import pygments.formatters
+    import PIL.Image
+    import weasyprint
+
+
+def file_digest(path):
+    """sha256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def thumbs_dir_for(pdf_path):
+    """Folder the page thumbnails of pdf_path go to: <name>-thumbs next to it."""
+    pdf_path = Path(pdf_path)
+    return pdf_path.with_name(f"{pdf_path.stem}-thumbs")
+
+
+def read_settings(settings_path=SETTINGS_PATH):
+    """Read settings.json without creating it, falling back to the defaults."""
+    settings = dict(DEFAULT_SETTINGS)
+    settings_path = Path(settings_path)
+    if settings_path.exists():
+        try:
+            settings.update(json.loads(settings_path.read_text(encoding="utf-8")))
+        except Exception as e:
+            raise ValueError(f"Failed to load settings: {e}")
+    return settings
+
+
+class RenderCancelled(Exception):
+    """Raised from an on_progress callback to abandon a render."""
+
+
+class RenderEngine:
+    """Markdown + YAML frontmatter to HTML/PDF renderer with no GUI dependencies.
+
+    Non-fatal problems (missing images, bad logo path, ...) are reported
+    through the ``on_warning`` callback instead of dialogs, so the same
+    engine works in the Tk app, in batch workers and without a display.
+    """
+
+    def __init__(self, settings=None, template=None, on_warning=None, image_cache=None,
+                 reference_base_url=None, templates=None, template_name=None):
+        self.settings = dict(DEFAULT_SETTINGS) if settings is None else settings
+        # A fixed jinja2 Template overrides the registry (used for the GUI's error fallback)
+        self.template = template
+        self.templates = templates or TemplateRegistry(self.settings)
+        # Template for reports that don't name one in their frontmatter (None: settings["template"])
+        self.template_name = template_name
+        self.on_warning = on_warning or (lambda message: None)
+        self.image_cache = image_cache or self._make_image_cache()
+        # file:// URL -> CachedImage for images linked by the last generate_html(embed="reference")
+        self._references = {}
+        # (cache key, embed) -> src for the current render, so a repeated image is encoded once
+        self._image_srcs = {}
+        # Image cache content key -> reference URI, so identical images share one URL (one PDF XObject)
+        self._uri_by_key = {}
+        self._image_lock = threading.Lock()
+        self._image_executor = None
+        # ioctable.TableBlocks cut out by prepare_markdown, filled in by convert_markdown
+        self._tables = []
+        # Files the last generate_html read (images, logo, template), for incremental builds
+        self.dependencies = set()
+        # Serve references from here instead of file:// (e.g. the live preview's HTTP server)
+        self.reference_base_url = reference_base_url
+        # profiling.RenderProfile collecting stage timings, set by profiling.profiled()
+        self.profile = None
+        # Called as on_progress(stage, detail) while rendering; raising RenderCancelled from it stops the render
+        self.on_progress = None
+        # Page count and sizes (and thumbnail files) of the last PDF, see render_pdf()
+        self.pdf_info = None
+
+    def _make_image_cache(self):
+        """Build the image cache described by the settings."""
+        cache_dir = self.settings.get("image_cache_dir") or CACHE_DIR / "images"
+        max_bytes = int(self.settings.get("image_cache_mb", 64)) * 1024 * 1024
+        try:
+            return ImageCache(cache_dir, max_bytes)
+        except OSError:
+            # Read-only install: keep the in-memory cache only
+            return ImageCache(None, max_bytes)
+
+    def warn(self, message):
+        self.on_warning(message)
+
+    def _progress(self, stage, detail=None):
+        if self.on_progress is not None:
+            self.on_progress(stage, detail)
+
+    def _stage(self, name):
+        """Time a pipeline stage when a profile is attached (and report it to on_progress)."""
+        self._progress(name)
+        return self.profile.stage(name) if self.profile is not None else nullcontext()
+
+    def parse_frontmatter(self, md_text):
+        """Extract YAML frontmatter and markdown content body."""
+        start = content_start(md_text) or 0
+        meta, body_start = self.frontmatter_at(md_text, start)
+        return meta, md_text[body_start:].strip()
+
+    def frontmatter_at(self, md_text, start=0):
+        """Parse frontmatter opening at offset start. Returns (meta, offset of the body)."""
+        yaml_text, body_start, closed = split_frontmatter(md_text, start)
+        if not closed:
+            self.warn("YAML frontmatter is missing closing '---' delimiter. Treating entire content as markdown.")
+        if yaml_text is None:
+            return {}, body_start
+        import yaml
+
+        try:
+            return yaml.safe_load(yaml_text) or {}, body_start
+        except Exception as e:
+            raise ValueError(f"Invalid YAML frontmatter: {e}")
+
+    def encode_image_base64(self, image_path, css_width=None):
+        """Convert an image file to a base64 data URI for inline use."""
+        return self.image_src(image_path, css_width, embed="inline")
+
+    def image_src(self, image_path, css_width=None, embed="inline"):
+        """Return the URL to embed an image with, or "" if it can't be loaded.
+
+        The image is downscaled to the largest size it can be printed at
+        (see imagepipeline.print_box); css_width overrides the page width
+        for images with a fixed CSS width such as the logo. With
+        embed="reference" a file:// URL to the cached copy is returned
+        instead of a base64 data URI; inline_references() turns those back
+        into data URIs for standalone HTML.
+
+        Repeated references to an image return the same src without
+        re-encoding it, and identical files at different paths share one
+        reference URI, so WeasyPrint embeds the picture once.
+        """
+        try:
+            return self._load_image(image_path, css_width, embed)
+        except Exception:
+            self.warn(f"Failed to process image {image_path}")
+            return ""
+
+    def _load_image(self, image_path, css_width=None, embed="inline"):
+        """image_src() without the error handling; safe to call from several threads."""
+        started = time.perf_counter()
+        resolved_path = Path(image_path).resolve()
+        # Recorded even if it is missing, so adding the file later triggers a rebuild
+        self.dependencies.add(resolved_path)
+
+        # Simple path traversal protection
+        if not (SCRIPT_DIR in resolved_path.parents or SCRIPT_DIR == resolved_path.parent):
+            # If path is not relative to script directory, check if it's an absolute path
+            if not resolved_path.exists():
+                raise FileNotFoundError(f"Image not found: {image_path}")
+
+        box = print_box(self.settings, css_width)
+        variant = f"{box[0]}x{box[1]}"
+        key = self.image_cache.key_for(resolved_path, variant=variant)
+        src = self._image_srcs.get((key, embed))
+        if src is not None:
+            if self.profile is not None:
+                self.profile.record_image(resolved_path, time.perf_counter() - started, True,
+                                          resolved_path.stat().st_size, 0)
+            return src
+        image = self.image_cache.get(self.image_cache.resolve(key))
+        cache_hit = image is not None
+        if image is None:
+            image = self._encode_shared(resolved_path, key, variant, box)
+        if self.profile is not None:
+            self.profile.record_image(resolved_path, time.perf_counter() - started, cache_hit,
+                                      resolved_path.stat().st_size, len(image.data))
+
+        if embed == "reference" and image.path is not None:
+            with self._image_lock:
+                uri = self._uri_by_key.get(image.key)
+                if uri is None:
+                    if self.reference_base_url:
+                        uri = self.reference_base_url + image.path.relative_to(self.image_cache.cache_dir).as_posix()
+                    else:
+                        uri = image.path.as_uri()
+                    self._uri_by_key[image.key] = uri
+                    self._references[uri] = image
+            src = uri
+        else:
+            src = data_uri(image.mime, image.data)
+        if key is not None:
+            self._image_srcs[(key, embed)] = src
+        return src
+
+    def _encode_shared(self, resolved_path, key, variant, box):
+        """Encode an image missing from the cache, reusing an identical file's entry if there is one.
+
+        The content-keyed entry lives in the shared cache directory, so a
+        screenshot copied into several reports' media folders is only
+        downscaled once per batch, whichever worker gets to it first. The
+        path key is linked to it, so the next render skips hashing the file.
+        """
+        content_key = self.image_cache.content_key(file_digest(resolved_path), variant)
+        image = self.image_cache.get(content_key)
+        if image is None:
+            image = self.image_cache.put(content_key, *self._encode_image(resolved_path, box))
+        self.image_cache.link(key, content_key)
+        return image
+
+    def _encode_image(self, resolved_path, box):
+        """Downscale/re-encode an image. Returns (mime subtype, bytes)."""
+        try:
+            data, mime = prepare_image(resolved_path, box)
+        except Exception:
+            # Fallback to direct file reading if PIL processing fails (SVG, odd formats)
+            data = resolved_path.read_bytes()
+            # Get the file extension and determine MIME type
+            ext = resolved_path.suffix.lower().lstrip(".")
+            mime_types = {
+                "jpg": "jpeg", "jpeg": "jpeg", "png": "png",
+                "gif": "gif", "svg": "svg+xml", "webp": "webp"
+            }
+            mime = mime_types.get(ext, ext)
+        return mime, data
+
+    def inline_references(self, html):
+        """Replace file:// image references from the last render with data URIs.
+
+        An image used more than once is written once, as a CSS class in the
+        <head> whose content is the data URI; its <img> tags carry the class
+        and a 1px placeholder src.
+        """
+        return "".join(self.iter_inline_references(html))
+
+    def iter_inline_references(self, html):
+        """inline_references() in pieces, making each data URI only when it is reached.
+
+        Writing the pieces out as they come (see write_html) holds one
+        image's base64 at a time instead of the whole self-contained page.
+        """
+        if not self._references:
+            yield html
+            return
+        pattern = re.compile("|".join(re.escape(uri) for uri in self._references))
+        counts = {}
+        for m in pattern.finditer(html):
+            counts[m.group(0)] = counts.get(m.group(0), 0) + 1
+        shared = {uri: f"shared-img-{n}" for n, uri in enumerate(u for u, c in counts.items() if c > 1)}
+        head_end = html.find("</head>")
+        start = 0
+        if shared and head_end >= 0:
+            def replace_img(match):
+                tag = match.group(0)
+                src = re.search(r'src="([^"]*)"', tag)
+                if not src or src.group(1) not in shared:
+                    return tag
+                tag = tag.replace(src.group(0), f'src="{PLACEHOLDER_SRC}"', 1)
+                if ' class="' in tag:
+                    return tag.replace(' class="', f' class="{shared[src.group(1)]} ', 1)
+                return tag.replace("<img", f'<img class="{shared[src.group(1)]}"', 1)
+
+            html = re.sub(r"<img\b[^>]*>", replace_img, html)
+            head_end = html.find("</head>")
+            yield from self._inline_span(html, pattern, 0, head_end)
+            yield "<style>"
+            for uri, css_class in shared.items():
+                image = self._references[uri]
+                yield f"img.{css_class}{{content:url("
+                yield data_uri(image.mime, image.data)
+                yield ")}"
+            yield "</style>"
+            start = head_end
+        yield from self._inline_span(html, pattern, start, len(html))
+
+    def _inline_span(self, html, pattern, start, end):
+        """html[start:end] in pieces, with each reference replaced by its data URI."""
+        for m in pattern.finditer(html, start, end):
+            yield html[start:m.start()]
+            image = self._references[m.group(0)]
+            yield data_uri(image.mime, image.data)
+            start = m.end()
+        yield html[start:end]
+
+    def write_html(self, html, html_path):
+        """Write the self-contained .html artifact, streaming it piece by piece.
+
+        html is a page from the last generate_html, whose references are
+        turned into data URIs on the way, or an iterable of pieces (such as
+        generate_html(stream=True) returns), which are written as they are.
+        """
+        pieces = self.iter_inline_references(html) if isinstance(html, str) else html
+        with open(html_path, "w", encoding="utf-8") as f:
+            for piece in pieces:
+                f.write(piece)
+
+    def embed_images(self, refs, base_dir=None, embed="inline"):
+        """Set the src of each preprocess.ImageRef to a base64 data URI (or file:// reference).
+
+        The distinct local images are encoded on a thread pool (Pillow
+        releases the GIL while decoding and encoding) and failures are
+        warned about in document order. URLs and images that fail keep
+        their original reference.
+        """
+        if not base_dir:
+            base_dir = Path.cwd()
+        elif isinstance(base_dir, str):
+            base_dir = Path(base_dir)
+
+        # Pass 1: collect local image references (URLs are left alone)
+        paths = {}
+        for ref in refs:
+            img_path = ref.path
+            if img_path.startswith(('http://', 'https://', 'data:')):
+                continue
+            # Handle relative paths
+            if not Path(img_path).is_absolute():
+                img_path = base_dir / unquote(img_path)  # Decode %20, etc.
+            paths.setdefault(ref.path, img_path)
+        if not paths:
+            return
+
+        # Pass 2: encode each distinct file once, concurrently ("a.png" and "./a.png" are one job)
+        jobs = {}
+        for path in paths.values():
+            jobs.setdefault(os.path.normpath(path), path)
+        pool = self._image_pool() if len(jobs) > 1 else None
+        if pool is not None:
+            futures = {job: pool.submit(self._load_image, path, None, embed) for job, path in jobs.items()}
+        results = {}
+        for n, (job, path) in enumerate(jobs.items(), 1):
+            self._progress("images", f"{n}/{len(jobs)} {Path(path).name}")
+            try:
+                results[job] = futures[job].result() if pool is not None else self._load_image(path, None, embed)
+            except Exception:
+                self.warn(f"Failed to process image {path}")
+                results[job] = ""
+        for ref in refs:
+            if ref.path in paths:
+                ref.src = results[os.path.normpath(paths[ref.path])]
+
+    def _image_pool(self):
+        """Lazily created thread pool for image encoding (None when image_workers is 1)."""
+        workers = int(self.settings.get("image_workers") or 0) or min(8, os.cpu_count() or 1)
+        if workers < 2:
+            return None
+        if self._image_executor is None:
+            self._image_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image")
+        return self._image_executor
+
+    def format_meta_html(self, meta):
+        """Format metadata as HTML for the report."""
+        parts = []
+        rendered_keys = set()
+        for k in FIELD_ORDER:
+            if k not in meta:
+                continue
+            rendered_keys.add(k)
+            if k in EXCLUDED_KEYS:
+                continue
+            v = meta[k]
+            label = f"<strong>{k.title()}:</strong>"
+            # Handle verdict specially
+            if k == "verdict":
+                verdict_lower = str(v).lower() if v else "unknown"
+                css_class = (
+                    "verdict verdict-malicious" if "malicious" in verdict_lower else
+                    "verdict verdict-benign" if "benign" in verdict_lower else
+                    "verdict verdict-unknown"
+                )
+                parts.append(f'<div>{label} <span class="{css_class}">{v}</span></div>')
+
+            # Handle TLP specially
+            elif k == "tlp":
+                tlp = str(v).upper() if v else ""
+                tlp_class_map = {
+                    "RED": "tlp tlp-red",
+                    "AMBER": "tlp tlp-amber",
+                    "GREEN": "tlp tlp-green",
+                    "CLEAR": "tlp tlp-clear"
+                }
+                tlp_class = tlp_class_map.get(tlp, "")
+                if tlp_class:
+                    parts.append(f'<div><strong>TLP:</strong> <span class="{tlp_class}">{tlp}</span></div>')
+                else:
+                    parts.append(f"<div>{label} {v}</div>")
+
+            # Handle dates specially to format them
+            elif k in ["date", "analysis_date"] and v:
+                try:
+                    if isinstance(v, str):
+                        # Try to parse and format date string
+                        date_obj = datetime.strptime(v, "%Y-%m-%d")
+                        formatted_date = date_obj.strftime("%B %d, %Y")
+                        parts.append(f"<div>{label} {formatted_date}</div>")
+                    else:
+                        parts.append(f"<div>{label} {v}</div>")
+                except:
+                    # If date parsing fails, use as-is
+                    parts.append(f"<div>{label} {v}</div>")
+            else:
+                parts.append(f"<div>{label} {meta[k]}</div>")
+
+        # render any other meta data not found in FIELD_ORDER
+        for k, v in meta.items():
+            if k in rendered_keys or k in EXCLUDED_KEYS:
+                continue
+            label = f"<strong>{k.title()}:</strong>"
+            parts.append(f"<div>{label} {v}</div>")
+        return "".join(parts)
+
+    def format_tags_html(self, tags):
+        """Format tags as HTML for the report."""
+        if not tags:
+            return ""
+
+        # Normalize tags to list
+        if isinstance(tags, str):
+            tags = [t.strip() for t in tags.split(",") if t.strip()]
+        elif not isinstance(tags, list):
+            return ""
+
+        return "".join(f'<span class="tag">{tag.strip()}</span>' for tag in tags)
+
+    def get_tlp_class(self, tlp):
+        """Get CSS class for TLP indicator."""
+        tlp = str(tlp).upper() if tlp else ""
+        tlp_class_map = {
+            "RED": "tlp-red",
+            "AMBER": "tlp-amber",
+            "GREEN": "tlp-green",
+            "CLEAR": "tlp-clear"
+        }
+        return tlp_class_map.get(tlp, "")
+
+    def _encode_logo(self, embed="inline"):
+        """Embed the logo from the settings path, if one is configured."""
+        logo_path = self.settings.get("logo_path", "")
+        if not logo_path:
+            return ""
+        try:
+            # Try to resolve logo path (absolute or relative to script dir)
+            if Path(logo_path).is_absolute():
+                logo_file_path = Path(logo_path)
+            else:
+                logo_file_path = (SCRIPT_DIR / logo_path).resolve()
+
+            self.dependencies.add(logo_file_path)
+            if logo_file_path.exists():
+                return self.image_src(logo_file_path, css_width=LOGO_CSS_WIDTH, embed=embed)
+            self.warn(f"Logo file not found: {logo_file_path}")
+        except Exception as e:
+            self.warn(f"Error processing logo: {e}")
+        return ""
+
+    def generate_html(self, raw_md, base_dir=None, embed="inline", stream=False):
+        """Generate HTML report from markdown content.
+
+        embed="reference" links images as file:// URLs into the image cache,
+        which is what the PDF path wants: WeasyPrint reads the bytes straight
+        from disk instead of parsing and base64-decoding a huge HTML string.
+        With stream=True the page comes back as an iterator of pieces from
+        the template (see render_template) instead of one string.
+        """
+        start = content_start(raw_md)
+        if start is None:
+            return None
+        self._references = {}
+        self._image_srcs = {}
+        self._uri_by_key = {}
+        self.dependencies = set()
+
+        try:
+            with self._stage("frontmatter"):
+                meta, body_start = self.frontmatter_at(raw_md, start)
+            content_html = self.convert_markdown(self.prepare_markdown(raw_md, base_dir, embed, body_start))
+            if meta.get("ioc_file"):
+                content_html += self.ioc_appendix(meta, base_dir)
+            return self.render_template(meta, content_html, embed, stream)
+        except RenderCancelled:
+            raise
+        except Exception as e:
+            raise Exception(f"HTML generation failed: {e}")
+
+    def prepare_markdown(self, content_md, base_dir=None, embed="inline", start=0):
+        """Fix escaped headers and embed images in a markdown body (or part of one) from offset start.
+
+        Both are found in a single scan (see preprocess.scan), so a large
+        report is only copied once more, when the pieces are joined. Tables
+        of ioc_table_min_rows rows or more are left as placeholders that
+        convert_markdown() fills in without the markdown parser.
+        """
+        with self._stage("scan"):
+            parts = scan(content_md, start, int(self.settings.get("ioc_table_min_rows") or 0),
+                         int(self.settings.get("ioc_table_chunk_rows") or 0))
+            self._tables = table_blocks(parts)
+        with self._stage("images"):
+            self.embed_images(image_refs(parts), base_dir, embed)
+        return join(parts)
+
+    def convert_markdown(self, content_md):
+        """Convert markdown body to HTML."""
+        with self._stage("markdown"):
+            html = get_markdown_converter(highlight_options=self._highlight_options()).convert(content_md)
+        if not self._tables:
+            return html
+        with self._stage("tables"):
+            html = substitute_tables(html, self._tables)
+        self._tables = []
+        return html
+
+    def ioc_appendix(self, meta, base_dir=None):
+        """Tables for the CSV/JSON files named by the frontmatter's ioc_file (a path or a list)."""
+        files = meta["ioc_file"] if isinstance(meta["ioc_file"], list) else [meta["ioc_file"]]
+        title = meta.get("ioc_title") or "Indicators of Compromise"
+        chunk_rows = int(self.settings.get("ioc_table_chunk_rows") or 0)
+        html = []
+        with self._stage("tables"):
+            for name in files:
+                path = Path(base_dir or Path.cwd()) / str(name)
+                self.dependencies.add(path.resolve())
+                try:
+                    header, rows = read_sidecar(path)
+                    heading = title if len(files) == 1 else f"{title}: {Path(str(name)).name}"
+                    html.append(f"<h2>{escape(heading)}</h2>\n")
+                    html.extend(render_table(header, None, rows, chunk_rows, markdown_cells=False))
+                except Exception as e:
+                    self.warn(f"Failed to load IOC file {path}: {e}")
+        return "".join(html)
+
+    def _highlight_options(self):
+        """Config for the code block highlight cache, or None when it is switched off."""
+        if not self.settings.get("highlight_cache", True):
+            return None
+        cache_dir = self.settings.get("highlight_cache_dir") or CACHE_DIR / "highlight"
+        return (
+            ("cache_dir", str(cache_dir)),
+            ("cache_mb", int(self.settings.get("highlight_cache_mb", 64))),
+            ("max_bytes", int(self.settings.get("highlight_max_bytes", 256 * 1024))),
+            ("guess_max_bytes", int(self.settings.get("highlight_guess_max_bytes", 16 * 1024))),
+        )
+
+    def pygments_css(self):
+        """Stylesheet for the configured code highlighting style."""
+        return pygments_css(self.settings.get("style", "default"))
+
+    def select_template(self, meta):
+        """Template named by the report's frontmatter "template" key, else the default."""
+        if self.template is not None:
+            return self.template
+        return self.templates.get(meta.get("template") or self.template_name)
+
+    def render_template(self, meta, content_html, embed="inline", stream=False):
+        """Render the final HTML page around already converted content.
+
+        stream=True returns Template.generate()'s iterator, which renders the
+        page piece by piece as it is consumed, for output that only goes to
+        a file or socket (see write_html).
+        """
+        # Pull key metadata values
+        title = str(meta.get("title", "Untitled Report"))
+        tags = meta.get("tags", [])
+        if tags is None:
+            tags = []
+
+        tlp = str(meta.get("tlp", "")).upper()
+        tlp_class = self.get_tlp_class(tlp)
+
+        # Format tags
+        tag_html = self.format_tags_html(tags)
+
+        # Format meta section
+        meta_html = self.format_meta_html(meta)
+
+        with self._stage("logo"):
+            logo_data = self._encode_logo(embed)
+
+        # Current date for the report
+        current_date = datetime.now().strftime("%B %d, %Y")
+
+        # Render the final HTML using Jinja2 template
+        with self._stage("template"):
+            template = self.select_template(meta)
+            if template.filename:
+                self.dependencies.add(Path(template.filename).resolve())
+            return (template.generate if stream else template.render)(
+                title=title,
+                tag_html=tag_html,
+                meta_html=meta_html,
+                content_html=content_html,
+                font=self.settings.get("font", "Arial, sans-serif"),
+                margin=self.settings.get("margin", "1.5cm"),
+                pygments_css=self.pygments_css(),
+                logo_path=logo_data,
+                tlp=tlp,
+                tlp_class=tlp_class,
+                generation_date=current_date
+            )
+
+    def pdf_image_mode(self):
+        """How images are embedded in HTML that is only fed to WeasyPrint."""
+        return "inline" if self.settings.get("pdf_image_mode") == "inline" else "reference"
+
+    def render_pdf(self, html, base_url=None, thumbnail_width=0):
+        """Lay out rendered HTML once and return everything made from that layout.
+
+        Returns a dict with the PDF bytes ("pdf"), the page count ("pages"),
+        each page's (width, height) in points ("page_sizes") and, when
+        thumbnail_width is set, a PNG of each page that wide ("thumbnails").
+        The font configuration is shared between renders (see pdfoutput);
+        the pdf_* settings are passed to WeasyPrint.
+        """
+        import pdfoutput
+
+        base_url = str(base_url or Path.cwd())
+        with self._stage("pdf"):
+            data = self._sharded_pdf(html, base_url)
+            if data is not None:
+                sizes = pdfoutput.pdf_page_sizes(data)
+            else:
+                document = pdfoutput.layout(html, base_url, self.settings)
+                sizes = pdfoutput.page_sizes(document)
+                self._progress("pdf", f"{len(sizes)} pages")
+                data = document.write_pdf(**pdfoutput.pdf_options(self.settings))
+        result = {"pdf": data, "pages": len(sizes), "page_sizes": sizes, "thumbnails": []}
+        if thumbnail_width:
+            with self._stage("thumbnails"):
+                try:
+                    result["thumbnails"] = pdfoutput.thumbnails(data, int(thumbnail_width))
+                except ImportError:
+                    self.warn("Page thumbnails need pypdfium2 (pip install pypdfium2); skipped")
+        self.pdf_info = {"pages": result["pages"], "page_sizes": sizes, "thumbnails": []}
+        return result
+
+    def write_pdf(self, html, pdf_path, base_url=None, thumbnail_width=0, thumbs_dir=None):
+        """Lay out rendered HTML with WeasyPrint and write the PDF.
+
+        Thumbnails are written to thumbs_dir (default: a <name>-thumbs
+        folder next to the PDF) as page-001.png, ... and listed in pdf_info.
+        """
+        pdf_path = Path(pdf_path)
+        result = self.render_pdf(html, base_url or pdf_path.parent, thumbnail_width)
+        pdf_path.write_bytes(result["pdf"])
+        if result["thumbnails"]:
+            thumbs_dir = Path(thumbs_dir or thumbs_dir_for(pdf_path))
+            thumbs_dir.mkdir(exist_ok=True)
+            for stale in thumbs_dir.glob("page-*.png"):
+                stale.unlink()
+            for number, png in enumerate(result["thumbnails"], 1):
+                thumb_path = thumbs_dir / f"page-{number:03d}.png"
+                thumb_path.write_bytes(png)
+                self.pdf_info["thumbnails"].append(str(thumb_path))
+        return result
+
+    def pdf_bytes(self, html, base_url=None):
+        """Lay out rendered HTML with WeasyPrint and return the PDF as bytes."""
+        return self.render_pdf(html, base_url)["pdf"]
+
+    def _sharded_pdf(self, html, base_url):
+        """PDF laid out in pdf_shards processes, or None for the single-pass path.
+
+        Only reports whose HTML is at least pdf_shard_min_kb take this path;
+        see sharding.sharded_pdf for when it declines.
+        """
+        shards = int(self.settings.get("pdf_shards") or 0)
+        if shards < 2 or len(html) < int(self.settings.get("pdf_shard_min_kb") or 0) * 1024:
+            return None
+        from sharding import sharded_pdf
+
+        return sharded_pdf(html, base_url, shards, on_warning=self.warn, on_progress=self._progress,
+                           settings=self.settings)
+
+    def warm_up(self):
+        """Pay one-off costs (fontconfig, WeasyPrint's user-agent CSS, Pygments) before the first real job."""
+        html = self.generate_html("---\ntitle: warm-up\n---\n\nwarm-up\n\n```python\npass\n```")
+        self.pdf_bytes(html)
+
+    def render_file(self, md_path, output_base=None):
+        """Render a markdown file to .html and .pdf next to output_base.
+
+        Images are resolved relative to the markdown file. Returns the
+        (html_path, pdf_path) pair, or None when the file has no content.
+        """
+        md_path = Path(md_path)
+        output_base = Path(output_base) if output_base else md_path
+        return self.render_markdown(md_path.read_text(encoding="utf-8"), output_base, base_dir=md_path.parent)
+
+    def render_markdown(self, raw_md, output_base, base_dir=None, thumbnail_width=None):
+        """Render markdown text to output_base.html and output_base.pdf.
+
+        Page thumbnails thumbnail_width pixels wide (default: the
+        pdf_thumbnail_width setting, 0 for none) go to output_base-thumbs.
+        """
+        html = self.generate_html(raw_md, base_dir=base_dir, embed=self.pdf_image_mode())
+        if not html:
+            return None
+
+        output_base = Path(output_base)
+        html_path = output_base.with_suffix(".html")
+        pdf_path = output_base.with_suffix(".pdf")
+        with self._stage("write_html"):
+            self.write_html(html, html_path)
+        if thumbnail_width is None:
+            thumbnail_width = int(self.settings.get("pdf_thumbnail_width") or 0)
+        self.write_pdf(html, pdf_path, base_url=html_path.parent, thumbnail_width=thumbnail_width)
+        return html_path, pdf_path
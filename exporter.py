@@ -0,0 +1,168 @@
+import os
+import queue
+import threading
+from pathlib import Path
+
+from engine import RenderCancelled, RenderEngine, thumbs_dir_for
+from profiling import profiled
+
+
+class ExportJob:
+    """One queued export of markdown text to output_base.html and output_base.pdf.
+
+    The worker updates status/stage/detail as it goes; the GUI only reads
+    them (from its root.after poll), so no locking is needed.
+    """
+
+    def __init__(self, raw_md, output_base, base_dir=None):
+        self.raw_md = raw_md
+        self.output_base = Path(output_base)
+        self.base_dir = base_dir
+        self.status = "queued"  # queued, running, done, failed or cancelled
+        self.stage = None
+        self.detail = None
+        self.warnings = []
+        self.error = None
+        self.summary = None
+        # engine.pdf_info of the finished export: page count, page sizes and thumbnail paths
+        self.pdf_info = None
+        self._cancel = threading.Event()
+
+    @property
+    def name(self):
+        return self.output_base.with_suffix(".pdf").name
+
+    @property
+    def html_path(self):
+        return self.output_base.with_suffix(".html")
+
+    @property
+    def pdf_path(self):
+        return self.output_base.with_suffix(".pdf")
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """Stop the job before it starts, or at the next stage or image once it runs.
+
+        WeasyPrint's layout can't be interrupted, so a job cancelled during
+        it stops right after, before anything is written.
+        """
+        self._cancel.set()
+
+    def describe(self):
+        """Progress for a status bar."""
+        if self.status == "running":
+            progress = " ".join(part for part in (self.stage, self.detail) if part)
+            return f"Exporting {self.name}: {progress or 'starting'}"
+        return f"{self.name}: {self.status}"
+
+    def _on_progress(self, stage, detail):
+        if self.cancelled:
+            raise RenderCancelled()
+        self.stage, self.detail = stage, detail
+
+
+class ExportQueue:
+    """Runs ExportJobs one after another on a background thread.
+
+    It has its own RenderEngine (engines keep per-render state), sharing
+    the settings, image cache and template registry with the caller's.
+    Outputs are written next to their final paths and renamed into place
+    once both exist, so a failed or cancelled export leaves the previous
+    .html/.pdf untouched.
+    """
+
+    def __init__(self, settings, template, image_cache, templates=None):
+        self.engine = RenderEngine(settings, template, on_warning=self._warn, image_cache=image_cache,
+                                   templates=templates)
+        self.jobs = []
+        # Guards self.jobs between the GUI thread's submit()/take_finished() calls
+        self._jobs_lock = threading.Lock()
+        self._pending = queue.Queue()
+        self._current = None
+        self._thread = None
+
+    def submit(self, job):
+        with self._jobs_lock:
+            self.jobs.append(job)
+        self._pending.put(job)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="export", daemon=True)
+            self._thread.start()
+        return job
+
+    def active(self):
+        """Jobs that are queued or running, in submission order."""
+        with self._jobs_lock:
+            return [job for job in self.jobs if not job.finished]
+
+    def running(self):
+        return self._current
+
+    def take_finished(self):
+        """Remove and return the jobs that finished since the last call.
+
+        Each job's status is read once: the worker may finish another one
+        meanwhile, and it must end up in one list or the other.
+        """
+        with self._jobs_lock:
+            finished = [job for job in self.jobs if job.finished]
+            self.jobs = [job for job in self.jobs if job not in finished]
+        return finished
+
+    def _warn(self, message):
+        if self._current is not None:
+            self._current.warnings.append(message)
+
+    def _run(self):
+        while True:
+            job = self._pending.get()
+            if job.cancelled:
+                job.status = "cancelled"
+                continue
+            self._current = job
+            job.status = "running"
+            try:
+                self._export(job)
+                job.status = "done"
+            except RenderCancelled:
+                job.status = "cancelled"
+            except Exception as e:
+                job.error = e
+                job.status = "failed"
+            finally:
+                self._current = None
+
+    def _export(self, job):
+        html_part = job.html_path.with_name(job.html_path.name + ".part")
+        pdf_part = job.pdf_path.with_name(job.pdf_path.name + ".part")
+        self.engine.on_progress = job._on_progress
+        try:
+            with profiled(self.engine) as profile:
+                html = self.engine.generate_html(job.raw_md, base_dir=job.base_dir,
+                                                 embed=self.engine.pdf_image_mode())
+                if not html:
+                    raise ValueError("No content to generate report from.")
+                with self.engine._stage("write_html"):
+                    self.engine.write_html(html, html_part)
+                # Named after the final PDF, not the .part file, and listed that way in pdf_info
+                self.engine.write_pdf(html, pdf_part, base_url=job.html_path.parent,
+                                      thumbnail_width=int(self.engine.settings.get("pdf_thumbnail_width") or 0),
+                                      thumbs_dir=thumbs_dir_for(job.pdf_path))
+                job._on_progress("saving", None)
+            os.replace(html_part, job.html_path)
+            os.replace(pdf_part, job.pdf_path)
+            job.summary = profile.summary()
+            job.pdf_info = self.engine.pdf_info
+        finally:
+            self.engine.on_progress = None
+            for part in (html_part, pdf_part):
+                if part.exists():
+                    part.unlink()
@@ -0,0 +1,180 @@
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+# Prune an over-budget cache directory at most this often (seconds), unless a lot was written since
+PRUNE_INTERVAL = 3600
+PRUNE_MARKER = ".last-prune"
+
+
+def write_atomic(path, data, durable=False):
+    """Write text or bytes to a temporary file next to path and rename it over path.
+
+    Readers (other workers, another instance) see the old file or the new
+    one, never a partial write. durable=True also fsyncs before the rename.
+    """
+    path = Path(path)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def prune_directory(directory, max_bytes):
+    """Delete the least recently written files under directory until it holds at most max_bytes.
+
+    Returns the number of bytes left.
+    """
+    files = []
+    total = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name == PRUNE_MARKER:
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+    if total <= max_bytes:
+        return total
+    files.sort()
+    for _, size, path in files:
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        total -= size
+        if total <= max_bytes:
+            break
+    return total
+
+
+class FileCache:
+    """An in-memory LRU in front of a directory of one file per entry.
+
+    Entries are named <cache_dir>/<key[:2]>/<key><suffix> and written
+    atomically, so the directory can be shared between runs and batch
+    workers. The memory LRU holds at most ``max_memory`` units as measured
+    by ``_size()`` (one per entry unless a subclass says otherwise). With
+    ``max_disk_bytes`` set the directory is pruned, oldest entries first,
+    once it grows past that size. Subclasses build their own get()/put() on
+    _recall(), _remember() and _write_entry().
+    """
+
+    def __init__(self, cache_dir=None, max_memory=2048, max_disk_bytes=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_memory = max_memory
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self._written = 0
+        self._next_prune = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _size(self, value):
+        return 1
+
+    def _entry_path(self, key, suffix):
+        return self.cache_dir / key[:2] / f"{key}{suffix}"
+
+    def _recall(self, key):
+        """The value remembered in memory for key (counted as a hit), or None."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def _count(self, hit, disk=False):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.disk_hits += disk
+            else:
+                self.misses += 1
+
+    def _remember(self, key, value):
+        size = self._size(value)
+        if size > self.max_memory:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_size -= self._size(old)
+            self._memory[key] = value
+            self._memory_size += size
+            while self._memory_size > self.max_memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= self._size(evicted)
+
+    def _write_entry(self, key, suffix, data):
+        """Store data on disk under key. Returns the path, or None (the disk cache is best effort)."""
+        if not self.cache_dir:
+            return None
+        target = self._entry_path(key, suffix)
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(target, data)
+        except OSError:
+            return None
+        if self.max_disk_bytes is not None:
+            self._maybe_prune(len(data))
+        return target
+
+    def _maybe_prune(self, written):
+        """Prune the directory once an interval has passed, or a tenth of the budget was written."""
+        marker = self.cache_dir / PRUNE_MARKER
+        with self._lock:
+            self._written += written
+            if self._next_prune is None:
+                try:
+                    self._next_prune = marker.stat().st_mtime + PRUNE_INTERVAL
+                except OSError:
+                    self._next_prune = 0
+            if time.time() < self._next_prune and self._written < self.max_disk_bytes // 10:
+                return
+            self._written = 0
+            self._next_prune = time.time() + PRUNE_INTERVAL
+        try:
+            marker.touch()
+            prune_directory(self.cache_dir, self.max_disk_bytes)
+        except OSError:
+            pass
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+
+    def stats(self):
+        """Hit/miss counters and current memory usage."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._memory),
+                "memory_size": self._memory_size,
+            }
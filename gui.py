@@ -0,0 +1,740 @@
+import tkinter as tk
+from tkinter import filedialog, messagebox, scrolledtext
+from datetime import datetime
+from pathlib import Path
+import os
+import sys
+import threading
+import time
+from functools import partial
+
+# engine keeps WeasyPrint & co. out of this import; they are loaded in the background once the window is up
+from engine import RenderEngine, SETTINGS_PATH, preload
+from editorbuffer import EditorBuffer, LARGE_SECTION_MODES
+from profiling import profiled
+from settingsstore import SettingsStore
+from templates import TemplateRegistry
+
+
+class ReportGenerator:
+    def __init__(self, root):
+        self.root = root
+        self.body_text = None
+        self.recent_files = []
+        self.current_path = None
+        self.live_preview = None
+        self._live_preview_job = None
+        # A preview update runs on a worker thread; edits made meanwhile queue one more
+        self._live_preview_busy = False
+        self._live_preview_stale = False
+        # exporter.ExportQueue, created on the first export
+        self.exports = None
+        self._export_poll_job = None
+        
+        # Load configuration
+        self.settings_store = SettingsStore(SETTINGS_PATH, on_error=self._settings_write_failed)
+        try:
+            self.settings = self._load_settings()
+            self.templates = TemplateRegistry(self.settings)
+            self.template = self._load_template()
+        except Exception as e:
+            messagebox.showerror("Initialization Error", f"Failed to initialize: {e}")
+            self.settings = {"font": "Arial, sans-serif", "margin": "1.5cm", "style": "default"}
+            self.templates = TemplateRegistry(self.settings)
+            self.template = self._error_template()
+        
+        # Initialize UI
+        self._init_ui()
+        
+        # Headless renderer shares our settings dict, so edits in the settings dialog apply immediately
+        self.engine = RenderEngine(self.settings, self.template, on_warning=self._engine_warning,
+                                   templates=self.templates)
+        self.root.after(200, self._warm_up_in_background)
+
+    def _error_template(self):
+        from jinja2 import Template
+        return Template("<html><body>Error loading template.</body></html>")
+
+    def _warm_up_in_background(self):
+        """Load the rendering libraries and compile the default template off the UI thread.
+
+        The first preview or export then doesn't wait for them. A template
+        that fails to compile is reported the way startup used to report it.
+        """
+        def warm():
+            try:
+                preload()
+                self.engine.pygments_css()
+            except Exception:
+                pass  # The same import fails again, with a proper message, on the first render
+            try:
+                self.templates.get()
+            except Exception as e:
+                self.root.after(0, self._template_failed, e)
+
+        threading.Thread(target=warm, name="warm-up", daemon=True).start()
+
+    def _template_failed(self, error):
+        messagebox.showerror("Initialization Error", f"Failed to initialize: {error}")
+        self.template = self.engine.template = self._error_template()
+        if self.exports is not None:
+            self.exports.engine.template = self.template
+    
+    def _load_settings(self):
+        """Load settings from JSON file."""
+        settings = self.settings_store.load()
+        self.recent_files = settings.get("recent_files", [])
+        return settings
+    
+    def _save_settings(self):
+        """Save current settings to JSON file (batched and written in the background)."""
+        # Update recent files in settings
+        self.settings["recent_files"] = self.recent_files[:10]  # Keep only the 10 most recent
+        self.settings_store.save(self.settings)
+
+    def _settings_write_failed(self, error):
+        # Called on the store's timer thread (or at exit, when the window is gone)
+        try:
+            self.root.after(0, lambda: messagebox.showwarning("Settings Warning", f"Failed to save settings: {error}"))
+        except (RuntimeError, tk.TclError):
+            print(f"Failed to save settings: {error}", file=sys.stderr)
+    
+    def _load_template(self):
+        """Check the default template exists. Returns None: reports pick theirs from the registry.
+
+        It is compiled by the background warm-up, not here, to keep startup fast.
+        """
+        name, path = self.templates.path_for()
+        if not path.exists():
+            raise FileNotFoundError(f"Template file not found: {path}")
+        return None
+    
+    def _init_ui(self):
+        """Initialize the Tkinter UI."""
+        self.root.title("MD Report Generator v1")
+        
+        # Menu bar
+        menubar = tk.Menu(self.root)
+        self.root.config(menu=menubar)
+        
+        # File menu
+        file_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="File", menu=file_menu)
+        file_menu.add_command(label="New", command=self.new_document)
+        file_menu.add_command(label="Open...", command=self.load_markdown_from_file)
+        
+        # Recent files submenu
+        # Filled in when it opens, so checking that the files still exist doesn't slow down every open/save
+        self.recent_menu = tk.Menu(file_menu, tearoff=0, postcommand=self._update_recent_menu)
+        file_menu.add_cascade(label="Open Recent", menu=self.recent_menu)
+        file_menu.add_command(label="Open from Catalog...", command=self.show_catalog)
+        
+        file_menu.add_separator()
+        file_menu.add_command(label="Save...", command=self.save_markdown)
+        file_menu.add_separator()
+        file_menu.add_command(label="Settings...", command=self.show_settings)
+        file_menu.add_separator()
+        file_menu.add_command(label="Exit", command=self.root.destroy)
+        
+        # Export menu
+        export_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Export", menu=export_menu)
+        export_menu.add_command(label="Preview HTML", command=self.preview_html)
+        export_menu.add_command(label="Live Preview", command=self.start_live_preview)
+        export_menu.add_command(label="Generate PDF", command=self.generate_report)
+        
+        # Help menu
+        help_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Help", menu=help_menu)
+        help_menu.add_command(label="About", command=self.show_about)
+        
+        # Main content
+        main_frame = tk.Frame(self.root, padx=10, pady=5)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        tk.Label(main_frame, text="Markdown Content with YAML Frontmatter:").pack(anchor="w", pady=(5, 0))
+        
+        # Text area with scrollbars
+        self.body_text = scrolledtext.ScrolledText(main_frame, height=30, width=100, wrap=tk.WORD)
+        self.body_text.pack(fill=tk.BOTH, expand=True, pady=5)
+        # Chunked loading and a cached copy of the text; read the document through this, not body_text.get()
+        self.editor = EditorBuffer(self.body_text, self.settings)
+        
+        # Button frame
+        button_frame = tk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=5)
+        
+        tk.Button(button_frame, text="Load .md File", command=self.load_markdown_from_file).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Save .md File", command=self.save_markdown).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Preview HTML", command=self.preview_html).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Generate Report", command=self.generate_report).pack(side=tk.RIGHT, padx=5)
+        
+        # Status bar, with a Cancel button for the running export
+        status_frame = tk.Frame(self.root, bd=1, relief=tk.SUNKEN)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        self.cancel_button = tk.Button(status_frame, text="Cancel", command=self.cancel_export, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.RIGHT)
+        self.status_var = tk.StringVar()
+        self.status_var.set("Ready")
+        status_bar = tk.Label(status_frame, textvariable=self.status_var, anchor=tk.W)
+        status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+    
+    def _update_recent_menu(self):
+        """Update the recent files menu."""
+        # Clear current menu items
+        self.recent_menu.delete(0, tk.END)
+        
+        if not self.recent_files:
+            self.recent_menu.add_command(label="(No recent files)", state=tk.DISABLED)
+            return
+            
+        # Add recent files to menu
+        for path in self.recent_files:
+            if Path(path).exists():
+                # Use partial to create a function with the path as a parameter
+                self.recent_menu.add_command(
+                    label=Path(path).name,
+                    command=partial(self.open_recent_file, path)
+                )
+    
+    def open_recent_file(self, path):
+        """Open a file from the recent files list."""
+        try:
+            self._load_into_editor(path)
+            
+            # Move this file to the top of the recent list
+            if path in self.recent_files:
+                self.recent_files.remove(path)
+            self.recent_files.insert(0, path)
+            self._save_settings()
+            self._catalog_touch(path)
+            
+            self.current_path = path
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open file:\n{e}")
+    
+    def add_to_recent_files(self, path):
+        """Add a file to the recent files list."""
+        path_str = str(path)
+        if path_str in self.recent_files:
+            self.recent_files.remove(path_str)
+        self.recent_files.insert(0, path_str)
+        self._save_settings()
+        self._catalog_touch(path_str)
+    
+    def _catalog_touch(self, path):
+        """Index a report that was just opened or saved and mark it as recently used (off the UI thread)."""
+        def touch():
+            try:
+                from catalog import connect, default_path, index_file
+                conn = connect(default_path(self.settings))
+                try:
+                    index_file(conn, path, opened=True)
+                finally:
+                    conn.close()
+            except Exception:
+                pass  # The catalog is a convenience; it never gets in the way of opening or saving
+
+        threading.Thread(target=touch, name="catalog", daemon=True).start()
+
+    def show_catalog(self):
+        """Search the report catalog as you type and open a report from it."""
+        from catalog import connect, default_path, index, search
+        try:
+            conn = connect(default_path(self.settings))
+        except Exception as e:
+            messagebox.showerror("Catalog Error", f"Failed to open the catalog:\n{e}")
+            return
+
+        catalog_window = tk.Toplevel(self.root)
+        catalog_window.title("Open from Catalog")
+        catalog_window.geometry("800x450")
+        catalog_window.transient(self.root)
+        catalog_frame = tk.Frame(catalog_window, padx=10, pady=10)
+        catalog_frame.pack(fill=tk.BOTH, expand=True)
+
+        tk.Label(catalog_frame, text="Title, family, tags, analyst... or a hash, IP or domain:").pack(anchor="w")
+        query_var = tk.StringVar()
+        query_entry = tk.Entry(catalog_frame, textvariable=query_var)
+        query_entry.pack(fill=tk.X, pady=(2, 5))
+        query_entry.focus_set()
+
+        list_frame = tk.Frame(catalog_frame)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        scrollbar = tk.Scrollbar(list_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        results_list = tk.Listbox(list_frame, font=("Courier", 10), yscrollcommand=scrollbar.set, activestyle="none")
+        results_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=results_list.yview)
+
+        catalog_status = tk.Label(catalog_frame, anchor="w")
+        catalog_status.pack(fill=tk.X, pady=(5, 0))
+        button_frame = tk.Frame(catalog_window)
+        button_frame.pack(fill=tk.X, pady=(0, 10), padx=10)
+
+        results = []
+        pending = [None]
+
+        def refresh():
+            pending[0] = None
+            started = time.perf_counter()
+            try:
+                rows = search(conn, text=query_var.get(), limit=500)
+            except Exception as e:
+                catalog_status.config(text=f"Search failed: {e}")
+                return
+            results[:] = rows
+            results_list.delete(0, tk.END)
+            for row in rows:
+                results_list.insert(tk.END, f"{row['date'] or '':10}  {row['tlp'] or '':6}  "
+                                            f"{(row['family'] or '')[:18]:18}  {row['title'] or Path(row['path']).stem}"
+                                            f"  ({row['path']})")
+            if rows:
+                results_list.selection_set(0)
+            catalog_status.config(text=f"{len(rows)} report(s) in {(time.perf_counter() - started) * 1000:.1f} ms"
+                                       + ("" if query_var.get().strip() else ", most recently opened first"))
+
+        def on_type(*args):
+            # Search as you type, once typing pauses
+            if pending[0] is not None:
+                catalog_window.after_cancel(pending[0])
+            pending[0] = catalog_window.after(120, refresh)
+
+        def close():
+            conn.close()
+            catalog_window.destroy()
+
+        def open_selected(event=None):
+            selection = results_list.curselection()
+            if not selection:
+                return
+            path = results[selection[0]]["path"]
+            if not Path(path).exists():
+                messagebox.showerror("Error", f"File not found:\n{path}", parent=catalog_window)
+                return
+            close()
+            self.open_recent_file(path)
+
+        def index_folder():
+            folder = filedialog.askdirectory(parent=catalog_window)
+            if not folder:
+                return
+            catalog_status.config(text=f"Indexing {folder}...")
+
+            def run():
+                try:
+                    index_conn = connect(default_path(self.settings))
+                    try:
+                        counts = index(index_conn, [folder])
+                    finally:
+                        index_conn.close()
+                    message = f"Indexed {counts['indexed']} report(s), {counts['unchanged']} unchanged"
+                except Exception as e:
+                    message = f"Indexing failed: {e}"
+                try:
+                    catalog_window.after(0, lambda: (refresh(), catalog_status.config(text=message)))
+                except (RuntimeError, tk.TclError):
+                    pass  # Dialog already closed
+
+            threading.Thread(target=run, name="catalog-index", daemon=True).start()
+
+        def focus_results(event=None):
+            results_list.focus_set()
+            return "break"
+
+        query_var.trace_add("write", on_type)
+        query_entry.bind("<Return>", open_selected)
+        query_entry.bind("<Down>", focus_results)
+        results_list.bind("<Double-Button-1>", open_selected)
+        results_list.bind("<Return>", open_selected)
+        catalog_window.bind("<Escape>", lambda event: close())
+        catalog_window.protocol("WM_DELETE_WINDOW", close)
+
+        tk.Button(button_frame, text="Close", command=close).pack(side=tk.RIGHT, padx=5)
+        tk.Button(button_frame, text="Open", command=open_selected).pack(side=tk.RIGHT, padx=5)
+        tk.Button(button_frame, text="Index Folder...", command=index_folder).pack(side=tk.LEFT, padx=5)
+        refresh()
+
+    def new_document(self):
+        """Clear the text area for a new document."""
+        if self.editor.text().strip():
+            if not messagebox.askyesno("New Document", "Clear current content?"):
+                return
+                
+        # Insert template frontmatter
+        template_fm = """---
+title: "Malware Analysis Report"
+date: "%s"
+author: "Analyst"
+verdict: "Unknown"
+tags: []
+tlp: "AMBER"
+---
+
+# Executive Summary
+
+# Technical Analysis
+
+# Indicators of Compromise
+
+# Recommendations
+
+""" % datetime.now().strftime("%Y-%m-%d")
+        self.editor.set_text(template_fm)
+        self.current_path = None
+        self.status_var.set("New document created")
+    
+    def load_markdown_from_file(self):
+        """Load markdown file into the GUI text box."""
+        path = filedialog.askopenfilename(filetypes=[("Markdown files", "*.md")])
+        if path:
+            try:
+                self._load_into_editor(path)
+                
+                # Add to recent files
+                self.add_to_recent_files(path)
+                self.current_path = path
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to load file:\n{e}")
+    
+    def _load_into_editor(self, path):
+        """Read a file and load it into the editor a slice at a time; the status bar says when it's done."""
+        started = time.perf_counter()
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+
+        def loaded():
+            self.status_var.set(f"Loaded: {path} ({len(text) / 1024 / 1024:.1f} MB in "
+                                f"{time.perf_counter() - started:.2f}s)")
+
+        self.status_var.set(f"Loading {path}...")
+        self.editor.load(text, on_done=loaded)
+
+    def save_markdown(self):
+        """Save current content to a markdown file."""
+        path = filedialog.asksaveasfilename(defaultextension=".md", filetypes=[("Markdown files", "*.md")])
+        if path:
+            try:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(self.editor.text())
+                
+                # Add to recent files
+                self.add_to_recent_files(path)
+                self.current_path = path
+                self.status_var.set(f"Saved: {path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save file:\n{e}")
+    
+    def preview_html(self):
+        """Generate and preview HTML report in a separate window."""
+        try:
+            # The preview is a throwaway local file, so the browser can load images straight from the cache
+            # Create temporary file and open in default browser
+            temp_dir = Path(os.environ.get('TEMP', '/tmp'))
+            temp_file = temp_dir / f"report_preview_{datetime.now().strftime('%Y%m%d%H%M%S')}.html"
+
+            with profiled(self.engine) as profile:
+                pieces = self._generate_html(embed="reference", stream=True)
+                if not pieces:
+                    return
+                # Nothing else needs the page, so it goes straight from the template to the file
+                self.engine.write_html(pieces, temp_file)
+            
+            # Open in browser
+            import webbrowser
+            webbrowser.open(temp_file.as_uri())
+            
+            cache = self.engine.image_cache.stats()
+            self.status_var.set(
+                f"Preview opened in browser: {temp_file} | {profile.summary()} "
+                f"| image cache: {cache['hits']} hits, {cache['misses']} misses"
+            )
+        except Exception as e:
+            messagebox.showerror("Preview Error", f"Failed to generate preview:\n{e}")
+    
+    def _generate_html(self, embed="inline", stream=False):
+        """Generate HTML report from markdown content."""
+        raw_md = self.editor.text().strip()
+        if not raw_md:
+            messagebox.showwarning("Warning", "No content to generate report from.")
+            return None
+
+        return self.engine.generate_html(raw_md, base_dir=self._base_dir(), embed=embed, stream=stream)
+
+    def _base_dir(self):
+        """Directory relative image paths resolve against: the open file's, else the working dir."""
+        return Path(self.current_path).parent if self.current_path else None
+
+    def start_live_preview(self):
+        """Serve a preview page that updates as the document is edited."""
+        try:
+            if self.live_preview is None:
+                from livepreview import LivePreview
+                self.live_preview = LivePreview(self.settings, self.template, self.engine.image_cache,
+                                                on_warning=self._engine_warning, templates=self.templates)
+                self.live_preview.start()
+                self.editor.on_change(self._on_text_modified)
+            self._refresh_live_preview()
+            
+            import webbrowser
+            webbrowser.open(self.live_preview.url)
+            self.status_var.set(f"Live preview at {self.live_preview.url}")
+        except Exception as e:
+            messagebox.showerror("Preview Error", f"Failed to start live preview:\n{e}")
+    
+    def _on_text_modified(self):
+        """Debounce edits: re-render once typing pauses."""
+        if self._live_preview_job is not None:
+            self.root.after_cancel(self._live_preview_job)
+        delay = int(self.settings.get("live_preview_delay_ms", 300))
+        self._live_preview_job = self.root.after(delay, self._refresh_live_preview)
+    
+    def _refresh_live_preview(self):
+        """Convert the changed sections off the Tk thread, so typing never waits on markdown."""
+        self._live_preview_job = None
+        if self._live_preview_busy:
+            self._live_preview_stale = True
+            return
+        self._live_preview_busy = True
+        raw_md, base_dir = self.editor.text(), self._base_dir()
+
+        def run():
+            error = None
+            try:
+                self.live_preview.update(raw_md, base_dir=base_dir)
+            except Exception as e:
+                error = e
+            try:
+                self.root.after(0, self._live_preview_updated, error)
+            except (RuntimeError, tk.TclError):
+                pass  # Window already closed
+
+        threading.Thread(target=run, name="live-preview", daemon=True).start()
+
+    def _live_preview_updated(self, error):
+        self._live_preview_busy = False
+        if error is not None:
+            self.status_var.set(f"Live preview failed: {error}")
+        if self._live_preview_stale:
+            self._live_preview_stale = False
+            self._refresh_live_preview()
+    
+    def _engine_warning(self, message):
+        self.status_var.set(f"Warning: {message}")
+    
+    def generate_report(self):
+        """Queue an export of the HTML and PDF report; it runs on a background thread."""
+        try:
+            raw_md = self.editor.text().strip()
+            if not raw_md:
+                messagebox.showwarning("Warning", "No content to generate report from.")
+                return
+
+            # Prompt for output path
+            output_base = filedialog.asksaveasfilename(
+                defaultextension=".pdf", 
+                filetypes=[("PDF files", "*.pdf")]
+            )
+            if not output_base:
+                return
+
+            from exporter import ExportJob, ExportQueue
+            if self.exports is None:
+                self.exports = ExportQueue(self.settings, self.template, self.engine.image_cache,
+                                           templates=self.templates)
+            # The text is captured now, so editing can go on while the export runs
+            self.exports.submit(ExportJob(raw_md, output_base, base_dir=self._base_dir()))
+            self._poll_exports()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to generate report:\n{e}")
+            self.status_var.set("Report generation failed")
+
+    def cancel_export(self):
+        """Cancel the running export (queued ones still run)."""
+        job = self.exports.running() if self.exports is not None else None
+        if job is not None:
+            job.cancel()
+            self.status_var.set(f"Cancelling {job.name}...")
+
+    def _poll_exports(self):
+        """Show export progress and results; reschedules itself while exports are queued or running."""
+        if self._export_poll_job is not None:
+            self.root.after_cancel(self._export_poll_job)
+            self._export_poll_job = None
+
+        for job in self.exports.take_finished():
+            if job.status == "done":
+                message = f"Report exported successfully to {job.pdf_path} | {job.summary}"
+                if job.warnings:
+                    message += f" | {len(job.warnings)} warning(s): {job.warnings[-1]}"
+                self.status_var.set(message)
+                messagebox.showinfo("Success", f"Exported to:\n{job.html_path}\n{job.pdf_path}")
+            elif job.status == "failed":
+                self.status_var.set(f"Report generation failed: {job.name}")
+                messagebox.showerror("Error", f"Failed to generate report {job.name}:\n{job.error}")
+            else:
+                self.status_var.set(f"Export of {job.name} cancelled")
+
+        active = self.exports.active()
+        running = self.exports.running()
+        self.cancel_button.config(state=tk.NORMAL if running is not None else tk.DISABLED)
+        if active:
+            if running is not None and not running.cancelled:
+                queued = len(active) - 1
+                self.status_var.set(running.describe() + (f" ({queued} queued)" if queued else ""))
+            self._export_poll_job = self.root.after(100, self._poll_exports)
+
+    def show_settings(self):
+        """Show settings dialog."""
+        settings_window = tk.Toplevel(self.root)
+        settings_window.title("Settings")
+        settings_window.geometry("400x380")
+        settings_window.transient(self.root)
+        settings_window.resizable(False, False)
+        # Center the settings window over the root
+        settings_window.update_idletasks()
+        x = self.root.winfo_x() + (self.root.winfo_width() // 2) - (settings_window.winfo_width() // 2)
+        y = self.root.winfo_y() + (self.root.winfo_height() // 2) - (settings_window.winfo_height() // 2)
+        settings_window.geometry(f"+{x}+{y}")
+        settings_frame = tk.Frame(settings_window, padx=15, pady=15)
+        settings_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Font settings
+        tk.Label(settings_frame, text="Font:").grid(row=0, column=0, sticky="w", pady=5)
+        font_var = tk.StringVar(value=self.settings.get("font", "Arial, sans-serif"))
+        font_entry = tk.Entry(settings_frame, textvariable=font_var, width=30)
+        font_entry.grid(row=0, column=1, sticky="ew", pady=5)
+        
+        # Margin settings
+        tk.Label(settings_frame, text="Margin:").grid(row=1, column=0, sticky="w", pady=5)
+        margin_var = tk.StringVar(value=self.settings.get("margin", "1.5cm"))
+        margin_entry = tk.Entry(settings_frame, textvariable=margin_var, width=30)
+        margin_entry.grid(row=1, column=1, sticky="ew", pady=5)
+        
+        # Code style settings
+        tk.Label(settings_frame, text="Code Style:").grid(row=2, column=0, sticky="w", pady=5)
+        style_var = tk.StringVar(value=self.settings.get("style", "default"))
+        style_options = ["default", "emacs", "friendly", "colorful", "vs", "monokai"]
+        style_dropdown = tk.OptionMenu(settings_frame, style_var, *style_options)
+        style_dropdown.grid(row=2, column=1, sticky="ew", pady=5)
+        
+        # Logo path settings
+        tk.Label(settings_frame, text="Logo:").grid(row=3, column=0, sticky="w", pady=5)
+        logo_frame = tk.Frame(settings_frame)
+        logo_frame.grid(row=3, column=1, sticky="ew", pady=5)
+        
+        logo_var = tk.StringVar(value=self.settings.get("logo_path", ""))
+        logo_entry = tk.Entry(logo_frame, textvariable=logo_var, width=22)
+        logo_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        def browse_logo():
+            path = filedialog.askopenfilename(filetypes=[
+                ("Image files", "*.png;*.jpg;*.jpeg;*.gif;*.svg;*.webp")
+            ])
+            if path:
+                # Make path relative to script directory if possible
+                script_dir = Path(__file__).parent.resolve()
+                try:
+                    rel_path = Path(path).relative_to(script_dir)
+                    logo_var.set(str(rel_path))
+                except ValueError:
+                    # If path can't be made relative, use absolute path
+                    logo_var.set(path)
+        
+        tk.Button(logo_frame, text="...", command=browse_logo, width=3).pack(side=tk.RIGHT)
+        
+        # Default report template (a report can still pick another with "template:" in its frontmatter)
+        tk.Label(settings_frame, text="Template:").grid(row=4, column=0, sticky="w", pady=5)
+        template_var = tk.StringVar(value=self.settings.get("template") or "default")
+        template_dropdown = tk.OptionMenu(settings_frame, template_var, *self.templates.names())
+        template_dropdown.grid(row=4, column=1, sticky="ew", pady=5)
+        
+        # How sections over editor_large_section_kb open in the editor
+        tk.Label(settings_frame, text="Large sections:").grid(row=5, column=0, sticky="w", pady=5)
+        large_sections_var = tk.StringVar(value=self.settings.get("editor_large_sections", "collapsed"))
+        large_sections_dropdown = tk.OptionMenu(settings_frame, large_sections_var, *LARGE_SECTION_MODES)
+        large_sections_dropdown.grid(row=5, column=1, sticky="ew", pady=5)
+        
+        # Buttons
+        button_frame = tk.Frame(settings_window)
+        button_frame.pack(fill=tk.X, pady=10)
+        
+        def save_settings():
+            self.settings["font"] = font_var.get()
+            self.settings["margin"] = margin_var.get()
+            self.settings["style"] = style_var.get()
+            self.settings["logo_path"] = logo_var.get()
+            self.settings["template"] = template_var.get()
+            self.settings["editor_large_sections"] = large_sections_var.get()
+            
+            self._save_settings()
+            self.status_var.set("Settings saved")
+            settings_window.destroy()
+        
+        tk.Button(button_frame, text="Cancel", command=settings_window.destroy).pack(side=tk.RIGHT, padx=5)
+        tk.Button(button_frame, text="Save", command=save_settings).pack(side=tk.RIGHT, padx=5)
+    
+    def show_about(self):
+        """Show about dialog."""
+        about_window = tk.Toplevel(self.root)
+        about_window.title("About")
+        about_window.geometry("400x200")
+        about_window.transient(self.root)
+        about_window.resizable(False, False)
+        
+        # Center the about window over the root
+        about_window.update_idletasks()
+        x = self.root.winfo_x() + (self.root.winfo_width() // 2) - (about_window.winfo_width() // 2)
+        y = self.root.winfo_y() + (self.root.winfo_height() // 2) - (about_window.winfo_height() // 2)
+        about_window.geometry(f"+{x}+{y}")
+
+        about_frame = tk.Frame(about_window, padx=20, pady=20)
+        about_frame.pack(fill=tk.BOTH, expand=True)
+        
+        tk.Label(
+            about_frame, 
+            text="Malware Analysis Report Generator v1",
+            font=("Helvetica", 14, "bold")
+        ).pack(pady=(0, 10))
+        
+        tk.Label(
+            about_frame,
+            text="This tool generates formatted HTML and PDF reports\n"
+                 "from Markdown with YAML frontmatter.",
+            justify=tk.CENTER
+        ).pack(pady=5)
+        
+        tk.Label(
+            about_frame,
+            text=f"© {datetime.now().year}",
+            justify=tk.CENTER
+        ).pack(pady=(10, 0))
+        
+        tk.Button(about_frame, text="Close", command=about_window.destroy).pack(pady=(10, 0))
+
+
+def launch_gui():
+    """Launch the Tkinter GUI."""
+    root = tk.Tk()
+    app = ReportGenerator(root)
+    
+    # Set window size and position
+    screen_width = root.winfo_screenwidth()
+    screen_height = root.winfo_screenheight()
+    window_width = min(1000, screen_width - 100)
+    window_height = min(700, screen_height - 100)
+    
+    # Center the window
+    x = (screen_width - window_width) // 2
+    y = (screen_height - window_height) // 2
+    
+    root.geometry(f"{window_width}x{window_height}+{x}+{y}")
+    
+    # Create temp directory if it doesn't exist
+    temp_dir = Path(os.environ.get('TEMP', '/tmp'))
+    if not temp_dir.exists():
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        
+    root.mainloop()
+    # Don't leave the last settings change to atexit
+    app.settings_store.flush()
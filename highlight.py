@@ -0,0 +1,154 @@
+import hashlib
+import json
+import threading
+
+import pygments
+from markdown.extensions import Extension
+from markdown.extensions.codehilite import CodeHilite, CodeHiliteExtension
+from markdown.extensions.fenced_code import FencedBlockPreprocessor
+from markdown.preprocessors import Preprocessor
+
+from filecache import FileCache
+
+
+# Bump when the HTML produced for the same block would change
+CACHE_VERSION = 1
+
+
+class HighlightCache(FileCache):
+    """Highlighted HTML per code block, in memory and on disk.
+
+    Keys hash the lexer name, style, highlighter options, Pygments version
+    and the block text, so entries never need invalidating and can be
+    shared between runs and batch workers. The directory is pruned once it
+    grows past max_disk_bytes.
+    """
+
+    def __init__(self, cache_dir=None, max_entries=2048, max_disk_bytes=None):
+        super().__init__(cache_dir, max_entries, max_disk_bytes)
+
+    def key_for(self, lang, style, options, code):
+        ident = json.dumps([CACHE_VERSION, pygments.__version__, lang, style, options], sort_keys=True, default=str)
+        return hashlib.sha256(f"{ident}\0{code}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        html = self._recall(key)
+        if html is not None:
+            return html
+        if self.cache_dir:
+            try:
+                html = self._entry_path(key, ".html").read_text(encoding="utf-8")
+            except OSError:
+                html = None
+            if html is not None:
+                self._remember(key, html)
+                self._count(True, disk=True)
+                return html
+        self._count(False)
+        return None
+
+    def put(self, key, html):
+        self._remember(key, html)
+        self._write_entry(key, ".html", html)
+
+
+# One cache per directory so every converter in a process shares it
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_highlight_cache(cache_dir, max_disk_bytes=None):
+    with _caches_lock:
+        cache = _caches.get(cache_dir)
+        if cache is None:
+            try:
+                cache = HighlightCache(cache_dir, max_disk_bytes=max_disk_bytes)
+            except OSError:
+                cache = HighlightCache(None)
+            cache = _caches[cache_dir] = cache
+        cache.max_disk_bytes = max_disk_bytes
+        return cache
+
+
+class CachedFencePreprocessor(Preprocessor):
+    """Highlight plain ```lang fenced blocks through the HighlightCache.
+
+    Runs just before fenced_code and produces the same markup for the blocks
+    it handles. Blocks with {attrs} or hl_lines are left to fenced_code.
+    Blocks over max_bytes, and unlabelled blocks over guess_max_bytes (where
+    Pygments would have to guess the lexer), become a plain <pre> instead.
+    """
+
+    def __init__(self, md, cache, max_bytes, guess_max_bytes):
+        super().__init__(md)
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.guess_max_bytes = guess_max_bytes
+        self.codehilite_conf = None
+
+    def _highlighter_config(self):
+        if self.codehilite_conf is None:
+            self.codehilite_conf = {}
+            for ext in self.md.registeredExtensions:
+                if isinstance(ext, CodeHiliteExtension):
+                    self.codehilite_conf = ext.getConfigs()
+        return self.codehilite_conf
+
+    def _plain(self, code, lang):
+        code = code.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+        lang_attr = f' class="language-{lang}"' if lang else ""
+        return f"<pre><code{lang_attr}>{code}</code></pre>"
+
+    def _render(self, code, lang, conf):
+        size = len(code)
+        if size > self.max_bytes or (not lang and conf.get("guess_lang") and size > self.guess_max_bytes):
+            return self._plain(code, lang)
+
+        local_config = dict(conf)
+        style = local_config.pop("pygments_style", "default")
+        key = self.cache.key_for(lang, style, local_config, code)
+        html = self.cache.get(key)
+        if html is None:
+            html = CodeHilite(code, lang=lang, style=style, **local_config).hilite(shebang=False)
+            self.cache.put(key, html)
+        return html
+
+    def run(self, lines):
+        conf = self._highlighter_config()
+        if not conf or not conf.get("use_pygments"):
+            return lines
+
+        text = "\n".join(lines)
+        pieces = []
+        index = 0
+        for m in FencedBlockPreprocessor.FENCED_BLOCK_RE.finditer(text):
+            if m.group("attrs") is not None or m.group("hl_lines"):
+                continue
+            placeholder = self.md.htmlStash.store(self._render(m.group("code"), m.group("lang") or None, conf))
+            pieces.append(text[index:m.start()])
+            pieces.append(f"\n{placeholder}\n")
+            index = m.end()
+        if not pieces:
+            return lines
+        pieces.append(text[index:])
+        return "".join(pieces).split("\n")
+
+
+class CachedHighlightExtension(Extension):
+    def __init__(self, **kwargs):
+        self.config = {
+            "cache_dir": ["", "Directory for the on-disk highlight cache ('' for memory only)"],
+            "cache_mb": [64, "Prune the on-disk cache once it grows past this many MB (0: no limit)"],
+            "max_bytes": [256 * 1024, "Blocks larger than this are not highlighted"],
+            "guess_max_bytes": [16 * 1024, "Unlabelled blocks larger than this skip lexer guessing"],
+        }
+        super().__init__(**kwargs)
+
+    def extendMarkdown(self, md):
+        md.registerExtension(self)
+        cache_mb = int(self.getConfig("cache_mb"))
+        cache = get_highlight_cache(self.getConfig("cache_dir") or None, cache_mb * 1024 * 1024 if cache_mb else None)
+        processor = CachedFencePreprocessor(md, cache, int(self.getConfig("max_bytes")),
+                                            int(self.getConfig("guess_max_bytes")))
+        # fenced_code_block is 25; run first so it only sees the blocks we skip
+        md.preprocessors.register(processor, "cached_fenced_code", 26)
@@ -0,0 +1,158 @@
+import hashlib
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+
+from filecache import FileCache
+
+
+# Bump when the encoded output for the same source file would change
+CACHE_VERSION = 4
+
+# Path keys are remembered in memory up to this many aliases (each one is two short strings)
+MAX_ALIASES = 100000
+
+# Disk entries are named <key>.<ext> so they can be handed to WeasyPrint as file:// URLs
+EXT_BY_MIME = {"png": "png", "jpeg": "jpg", "gif": "gif", "webp": "webp", "svg+xml": "svg"}
+MIME_BY_EXT = {ext: mime for mime, ext in EXT_BY_MIME.items()}
+# Any other type (e.g. a BMP that Pillow couldn't re-encode) is stored as <key>.bin, with its
+# MIME subtype in <key>.mime
+OTHER_EXT = "bin"
+
+# key is the content key the bytes are stored under (the same for identical source files);
+# path is the on-disk copy, or None when the cache is memory-only
+CachedImage = namedtuple("CachedImage", ["mime", "data", "path", "key"])
+
+
+class ImageCache(FileCache):
+    """Two-level cache of encoded (downscaled, recompressed) image bytes.
+
+    Encoded bytes are stored under a content key (the source file's
+    sha256 plus an encoder variant string), so identical files at
+    different paths share one entry. A path key built from the resolved
+    path, mtime and size is linked to it with a small alias record, so a
+    warm render finds the entry without hashing the file; an edited
+    screenshot gets a new path key and stale aliases are simply never read
+    again. An in-memory LRU bounded by ``max_bytes`` sits in front of a
+    directory of one file per entry that is shared between runs and batch
+    workers.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=64 * 1024 * 1024):
+        super().__init__(cache_dir, max_bytes)
+        # path key -> content key
+        self._aliases = OrderedDict()
+
+    @property
+    def max_bytes(self):
+        return self.max_memory
+
+    def _size(self, entry):
+        return len(entry.data)
+
+    def key_for(self, path, variant=""):
+        """Build a cache key from a file's identity, or None if it can't be stat'ed."""
+        try:
+            st = Path(path).stat()
+        except OSError:
+            return None
+        ident = f"{CACHE_VERSION}|{Path(path).resolve()}|{st.st_mtime_ns}|{st.st_size}|{variant}"
+        return hashlib.sha256(ident.encode("utf-8")).hexdigest()
+
+    def content_key(self, digest, variant=""):
+        """Key for a source file by its content hash, shared by identical copies at different paths."""
+        ident = f"{CACHE_VERSION}|sha256:{digest}|{variant}"
+        return hashlib.sha256(ident.encode("utf-8")).hexdigest()
+
+    def _find_on_disk(self, key):
+        for ext in (*EXT_BY_MIME.values(), OTHER_EXT):
+            candidate = self._entry_path(key, f".{ext}")
+            if candidate.is_file():
+                return candidate
+        return None
+
+    def _read_entry(self, key, disk_path):
+        ext = disk_path.suffix[1:]
+        mime = MIME_BY_EXT.get(ext) or self._entry_path(key, ".mime").read_text(encoding="utf-8").strip()
+        return CachedImage(mime, disk_path.read_bytes(), disk_path, key)
+
+    def resolve(self, key):
+        """Return the content key a path key is linked to, or None."""
+        if key is None:
+            return None
+        with self._lock:
+            content_key = self._aliases.get(key)
+            if content_key is not None:
+                self._aliases.move_to_end(key)
+                return content_key
+        if self.cache_dir:
+            try:
+                content_key = self._entry_path(key, ".ref").read_text(encoding="ascii").strip()
+            except OSError:
+                return None
+            if content_key:
+                self._remember_alias(key, content_key)
+                return content_key
+        return None
+
+    def link(self, key, content_key):
+        """Record that path key points at the entry stored under content_key."""
+        if key is None:
+            return
+        self._remember_alias(key, content_key)
+        self._write_entry(key, ".ref", content_key)
+
+    def _remember_alias(self, key, content_key):
+        with self._lock:
+            self._aliases[key] = content_key
+            self._aliases.move_to_end(key)
+            while len(self._aliases) > MAX_ALIASES:
+                self._aliases.popitem(last=False)
+
+    def get(self, key):
+        """Return the CachedImage stored under content key, or None."""
+        if key is None:
+            return None
+        entry = self._recall(key)
+        if entry is not None:
+            return entry
+
+        if self.cache_dir:
+            disk_path = self._find_on_disk(key)
+            if disk_path is not None:
+                try:
+                    entry = self._read_entry(key, disk_path)
+                except OSError:
+                    entry = None
+                if entry is not None:
+                    self._count(True, disk=True)
+                    self._remember(key, entry)
+                    return entry
+
+        self._count(False)
+        return None
+
+    def put(self, key, mime, data):
+        """Store encoded image bytes in memory and on disk. Returns the CachedImage."""
+        path = None
+        if key is not None:
+            ext = EXT_BY_MIME.get(mime)
+            if ext is None:
+                ext = OTHER_EXT
+                # Written first, so whoever finds the .bin can tell what it holds
+                self._write_entry(key, ".mime", mime)
+            path = self._write_entry(key, f".{ext}", data)
+        entry = CachedImage(mime, data, path, key)
+        if key is not None:
+            self._remember(key, entry)
+        return entry
+
+    def clear_memory(self):
+        super().clear_memory()
+        with self._lock:
+            self._aliases.clear()
+
+    def stats(self):
+        """Hit/miss counters and current memory usage."""
+        stats = super().stats()
+        stats["memory_bytes"] = stats.pop("memory_size")
+        return stats
@@ -0,0 +1,118 @@
+import io
+import re
+
+
+# CSS reference pixel
+CSS_PX_PER_INCH = 96.0
+CSS_UNITS_PER_INCH = {
+    "in": 1.0,
+    "cm": 2.54,
+    "mm": 25.4,
+    "pt": 72.0,
+    "pc": 6.0,
+    "px": CSS_PX_PER_INCH,
+    # rem/em against the 16px browser default
+    "rem": CSS_PX_PER_INCH / 16,
+    "em": CSS_PX_PER_INCH / 16,
+}
+
+# Files already inside the print box and under this size are embedded untouched
+PASSTHROUGH_BYTES = 1_000_000
+# Above this many distinct colours (in a downsampled copy) an image is treated as a photo
+GRAPHIC_MAX_COLORS = 4096
+JPEG_QUALITY = 85
+
+MIME_BY_FORMAT = {"PNG": "png", "JPEG": "jpeg", "GIF": "gif", "WEBP": "webp"}
+
+
+def css_length_to_inches(value, default=0.0):
+    """Convert a CSS length such as '1.5cm' or '500px' to inches."""
+    match = re.fullmatch(r"\s*([0-9]*\.?[0-9]+)\s*([a-z]*)\s*", str(value).lower())
+    if not match:
+        return default
+    number, unit = float(match.group(1)), match.group(2) or "px"
+    if unit not in CSS_UNITS_PER_INCH:
+        return default
+    return number / CSS_UNITS_PER_INCH[unit]
+
+
+def print_box(settings, css_width=None):
+    """Largest pixel size (width, height) an image can be printed at.
+
+    Width comes from the page width minus both margins (or an explicit CSS
+    width such as the logo's), height from the template's ``img`` max-height,
+    both at the target DPI.
+    """
+    dpi = float(settings.get("image_dpi", 192))
+    if css_width:
+        width_in = css_length_to_inches(css_width)
+    else:
+        page_in = css_length_to_inches(settings.get("page_width", "210mm"), 8.27)
+        margin_in = css_length_to_inches(settings.get("margin", "1.5cm"))
+        width_in = max(page_in - 2 * margin_in, 1.0)
+    height_in = css_length_to_inches(settings.get("image_max_height", "500px"), 500 / CSS_PX_PER_INCH)
+    return max(int(width_in * dpi), 1), max(int(height_in * dpi), 1)
+
+
+def _fit(size, box):
+    """Size of an image scaled down (never up) to fit in box, keeping aspect ratio."""
+    width, height = size
+    scale = min(box[0] / width, box[1] / height, 1.0)
+    return max(int(width * scale), 1), max(int(height * scale), 1)
+
+
+def _has_alpha(img):
+    return img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+
+
+def _is_graphic(img):
+    """True for screenshots, diagrams and other flat-colour images."""
+    from PIL import Image
+
+    sample = img.copy()
+    sample.thumbnail((256, 256), Image.NEAREST)
+    return sample.convert("RGB").getcolors(GRAPHIC_MAX_COLORS) is not None
+
+
+def prepare_image(path, box):
+    """Decode, downscale and re-encode an image for embedding.
+
+    Returns (bytes, mime subtype). Images that already fit the box and are
+    small enough are returned as-is so screenshots aren't recompressed.
+    """
+    from PIL import Image  # Imported on first use to keep GUI startup fast
+
+    with Image.open(path) as img:
+        source_format = img.format
+        fits = img.size == _fit(img.size, box)
+        if fits and path.stat().st_size <= PASSTHROUGH_BYTES and source_format in MIME_BY_FORMAT:
+            return path.read_bytes(), MIME_BY_FORMAT[source_format]
+
+        target = _fit(img.size, box)
+        # Let the JPEG decoder skip DCT scales we would throw away anyway
+        if source_format == "JPEG":
+            img.draft("RGB", target)
+        img.load()
+
+        alpha = _has_alpha(img)
+        if alpha:
+            img = img.convert("RGBA")
+        elif img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+
+        graphic = source_format != "JPEG" and _is_graphic(img)
+        img.thumbnail(target, Image.LANCZOS, reducing_gap=3.0)
+
+        output = io.BytesIO()
+        if alpha or graphic:
+            img.save(output, format="PNG", optimize=True)
+            mime = "png"
+        else:
+            # WeasyPrint passes JPEG straight into the PDF, so photos stay JPEG rather than WebP
+            img.save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            mime = "jpeg"
+
+    # Resampling flat artwork can add enough colours to grow the file; keep the original then
+    if source_format in MIME_BY_FORMAT and output.tell() >= path.stat().st_size:
+        return path.read_bytes(), MIME_BY_FORMAT[source_format]
+    return output.getvalue(), mime
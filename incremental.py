@@ -0,0 +1,164 @@
+import glob
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from engine import CACHE_DIR, file_digest
+from filecache import write_atomic
+
+
+MANIFEST_DIR = CACHE_DIR / "manifests"
+# Bump when a renderer change should invalidate every manifest
+MANIFEST_VERSION = 2
+# Settings that don't change the rendered output
+IGNORED_SETTINGS = {"recent_files", "image_workers", "editor_chunk_kb", "editor_large_section_kb",
+                    "editor_large_sections", "catalog_path"}
+
+
+def settings_hash(settings, template_name=None):
+    """Hash of everything outside the input files that affects the output."""
+    relevant = {k: v for k, v in settings.items() if k not in IGNORED_SETTINGS}
+    payload = json.dumps([MANIFEST_VERSION, relevant, template_name], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def input_root(target):
+    """The directory a batch target (a directory or glob) is laid out from under -o.
+
+    For a glob it is the part before the first wildcard: "reports/**/*.md"
+    gives "reports", "*.md" the current directory.
+    """
+    path = Path(target)
+    if path.is_dir():
+        return path
+    root = Path()
+    for part in path.parent.parts:
+        if glob.has_magic(part):
+            break
+        root /= part
+    return root
+
+
+def output_base_for(md_path, output_dir=None, root=None):
+    """Where a report's .html/.pdf go: next to the source, or under output_dir.
+
+    Under output_dir the report's path relative to root is kept, so
+    a/report.md and b/report.md don't write the same files.
+    """
+    md_path = Path(md_path)
+    if not output_dir:
+        return md_path
+    relative = Path(md_path.name)
+    if root is not None:
+        try:
+            relative = md_path.resolve().relative_to(Path(root).resolve())
+        except ValueError:
+            pass  # Outside root (a glob with ".." after the wildcard): just the file name
+    return Path(output_dir) / relative.with_suffix("")
+
+
+def manifest_path(md_path, output_base):
+    key = f"{Path(md_path).resolve()}|{Path(output_base).resolve()}"
+    return MANIFEST_DIR / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+
+def _fingerprint(path):
+    """mtime, size and hash of a file, or None if it doesn't exist."""
+    try:
+        st = Path(path).stat()
+        return {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": file_digest(path)}
+    except OSError:
+        return None
+
+
+def write_manifest(md_path, output_base, outputs, dependencies, config_hash):
+    """Record the inputs a report was built from (source, images, logo, template, IOC files).
+
+    Inputs that don't exist (a screenshot not taken yet, a misspelled
+    ioc_file) are recorded as None, so the report goes stale when they appear.
+    """
+    inputs = {path: _fingerprint(path) for path in {str(Path(md_path).resolve()), *map(str, dependencies)}}
+    manifest = {
+        "source": str(Path(md_path).resolve()),
+        "outputs": [str(p) for p in outputs],
+        "settings": config_hash,
+        "inputs": inputs,
+    }
+    target = manifest_path(md_path, output_base)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(target, json.dumps(manifest))
+
+
+def read_manifest(md_path, output_base):
+    try:
+        return json.loads(manifest_path(md_path, output_base).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def is_up_to_date(md_path, output_base, config_hash):
+    """True when the outputs exist and no recorded input changed.
+
+    Inputs whose mtime and size match are trusted without hashing; a file
+    that was only touched is hashed and still counts as unchanged. An input
+    recorded as missing must still be missing.
+    """
+    manifest = read_manifest(md_path, output_base)
+    if not manifest or manifest.get("settings") != config_hash:
+        return False
+    if not all(Path(p).exists() for p in manifest["outputs"]):
+        return False
+    for path, recorded in manifest["inputs"].items():
+        try:
+            st = Path(path).stat()
+        except OSError:
+            if recorded is None:
+                continue
+            return False
+        if recorded is None:
+            return False
+        if st.st_mtime_ns == recorded["mtime_ns"] and st.st_size == recorded["size"]:
+            continue
+        if st.st_size != recorded["size"] or file_digest(path) != recorded["sha256"]:
+            return False
+    return True
+
+
+class DependencyIndex:
+    """Which reports depend on which files, from their manifests.
+
+    Polling snapshot() twice and passing both to changed_reports() gives the
+    reports to rebuild, including every report that embeds a shared
+    screenshot or the logo when that file changes.
+    """
+
+    def __init__(self):
+        self.dependents = {}
+
+    def rebuild(self, reports, output_dir=None, root=None):
+        self.dependents = {}
+        for md_path in reports:
+            source = str(Path(md_path).resolve())
+            self.dependents.setdefault(source, set()).add(str(md_path))
+            manifest = read_manifest(md_path, output_base_for(md_path, output_dir, root)) or {}
+            for path in manifest.get("inputs", {}):
+                self.dependents.setdefault(path, set()).add(str(md_path))
+
+    def snapshot(self):
+        """(mtime_ns, size) of every watched file; None for missing files."""
+        state = {}
+        for path in self.dependents:
+            try:
+                st = os.stat(path)
+                state[path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                state[path] = None
+        return state
+
+    def changed_reports(self, before, after):
+        affected = set()
+        for path, stamp in after.items():
+            if before.get(path) != stamp:
+                affected |= self.dependents.get(path, set())
+        return affected
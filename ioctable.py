@@ -0,0 +1,258 @@
+import csv
+import json
+import re
+from html import escape
+from pathlib import Path
+
+
+# Table separator row: | --- | :---: | ---: | (outer pipes optional, at least two columns)
+SEPARATOR_RE = re.compile(r"[ \t]*\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)+\|?[ \t]*")
+# Separator rows are found by searching for this literal, which re does at memchr speed
+DASHES_RE = re.compile("--")
+BACKSLASH_ESCAPE_RE = re.compile(r"\\([\\`*_{}\[\]()#+\-.!|])")
+PLACEHOLDER = '<div data-ioc-table="{}"></div>'
+PLACEHOLDER_RE = re.compile(r'<div data-ioc-table="(\d+)"></div>')
+CODE_SPAN_RE = re.compile(r"`([^`]+)`")
+ESCAPED_PIPE = "\\|"
+# A line without any of these has no markup besides code spans and escapes
+# (searched for one by one: str.find is much faster than a character class)
+MARKUP_CHARS = "]<&*_"
+# Markdown the fast path doesn't render: links, images and footnotes, raw HTML, entities
+MARKUP_RE = re.compile(r"\]\(|\]\[|\[\^|<[A-Za-z/!?]|&#?\w+;")
+# Emphasis needs an opening and a closing mark; "_" only counts away from word characters,
+# and backslash-escaped marks not at all
+EMPHASIS_RE = re.compile(r"(?<!\\)(?:\*|(?<![A-Za-z0-9])_|_(?![A-Za-z0-9]))")
+
+
+class TableBlock:
+    """A markdown table (or sidecar file) rendered by this module instead of Python-Markdown.
+
+    str() gives the placeholder left in the markdown (a raw HTML block the
+    parser passes through); html() the rendered table, built row by row
+    from a generator.
+    """
+
+    def __init__(self, index, header, aligns, rows, chunk_rows=0, markdown_cells=True):
+        self.index = index
+        self.header = header
+        self.aligns = aligns
+        self.rows = rows
+        self.chunk_rows = chunk_rows
+        self.markdown_cells = markdown_cells
+
+    def __str__(self):
+        return "\n\n" + PLACEHOLDER.format(self.index) + "\n\n"
+
+    def html(self):
+        return "".join(render_table(self.header, self.aligns, self.rows, self.chunk_rows, self.markdown_cells))
+
+
+def substitute_tables(html, tables):
+    """Replace the placeholders of tables (a list of TableBlocks, by index) in converted HTML."""
+    return PLACEHOLDER_RE.sub(lambda m: tables[int(m.group(1))].html(), html)
+
+
+def _pipe_in_code(line):
+    """True if a closed `code` span in line contains a pipe (str.find: a regex backtracks on every row)."""
+    start = line.find("`")
+    while start >= 0:
+        end = line.find("`", start + 1)
+        if end < 0:
+            return False
+        if line.find("|", start, end) >= 0:
+            return True
+        start = line.find("`", end + 1)
+    return False
+
+
+def split_row(line):
+    """Cells of a markdown table row."""
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith(ESCAPED_PIPE):
+        line = line[:-1]
+    if "`" in line and _pipe_in_code(line):
+        # A pipe inside `code` doesn't separate cells: split with those pipes hidden
+        masked = CODE_SPAN_RE.sub(lambda m: m.group(0).replace("|", "\0"), line)
+        return [cell.replace("\0", "|") for cell in _split_cells(masked)]
+    return _split_cells(line)
+
+
+def _split_cells(line):
+    if ESCAPED_PIPE in line:
+        return [cell.strip().replace(ESCAPED_PIPE, "|") for cell in re.split(r"(?<!\\)\|", line)]
+    return [cell.strip() for cell in line.split("|")]
+
+
+def _align(cell):
+    cell = cell.strip()
+    if cell.startswith(":") and cell.endswith(":"):
+        return "center"
+    if cell.endswith(":"):
+        return "right"
+    if cell.startswith(":"):
+        return "left"
+    return None
+
+
+def has_markup(line):
+    """True if a table line may hold markdown besides inline code and backslash escapes.
+
+    Plain IOCs, defanged ones ("evil[.]com") included, and a lone "*" or
+    intra-word "_" come out the same from render_table as from the
+    markdown parser; links, HTML, entities and emphasis don't.
+    """
+    if not any(c in line for c in MARKUP_CHARS):
+        return False
+    if not MARKUP_RE.search(line) and "*" not in line and "_" not in line:
+        return False  # e.g. only defanged "[.]"
+    if "`" in line:
+        line = CODE_SPAN_RE.sub("", line)
+    if MARKUP_RE.search(line):
+        return True
+    if "*" in line or "_" in line:
+        return len(EMPHASIS_RE.findall(line)) >= 2
+    return False
+
+
+def _table_has_markup(text, header_line, body_start, end):
+    if has_markup(header_line):
+        return True
+    # One scan over the whole table; most IOC tables stop here
+    if all(text.find(c, body_start, end) < 0 for c in MARKUP_CHARS):
+        return False
+    return any(has_markup(line) for line in text[body_start:end].split("\n"))
+
+
+def find_tables(text, start=0, min_rows=1000):
+    """Yield (start, end, header, aligns, body_start) for tables with at least min_rows rows.
+
+    Offsets cover the header line through the last row. Rows are not split
+    here; markdown_rows() does that lazily while rendering. Tables with
+    markup render_table() doesn't understand (see has_markup) are left to
+    the markdown parser, so they render as they always did.
+    """
+    skip_until = start
+    for dashes in DASHES_RE.finditer(text, start):
+        if dashes.start() < skip_until:
+            continue
+        line_start = text.rfind("\n", start, dashes.start()) + 1 or start
+        line_end = text.find("\n", dashes.end())
+        line_end = len(text) if line_end < 0 else line_end
+        skip_until = line_end
+        sep = SEPARATOR_RE.fullmatch(text, line_start, line_end)
+        header_end = line_start - 1
+        if not sep or header_end < start:
+            continue
+        header_start = text.rfind("\n", start, header_end) + 1 or start
+        header_line = text[header_start:header_end]
+        if "|" not in header_line:
+            continue
+        body_start = sep.end() + 1
+        end = pos = min(body_start, len(text))
+        rows = 0
+        while pos < len(text):
+            line_end = text.find("\n", pos)
+            line_end = len(text) if line_end < 0 else line_end
+            if "|" not in text[pos:line_end] or not text[pos:line_end].strip():
+                break
+            rows += 1
+            end = line_end
+            pos = line_end + 1
+        skip_until = end
+        if rows >= min_rows and not _table_has_markup(text, header_line, body_start, end):
+            yield header_start, end, split_row(header_line), [_align(c) for c in split_row(sep.group(0))], body_start
+
+
+def markdown_rows(text, start, end):
+    """Generate the cells of each table row in text[start:end]."""
+    pos = start
+    while pos < end:
+        line_end = text.find("\n", pos, end)
+        line_end = end if line_end < 0 else line_end
+        yield split_row(text[pos:line_end])
+        pos = line_end + 1
+
+
+def read_sidecar(path):
+    """Return (header, rows) for a CSV, JSON or JSON-lines IOC file; rows are generated lazily.
+
+    JSON is a list of objects (keys become the columns) or a list of lists
+    whose first entry is the header.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix in (".csv", ".tsv"):
+        delimiter = "\t" if suffix == ".tsv" else ","
+        with open(path, newline="", encoding="utf-8") as f:
+            header = next(csv.reader(f, delimiter=delimiter), [])
+
+        def rows():
+            # Opened only once the rows are read, so a caller that stops at the header leaks nothing
+            with open(path, newline="", encoding="utf-8") as f:
+                reader = csv.reader(f, delimiter=delimiter)
+                next(reader, None)
+                yield from reader
+        return header, rows()
+    if suffix in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            first = json.loads(f.readline() or "{}")
+        header = list(first)
+
+        def rows():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        yield [record.get(key, "") for key in header]
+        return header, rows()
+    if suffix == ".json":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data and isinstance(data[0], dict):
+            header = list(data[0])
+            return header, ([record.get(key, "") for key in header] for record in data)
+        return (data[0] if data else []), iter(data[1:])
+    raise ValueError(f"Unsupported IOC file type '{suffix}' (use .csv, .tsv, .json or .jsonl)")
+
+
+def _cell_html(cell, markdown_cells):
+    text = escape(str(cell), quote=False)
+    if markdown_cells:
+        if "`" in text:
+            text = CODE_SPAN_RE.sub(r"<code>\1</code>", text)
+        if "\\" in text:
+            text = BACKSLASH_ESCAPE_RE.sub(r"\1", text)
+    return text
+
+
+def render_table(header, aligns, rows, chunk_rows=0, markdown_cells=True):
+    """Generate the HTML of a table, split into several <table>s of chunk_rows rows (0: one table).
+
+    Cells are escaped; inline `code` and backslash escapes are the only
+    markdown understood, so a 100k-row appendix never goes through the
+    markdown parser (find_tables leaves tables with other markup to it).
+    """
+    columns = len(header)
+    aligns = list(aligns or []) + [None] * columns
+    cell_open = [f'<td style="text-align: {a};">' if a else "<td>" for a in aligns[:columns]]
+    head = "<thead>\n<tr>\n" + "".join(
+        (f'<th style="text-align: {a};">' if a else "<th>") + _cell_html(h, markdown_cells) + "</th>\n"
+        for h, a in zip(header, aligns)
+    ) + "</tr>\n</thead>\n"
+    table_open = f'<table class="ioc-table">\n{head}<tbody>\n'
+    table_close = "</tbody>\n</table>\n"
+
+    yield table_open
+    count = 0
+    for row in rows:
+        if chunk_rows and count and count % chunk_rows == 0:
+            yield table_close
+            yield table_open
+        cells = list(row)[:columns]
+        cells += [""] * (columns - len(cells))
+        yield "<tr>\n" + "".join(
+            f"{opener}{_cell_html(cell, markdown_cells)}</td>\n" for opener, cell in zip(cell_open, cells)
+        ) + "</tr>\n"
+        count += 1
+    yield table_close
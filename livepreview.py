@@ -0,0 +1,228 @@
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from engine import RenderEngine
+from server import forbidden_reason
+
+
+# Sections start at level 1/2 headings (also the escaped "\##" form the engine repairs)
+SECTION_HEADING = re.compile(r"^\\?#{1,2}(\s|$)")
+FENCE = re.compile(r"^\s*(```|~~~)")
+
+CONTENT_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".gif": "image/gif",
+                 ".webp": "image/webp", ".svg": "image/svg+xml"}
+
+LIVE_SCRIPT = """<script>
+(function () {
+  var source = new EventSource("/events?head=%(head_key)s");
+  source.onmessage = function (event) {
+    var update = JSON.parse(event.data);
+    if (update.reload) { location.reload(); return; }
+    var root = document.getElementById("live-root");
+    var existing = {};
+    Array.prototype.forEach.call(root.children, function (node) { existing[node.dataset.section] = node; });
+    var fragment = document.createDocumentFragment();
+    update.order.forEach(function (id) {
+      var node = existing[id];
+      if (!node) {
+        node = document.createElement("div");
+        node.dataset.section = id;
+        node.innerHTML = update.sections[id];
+      }
+      fragment.appendChild(node);
+    });
+    root.replaceChildren(fragment);
+  };
+})();
+</script>
+"""
+
+
+def split_sections(body):
+    """Split a markdown body into chunks at h1/h2 headings outside fenced code."""
+    sections = []
+    current = []
+    in_fence = False
+    for line in body.split("\n"):
+        if FENCE.match(line):
+            in_fence = not in_fence
+        elif not in_fence and SECTION_HEADING.match(line) and current:
+            sections.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("\n".join(current))
+    return sections
+
+
+class _LivePreviewHandler(BaseHTTPRequestHandler):
+    server_version = "reportgen-live"
+
+    def do_GET(self):
+        preview = self.server.preview
+        # The page shows the report: only the browser on this machine may read it, not another
+        # site's script through DNS rebinding or a cross-origin request
+        port = self.server.server_address[1]
+        if forbidden_reason(self, tuple(f"http://{host}:{port}" for host in ("127.0.0.1", "localhost", "[::1]"))):
+            self._send_headers(403, "text/plain", 0)
+            return
+        if self.path == "/":
+            body = preview.page().encode("utf-8")
+            self._send_headers(200, "text/html; charset=utf-8", len(body))
+            self.wfile.write(body)
+        elif self.path.startswith("/events"):
+            # The page says which header it was rendered with, so a stale page reloads at once
+            head_key = parse_qs(urlsplit(self.path).query).get("head", [None])[0]
+            self._stream_events(preview, head_key)
+        elif self.path.startswith("/cache/"):
+            self._send_cached_image(preview, self.path[len("/cache/"):])
+        else:
+            self._send_headers(404, "text/plain", 0)
+
+    def _send_headers(self, status, content_type, length=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-cache")
+        if length is not None:
+            self.send_header("Content-Length", str(length))
+        self.end_headers()
+
+    def _send_cached_image(self, preview, relative):
+        cache_dir = preview.engine.image_cache.cache_dir
+        if cache_dir is None:
+            self._send_headers(404, "text/plain", 0)
+            return
+        target = (cache_dir / relative).resolve()
+        if cache_dir.resolve() not in target.parents or not target.is_file():
+            self._send_headers(404, "text/plain", 0)
+            return
+        data = target.read_bytes()
+        self._send_headers(200, CONTENT_TYPES.get(target.suffix, "application/octet-stream"), len(data))
+        self.wfile.write(data)
+
+    def _stream_events(self, preview, head_key):
+        """Server-sent events: push each new version, sending only sections this page hasn't seen."""
+        self._send_headers(200, "text/event-stream")
+        sent = set()
+        version = -1
+        try:
+            while True:
+                state = preview.wait_for_change(version, timeout=15)
+                if state is None:
+                    return  # preview stopped
+                if state["version"] == version:
+                    self.wfile.write(b": keep-alive\n\n")
+                elif head_key and state["head_key"] != head_key:
+                    # Title, metadata or logo changed: the header lives in the template, reload it
+                    self.wfile.write(b'data: {"reload": true}\n\n')
+                    return
+                else:
+                    update = {
+                        "order": state["order"],
+                        "sections": {sid: state["sections"][sid] for sid in state["order"] if sid not in sent},
+                    }
+                    self.wfile.write(f"data: {json.dumps(update)}\n\n".encode("utf-8"))
+                    sent = set(state["order"])
+                version, head_key = state["version"], state["head_key"]
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LivePreview:
+    """Live HTML preview served from an in-process HTTP server.
+
+    update() is cheap to call on every (debounced) edit: the body is split
+    into h1/h2 sections and only sections whose text changed are converted
+    again. Open pages receive the changed fragments over server-sent events.
+    Cross-section markdown features (footnotes, reference links) may render
+    differently than in the export, which always converts the whole document.
+    """
+
+    def __init__(self, settings, template, image_cache, on_warning=None, port=0, templates=None):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), _LivePreviewHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.preview = self
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/"
+        self.engine = RenderEngine(settings, template, on_warning=on_warning, image_cache=image_cache,
+                                   reference_base_url=self.url + "cache/", templates=templates)
+        self._changed = threading.Condition()
+        self._state = {"version": 0, "head_key": None, "order": [], "sections": {}}
+        self._meta = {}
+        self._section_cache = {}
+        # update() runs off the GUI thread; one at a time
+        self._update_lock = threading.Lock()
+        self._closed = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def update(self, raw_md, base_dir=None):
+        """Re-render changed sections of raw_md and notify open pages.
+
+        Safe to call from a worker thread, which is where the GUI calls it.
+        """
+        with self._update_lock:
+            self._update(raw_md, base_dir)
+
+    def _update(self, raw_md, base_dir):
+        meta, body = self.engine.parse_frontmatter(raw_md.strip())
+        # Settings (image DPI, code style, ...) and the image base dir affect every section
+        context = json.dumps([self.engine.settings, str(base_dir)], sort_keys=True, default=str)
+        head_key = hashlib.sha1(json.dumps([meta, context], default=str).encode("utf-8")).hexdigest()
+
+        order, sections, seen = [], {}, {}
+        for text in split_sections(body):
+            digest = hashlib.sha1(f"{context}\0{text}".encode("utf-8")).hexdigest()[:16]
+            html = self._section_cache.get(digest)
+            if html is None:
+                html = self.engine.convert_markdown(self.engine.prepare_markdown(text, base_dir, "reference"))
+            # Identical sections can repeat; keep ids unique for the page
+            seen[digest] = seen.get(digest, 0) + 1
+            section_id = f"{digest}-{seen[digest]}"
+            order.append(section_id)
+            sections[section_id] = html
+            self._section_cache[digest] = html
+        # Forget sections that no longer exist
+        live = {sid.rsplit("-", 1)[0] for sid in order}
+        self._section_cache = {k: v for k, v in self._section_cache.items() if k in live}
+
+        with self._changed:
+            self._meta = meta
+            self._state = {"version": self._state["version"] + 1, "head_key": head_key,
+                           "order": order, "sections": sections}
+            self._changed.notify_all()
+
+    def wait_for_change(self, version, timeout=None):
+        """Block until the state is newer than version (or timeout). None once stopped."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._closed or self._state["version"] != version, timeout)
+            return None if self._closed else self._state
+
+    def page(self):
+        """Full page for the current state, with the live update client attached."""
+        with self._changed:
+            state, meta = self._state, self._meta
+        content_html = '<div id="live-root">' + "".join(
+            f'<div data-section="{sid}">{state["sections"][sid]}</div>' for sid in state["order"]
+        ) + "</div>"
+        html = self.engine.render_template(meta, content_html, embed="reference")
+        script = LIVE_SCRIPT % {"head_key": state["head_key"] or ""}
+        head, sep, tail = html.rpartition("</body>")
+        return head + script + sep + tail if sep else html + script
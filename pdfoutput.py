@@ -0,0 +1,104 @@
+import threading
+from io import BytesIO
+
+
+# WeasyPrint lays out at 96 CSS px per inch, PDF user space is 72 pt per inch
+PX_TO_PT = 0.75
+
+# WeasyPrint objects are not thread-safe: one set per thread, like the markdown converters
+_resources = threading.local()
+
+
+class PdfResources:
+    """WeasyPrint state reused between documents: the font configuration.
+
+    Creating a FontConfiguration loads fontconfig's configuration, so it is
+    built once per thread. The template's <style> stays in the HTML: moving
+    it into a WeasyPrint stylesheet would give it user-origin precedence and
+    change the cascade.
+    """
+
+    def __init__(self):
+        from weasyprint.text.fonts import FontConfiguration
+
+        self.font_config = FontConfiguration()
+
+
+def resources():
+    """This thread's PdfResources."""
+    shared = getattr(_resources, "shared", None)
+    if shared is None:
+        shared = _resources.shared = PdfResources()
+    return shared
+
+
+def render_options(settings):
+    """HTML.render() options from the pdf_* settings.
+
+    Images are decoded and recompressed while the document is laid out, so
+    the image options have to reach render(); write_pdf() ignores them.
+    """
+    options = {"optimize_images": bool(settings.get("pdf_optimize_images"))}
+    if settings.get("pdf_jpeg_quality"):
+        options["jpeg_quality"] = int(settings["pdf_jpeg_quality"])
+    if settings.get("pdf_variant"):
+        # The variant also decides layout-time defaults (e.g. PDF/UA tagging)
+        options["pdf_variant"] = settings["pdf_variant"]
+    return options
+
+
+def pdf_options(settings):
+    """Document.write_pdf() options from the pdf_* settings."""
+    options = {
+        # Embedding whole fonts skips subsetting: bigger files, faster writes
+        "full_fonts": bool(settings.get("pdf_full_fonts")),
+        "hinting": bool(settings.get("pdf_hinting")),
+    }
+    if settings.get("pdf_variant"):
+        options["pdf_variant"] = settings["pdf_variant"]
+    return options
+
+
+def layout(html, base_url, settings):
+    """Lay html out with this thread's font configuration."""
+    from weasyprint import HTML
+
+    return HTML(string=html, base_url=str(base_url)).render(font_config=resources().font_config,
+                                                             **render_options(settings))
+
+
+def page_sizes(document):
+    """(width, height) of every page of a laid-out document, in PDF points."""
+    return [(page.width * PX_TO_PT, page.height * PX_TO_PT) for page in document.pages]
+
+
+def pdf_page_sizes(data):
+    """(width, height) of every page of a finished PDF, in points (needs pypdf)."""
+    from pypdf import PdfReader
+
+    return [(float(page.mediabox.width), float(page.mediabox.height)) for page in PdfReader(BytesIO(data)).pages]
+
+
+def thumbnails(data, width):
+    """A PNG, width pixels wide, of every page of a finished PDF.
+
+    The pages are rasterized from the PDF with pypdfium2, so making
+    thumbnails doesn't lay the document out again.
+    """
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(data)
+    images = []
+    try:
+        for index in range(len(pdf)):
+            page = pdf[index]
+            try:
+                bitmap = page.render(scale=width / page.get_width())
+                out = BytesIO()
+                bitmap.to_pil().save(out, format="PNG", optimize=True)
+                images.append(out.getvalue())
+            finally:
+                page.close()
+    finally:
+        pdf.close()
+    return images
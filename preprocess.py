@@ -0,0 +1,156 @@
+import heapq
+import re
+
+from ioctable import TableBlock, find_tables, markdown_rows
+
+
+# prepare_markdown rewrites escaped headers (\## -> ##) and image references, whose
+# alt text may contain balanced [brackets], and whose path may contain spaces or
+# balanced parentheses and may be followed by a "title".
+# Fenced code blocks are copied through untouched, and tables of at least
+# table_min_rows rows are cut out for ioctable to render.
+#
+# re can only skip ahead quickly to a literal prefix, and an alternation of the
+# token patterns has none, so scan() searches for each token's literal start
+# separately and walks the merged offsets left to right, matching the full
+# token where it starts.
+HEADER_RE = re.compile(r"\\(#+)")
+IMAGE_START_RE = re.compile(r"!\[")
+IMAGE_RE = re.compile(
+    r"!\[(?P<alt>(?:[^\[\]\n]|\[[^\[\]\n]*\])*)\]\(\s*"
+    r"(?:<(?P<bracketed>[^>\n]*)>|(?P<path>(?:[^()\n]|\([^()\n]*\))+?))"
+    r"(?:\s+(?P<title>\"[^\"\n]*\"|'[^'\n]*'))?\s*\)"
+)
+# Like Python-Markdown's fenced_code, fences start at column 0
+FENCE_STARTS = (re.compile("\n```"), re.compile("\n~~~"))
+FENCE_RE = re.compile(r"(?P<ticks>`{3,}|~{3,})[^\n]*\n")
+NON_SPACE_RE = re.compile(r"\S")
+FRONTMATTER_CLOSE_RE = re.compile(r"^---\r?$", re.M)
+
+
+class ImageRef:
+    """An image reference found by scan(); src is filled in before join()."""
+
+    __slots__ = ("alt", "path", "title", "original", "src")
+
+    def __init__(self, alt, path, title, original):
+        self.alt = alt
+        self.path = path
+        self.title = title
+        self.original = original
+        self.src = None
+
+    def __str__(self):
+        if not self.src:
+            return self.original  # Keep the original reference for URLs and images that failed
+        return f"![{self.alt}]({self.src} {self.title})" if self.title else f"![{self.alt}]({self.src})"
+
+
+def content_start(text):
+    """Offset of the first non-whitespace character, or None for a blank document."""
+    m = NON_SPACE_RE.search(text)
+    return m.start() if m else None
+
+
+def split_frontmatter(text, start=0):
+    """Locate YAML frontmatter opening at offset start, without splitting lines.
+
+    Returns (yaml_text, body_start, closed). yaml_text is None when there is
+    no frontmatter, or when the closing '---' is missing (closed=False).
+    """
+    if not text.startswith("---", start):
+        return None, start, True
+    first_end = text.find("\n", start)
+    if text[start:first_end if first_end >= 0 else len(text)].rstrip("\r") != "---":
+        return None, start, True
+    close = FRONTMATTER_CLOSE_RE.search(text, first_end + 1) if first_end >= 0 else None
+    if close is None:
+        return None, start, False
+    body_start = close.end() + 1 if close.end() < len(text) else close.end()
+    return text[first_end + 1:close.start()], body_start, True
+
+
+def _token_starts(text, start, table_min_rows=0):
+    """Offsets where a token may start, in order, as (offset, kind, table or None)."""
+    streams = [
+        ((m.start(), "header", None) for m in HEADER_RE.finditer(text, start)),
+        ((m.start(), "image", None) for m in IMAGE_START_RE.finditer(text, start)),
+    ]
+    search_from = start - 1 if start and text[start - 1] == "\n" else start
+    streams += [((m.start() + 1, "fence", None) for m in regex.finditer(text, search_from))
+                for regex in FENCE_STARTS]
+    if start == 0 and text.startswith(("```", "~~~")):
+        streams.append(iter([(0, "fence", None)]))
+    if table_min_rows:
+        streams.append((table[0], "table", table) for table in find_tables(text, start, table_min_rows))
+    return heapq.merge(*streams, key=lambda token: token[0])
+
+
+def _fence_end(text, offset):
+    """End of the fenced block opening at offset, or None if it is never closed."""
+    m = FENCE_RE.match(text, offset)
+    if not m:
+        return None
+    closing = "\n" + m.group("ticks")
+    search = m.end() - 1
+    while True:
+        found = text.find(closing, search)
+        if found < 0:
+            return None
+        line_end = text.find("\n", found + 1)
+        line_end = len(text) if line_end < 0 else line_end
+        if not text[found + len(closing):line_end].strip(" \t"):
+            return line_end
+        search = found + 1
+
+
+def scan(text, start=0, table_min_rows=0, table_chunk_rows=0):
+    """Split text[start:] into literal strings, ImageRefs and TableBlocks in one left-to-right pass.
+
+    Escaped headers are fixed on the way; fenced code blocks are copied
+    through untouched. join(parts) rebuilds the markdown, with a
+    placeholder for each table (see ioctable.substitute_tables).
+    """
+    parts = []
+    index = start
+    tables = 0
+    for offset, kind, table in _token_starts(text, start, table_min_rows):
+        if offset < index:
+            continue  # Inside a token or code block already handled
+        if kind == "fence":
+            end = _fence_end(text, offset)
+            if end is not None:
+                parts.append(text[index:end])
+                index = end
+        elif kind == "table":
+            _, end, header, aligns, body_start = table
+            parts.append(text[index:offset])
+            parts.append(TableBlock(tables, header, aligns, markdown_rows(text, body_start, end), table_chunk_rows))
+            tables += 1
+            index = end
+        elif kind == "header":
+            m = HEADER_RE.match(text, offset)
+            parts.append(text[index:offset])
+            parts.append(m.group(1))
+            index = m.end()
+        else:
+            m = IMAGE_RE.match(text, offset)
+            if m:
+                path = m.group("bracketed") if m.group("bracketed") is not None else m.group("path").rstrip()
+                parts.append(text[index:offset])
+                parts.append(ImageRef(m.group("alt"), path, m.group("title"), m.group(0)))
+                index = m.end()
+    parts.append(text[index:])
+    return parts
+
+
+def image_refs(parts):
+    return [part for part in parts if isinstance(part, ImageRef)]
+
+
+def table_blocks(parts):
+    return [part for part in parts if isinstance(part, TableBlock)]
+
+
+def join(parts):
+    return "".join(map(str, parts))
@@ -0,0 +1,159 @@
+import cProfile
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _peak_memory():
+    """Process memory high-water mark in bytes (Python heap peak where RSS isn't available)."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1]
+    return None
+
+
+def _proc_status(field):
+    """A memory line of /proc/self/status (Linux) in bytes, or None."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def rss_bytes():
+    """Current resident set size, or None where /proc isn't available."""
+    return _proc_status("VmRSS")
+
+
+def reset_peak_rss():
+    """Start a new peak RSS measurement (Linux; elsewhere peak_rss_bytes() covers the whole process)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_bytes():
+    """Peak RSS since the last reset_peak_rss()."""
+    return _proc_status("VmHWM") or _peak_memory()
+
+
+class RenderProfile:
+    """Wall/CPU time and peak-memory growth per render stage, plus per-image records.
+
+    Stages with the same name (e.g. "images" for each live-preview section)
+    are listed separately; summary() adds them up. Memory is the growth of
+    the process's peak RSS during the stage, so it only shows stages that
+    push the high-water mark up.
+    """
+
+    def __init__(self, label=""):
+        self.label = label
+        self.stages = []
+        self.images = []
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self.wall_s = None
+        self.cpu_s = None
+        if resource is None and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        peak_before = _peak_memory()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            peak_after = _peak_memory()
+            self.stages.append({
+                "stage": name,
+                "wall_s": time.perf_counter() - wall,
+                "cpu_s": time.process_time() - cpu,
+                "peak_mem_delta_bytes": None if peak_before is None else peak_after - peak_before,
+            })
+
+    def record_image(self, path, wall_s, cache_hit, source_bytes, encoded_bytes):
+        self.images.append({
+            "path": str(path),
+            "wall_s": wall_s,
+            "cache_hit": cache_hit,
+            "source_bytes": source_bytes,
+            "encoded_bytes": encoded_bytes,
+        })
+
+    def finish(self):
+        self.wall_s = time.perf_counter() - self._started
+        self.cpu_s = time.process_time() - self._cpu_started
+        return self
+
+    def totals(self):
+        """Wall time per stage name, in first-seen order."""
+        totals = {}
+        for entry in self.stages:
+            totals[entry["stage"]] = totals.get(entry["stage"], 0.0) + entry["wall_s"]
+        return totals
+
+    def to_dict(self):
+        return {
+            "label": self.label,
+            "wall_s": self.wall_s,
+            "cpu_s": self.cpu_s,
+            "peak_memory_bytes": _peak_memory(),
+            "stages": self.stages,
+            "images": self.images,
+        }
+
+    def summary(self):
+        """One line for a status bar: total and per-stage wall time.
+
+        The total is the sum of the stages, so time spent outside the
+        pipeline (e.g. in a save dialog between two profiled blocks) is left out.
+        """
+        totals = self.totals()
+        parts = []
+        for name, seconds in totals.items():
+            label = f"{name} ({len(self.images)})" if name == "images" and self.images else name
+            parts.append(f"{label} {_format_seconds(seconds)}")
+        return f"{_format_seconds(sum(totals.values()))} total: " + ", ".join(parts)
+
+
+def _format_seconds(seconds):
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+
+@contextmanager
+def profiled(engine, label="", cprofile_path=None, profile=None):
+    """Attach a RenderProfile to engine for the duration of the block.
+
+    Pass an existing profile to keep adding to it. With cprofile_path the
+    block also runs under cProfile and the stats are dumped there for
+    pstats/snakeviz.
+    """
+    profile = profile or RenderProfile(label)
+    profiler = cProfile.Profile() if cprofile_path else None
+    previous, engine.profile = engine.profile, profile
+    if profiler:
+        profiler.enable()
+    try:
+        yield profile
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(str(cprofile_path))
+        engine.profile = previous
+        profile.finish()
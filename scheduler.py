@@ -0,0 +1,281 @@
+import json
+import multiprocessing
+import os
+import re
+import signal
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+from urllib.parse import unquote
+
+from preprocess import content_start, image_refs, scan
+from profiling import peak_rss_bytes, reset_peak_rss, rss_bytes
+
+
+# Rough model of a render's peak memory. The numbers are deliberately on the
+# high side; compare them with the peak RSS batch prints for each report.
+WORKER_BASE_BYTES = 200 * 1024 * 1024  # interpreter, WeasyPrint, fonts, template
+BYTES_PER_MARKDOWN_BYTE = 60  # HTML, WeasyPrint's DOM, boxes and layout
+BYTES_PER_IMAGE_PIXEL = 8  # decoded by Pillow for downscaling, and by WeasyPrint again
+BYTES_PER_TABLE_ROW = 8 * 1024
+
+# Share of physical memory used for --memory-budget auto
+AUTO_BUDGET_FRACTION = 0.75
+
+TABLE_ROW_RE = re.compile(r"^[ \t]*\|", re.M)
+
+
+def total_memory():
+    """Physical memory in bytes, or None if it can't be found out."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def memory_budget(value):
+    """Bytes for a --memory-budget value: megabytes, or "auto" for a share of physical memory."""
+    if str(value).lower() == "auto":
+        total = total_memory()
+        if total is None:
+            raise ValueError("Can't find the physical memory size; give --memory-budget in MB")
+        return int(total * AUTO_BUDGET_FRACTION)
+    return int(float(value) * 1024 * 1024)
+
+
+def _pixel_area(path):
+    from PIL import Image
+
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+    except Exception:
+        return 0
+    return width * height
+
+
+def estimate_cost(md_path):
+    """What rendering md_path is likely to need, from the markdown and image headers alone.
+
+    Returns a dict with the markdown "bytes", the number of distinct local
+    "images" and their "pixels", the markdown "table_rows", and the
+    estimated peak memory of a worker rendering it ("estimate", in bytes).
+    """
+    md_path = Path(md_path)
+    text = md_path.read_text(encoding="utf-8", errors="replace")
+    start = content_start(text)
+    seen = set()
+    pixels = 0
+    for ref in image_refs(scan(text, start or 0)) if start is not None else []:
+        if ref.path.startswith(("http://", "https://", "data:")):
+            continue
+        path = Path(ref.path) if Path(ref.path).is_absolute() else md_path.parent / unquote(ref.path)
+        key = os.path.normpath(path)
+        if key not in seen:
+            seen.add(key)
+            pixels += _pixel_area(path)
+    size = len(text.encode("utf-8"))
+    rows = len(TABLE_ROW_RE.findall(text))
+    estimate = (WORKER_BASE_BYTES + size * BYTES_PER_MARKDOWN_BYTE + pixels * BYTES_PER_IMAGE_PIXEL
+                + rows * BYTES_PER_TABLE_ROW)
+    return {"bytes": size, "images": len(seen), "pixels": pixels, "table_rows": rows, "estimate": estimate}
+
+
+def _worker_main(conn, settings, template_name):
+    """Worker process: render the jobs sent over conn until it gets None."""
+    from batch import _render_one, init_worker
+
+    init_worker(settings, template_name)
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        reset_peak_rss()
+        outcome = _render_one(*job)
+        outcome["peak_rss"] = peak_rss_bytes()
+        outcome["rss"] = rss_bytes()
+        conn.send(outcome)
+    conn.close()
+
+
+class _Job:
+    __slots__ = ("args", "path", "estimate", "cost", "attempts", "passed_over")
+
+    def __init__(self, args, estimate):
+        self.args = args
+        self.path = args[0]
+        self.estimate = estimate
+        # What the job counts for against the budget (all of it for a retry)
+        self.cost = estimate
+        self.attempts = 0
+        # Times a smaller job was started while this one waited at the head of the queue
+        self.passed_over = 0
+
+
+class _Worker:
+    def __init__(self, context, settings, template_name):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, settings, template_name), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.job = None
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+
+
+class Scheduler:
+    """Batch worker processes that admit reports by their estimated memory, largest first.
+
+    A report starts when its estimate (see estimate_cost) fits in what is
+    left of budget_bytes, or when nothing else is running. Smaller reports
+    may overtake one that doesn't fit yet, but only a few times, so big
+    reports don't starve. Workers are replaced after max_jobs_per_worker
+    reports or once their RSS passes max_worker_rss bytes (0 for no limit).
+    A report whose worker dies (e.g. OOM-killed) is retried once on its own;
+    if it crashes again it is reported as failed.
+
+    Used as the pool of batch.run_batch; run() yields the same outcome
+    dicts as batch._render_one, plus "peak_rss", "estimate" and "queued".
+    With stats_path, every start, finish, crash and worker recycle is
+    appended there as a JSON line with the queue depth and memory figures.
+    """
+
+    def __init__(self, settings, template_name=None, workers=1, budget_bytes=None, max_jobs_per_worker=50,
+                 max_worker_rss=0, stats_path=None):
+        self.settings = settings
+        self.template_name = template_name
+        self.workers = workers
+        self.budget = budget_bytes or memory_budget("auto")
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_worker_rss = max_worker_rss
+        self.stats_path = Path(stats_path) if stats_path else None
+        self._context = multiprocessing.get_context()
+        self._idle = []
+        self._busy = []
+        self._queue = []
+        self._in_flight = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for worker in self._idle + self._busy:
+            if worker.job is not None:
+                worker.process.terminate()
+            worker.stop()
+        self._idle = []
+        self._busy = []
+
+    def run(self, jobs):
+        """Render jobs (argument tuples for batch._render_one); yield each outcome as it finishes."""
+        for args in jobs:
+            try:
+                job, error = _Job(args, estimate_cost(args[0])["estimate"]), None
+            except Exception as e:
+                # Missing or unreadable: its render fails with the real error, for this report alone
+                job, error = _Job(args, WORKER_BASE_BYTES), str(e)
+            self._queue.append(job)
+            if error:
+                self._publish("estimate_failed", job, error=error)
+        self._queue.sort(key=lambda job: job.cost, reverse=True)
+        while self._queue or self._busy:
+            self._start_jobs()
+            ready = wait([w.conn for w in self._busy] + [w.process.sentinel for w in self._busy])
+            for worker in list(self._busy):
+                if worker.conn in ready or worker.process.sentinel in ready:
+                    outcome = self._collect(worker)
+                    if outcome is not None:
+                        yield outcome
+
+    def _next_job(self):
+        """Index of the queued job to start now, or None to wait for memory to free up."""
+        if not self._busy:
+            return 0
+        free = self.budget - self._in_flight
+        head = self._queue[0]
+        if head.cost <= free:
+            return 0
+        if head.passed_over >= 2 * self.workers:
+            return None
+        for index in range(1, len(self._queue)):
+            if self._queue[index].cost <= free:
+                head.passed_over += 1
+                return index
+        return None
+
+    def _start_jobs(self):
+        while self._queue and len(self._busy) < self.workers:
+            index = self._next_job()
+            if index is None:
+                return
+            job = self._queue.pop(index)
+            worker = self._idle.pop() if self._idle else _Worker(self._context, self.settings, self.template_name)
+            job.attempts += 1
+            worker.job = job
+            worker.conn.send(job.args)
+            self._busy.append(worker)
+            self._in_flight += job.cost
+            self._publish("start", job)
+
+    def _collect(self, worker):
+        """Take a finished (or crashed) worker's result. Returns the outcome to report, or None on a retry."""
+        job = worker.job
+        try:
+            outcome = worker.conn.recv()
+        except (EOFError, OSError):
+            outcome = None
+        self._busy.remove(worker)
+        self._in_flight -= job.cost
+        worker.job = None
+
+        if outcome is None:
+            worker.process.join()
+            code = worker.process.exitcode
+            worker.stop()
+            if job.attempts < 2:
+                # Run it again on its own: nothing else starts while it waits or runs
+                job.cost = max(job.cost, self.budget)
+                job.passed_over = 2 * self.workers
+                self._queue.insert(0, job)
+                self._publish("crash", job, exitcode=code, retry=True)
+                return None
+            self._publish("crash", job, exitcode=code, retry=False)
+            reason = "killed, probably out of memory" if code == -signal.SIGKILL else f"exit code {code}"
+            return {"path": job.path, "result": None, "warnings": [], "profile": None,
+                    "error": f"worker crashed twice ({reason})", "peak_rss": None,
+                    "estimate": job.estimate, "queued": len(self._queue)}
+
+        worker.jobs += 1
+        outcome["estimate"] = job.estimate
+        outcome["queued"] = len(self._queue)
+        self._publish("done", job, peak_rss=outcome["peak_rss"], error=outcome["error"])
+        if (self.max_jobs_per_worker and worker.jobs >= self.max_jobs_per_worker) or \
+                (self.max_worker_rss and (outcome["rss"] or 0) > self.max_worker_rss):
+            self._publish("recycle", job, jobs=worker.jobs, rss=outcome["rss"])
+            worker.stop()
+        else:
+            self._idle.append(worker)
+        return outcome
+
+    def _publish(self, event, job, **fields):
+        if self.stats_path is None:
+            return
+        record = {"time": time.time(), "event": event, "path": job.path, "estimate": job.estimate,
+                  "attempt": job.attempts, "queued": len(self._queue), "running": len(self._busy),
+                  "in_flight": self._in_flight, "budget": self.budget}
+        record.update(fields)
+        with open(self.stats_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
@@ -0,0 +1,244 @@
+import ipaddress
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from batch import init_worker, worker_engine, worker_settings
+from engine import read_settings
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Request bodies above this are rejected rather than buffered
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+# Host headers accepted besides the address the daemon listens on (guards against DNS rebinding)
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+def _ping():
+    return os.getpid()
+
+
+def render_job(job):
+    """Run one render request inside a warm worker.
+
+    job keys: "markdown" (text) or "path" (.md file), optional "base_dir"
+    for resolving images, "format" ("pdf" or "html") and "output" (a path
+    base; when given, .html and .pdf are written there instead of returned,
+    along with page thumbnails "thumbnail_width" pixels wide if asked for).
+    Returns (content_type, body bytes, warnings, page count or None).
+    """
+    engine = worker_engine()
+    if job.get("path"):
+        md_path = Path(job["path"])
+        raw_md = md_path.read_text(encoding="utf-8")
+        base_dir = job.get("base_dir") or md_path.parent
+    else:
+        raw_md = job.get("markdown", "")
+        base_dir = job.get("base_dir")
+
+    if job.get("output"):
+        result = engine.render_markdown(raw_md, job["output"], base_dir=base_dir,
+                                        thumbnail_width=job.get("thumbnail_width"))
+        if not result:
+            raise ValueError("No content to generate report from.")
+        info = engine.pdf_info
+        paths = {"html": str(result[0]), "pdf": str(result[1]), "pages": info["pages"],
+                 "thumbnails": info["thumbnails"]}
+        return "application/json", json.dumps(paths).encode("utf-8"), list(engine.warnings), info["pages"]
+
+    fmt = job.get("format", "pdf")
+    if fmt not in ("pdf", "html"):
+        raise ValueError(f"Unknown format: {fmt}")
+    # HTML is rendered with linked images too and inlined afterwards, like the .html artifact
+    # (see RenderEngine.write_html): base64 in the markdown stage is far slower
+    embed = "reference" if fmt == "html" else engine.pdf_image_mode()
+    html = engine.generate_html(raw_md, base_dir=base_dir, embed=embed)
+    if not html:
+        raise ValueError("No content to generate report from.")
+    if fmt == "html":
+        body = b"".join(piece.encode("utf-8") for piece in engine.iter_inline_references(html))
+        return "text/html; charset=utf-8", body, list(engine.warnings), None
+    data = engine.pdf_bytes(html, base_url=str(base_dir or Path.cwd()))
+    return "application/pdf", data, list(engine.warnings), engine.pdf_info["pages"]
+
+
+def _host_name(host_header):
+    """The host part of a Host header, without the port or IPv6 brackets."""
+    host = host_header.strip().lower()
+    if host.startswith("["):
+        return host[1:host.find("]")]
+    return host.rsplit(":", 1)[0] if host.count(":") == 1 else host
+
+
+def _is_loopback(address):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    # ::ffff:127.0.0.1 on a dual-stack socket
+    ip = getattr(ip, "ipv4_mapped", None) or ip
+    return ip.is_loopback
+
+
+def forbidden_reason(handler, allowed_origins=()):
+    """Why a request to a local-only HTTP handler must be refused, or None.
+
+    The client has to be on this machine (whatever address the server is
+    bound to, since the Host header is the client's to choose), the Host
+    must name this machine (guards against DNS rebinding) and browsers'
+    cross-origin requests, which carry an Origin header, are refused
+    unless the origin is one of allowed_origins (e.g. the server's own pages).
+    """
+    if not _is_loopback(handler.client_address[0]):
+        return "only local clients are accepted"
+    host = _host_name(handler.headers.get("Host", ""))
+    if host not in LOCAL_HOSTS and host != handler.server.server_address[0]:
+        return "unexpected Host header"
+    origin = handler.headers.get("Origin")
+    if origin and origin not in allowed_origins:
+        return "cross-origin requests are not accepted"
+    return None
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """POST /render with a JSON job (see render_job); GET /health for a liveness check.
+
+    A job can read and write any file the daemon can, so requests must come
+    from a local client, not a web page: the peer address and the Host must
+    be this machine, a POST must be sent as application/json (which a page can't do across
+    origins without a preflight, and there is no OPTIONS handler), and
+    requests carrying an Origin header are refused.
+    """
+
+    server_version = "reportgen"
+
+    def _send(self, status, content_type, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        self._send(status, "application/json", json.dumps(payload).encode("utf-8"))
+
+    def _forbidden(self):
+        """Send 403 and return True if the request doesn't come from a local, non-browser client."""
+        reason = forbidden_reason(self)
+        if reason is None:
+            return False
+        self._send_json(403, {"error": f"Forbidden: {reason}"})
+        return True
+
+    def do_GET(self):
+        if self._forbidden():
+            return
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        self._send_json(200, {"status": "ok", "workers": self.server.workers})
+
+    def do_POST(self):
+        if self._forbidden():
+            return
+        if self.path != "/render":
+            self._send_json(404, {"error": "not found"})
+            return
+        if self.headers.get_content_type() != "application/json":
+            self._send_json(415, {"error": "Content-Type must be application/json"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length > MAX_REQUEST_BYTES:
+                self._send_json(413, {"error": "request too large"})
+                return
+            job = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(job, dict):
+                raise ValueError("Request body must be a JSON object")
+        except ValueError as e:
+            self._send_json(400, {"error": f"Bad request: {e}"})
+            return
+
+        try:
+            content_type, body, warnings, pages = self.server.submit(render_job, job)
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        headers = {"X-Reportgen-Warnings": json.dumps(warnings)}
+        if pages is not None:
+            headers["X-Reportgen-Pages"] = str(pages)
+        self._send(200, content_type, body, headers)
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"[serve] {self.address_string()} {format % args}\n")
+
+
+class RenderServer(ThreadingHTTPServer):
+    """The daemon's HTTP server and its worker pool, made by make_pool().
+
+    A worker that dies (e.g. killed for running out of memory on a huge
+    report) breaks a ProcessPoolExecutor for good, so the pool is replaced
+    when that happens. Jobs caught in the crash are retried once on the new
+    pool; a job that crashes that one too fails with a 500.
+    """
+
+    def __init__(self, address, make_pool, workers):
+        super().__init__(address, RenderRequestHandler)
+        self.workers = workers
+        self._make_pool = make_pool
+        self._pool_lock = threading.Lock()
+        self.pool = make_pool()
+
+    def submit(self, fn, *args):
+        """Run fn(*args) in a worker and return its result."""
+        for attempt in (1, 2):
+            try:
+                # Under the lock, so the pool can't be replaced between reading and submitting
+                with self._pool_lock:
+                    pool = self.pool
+                    future = pool.submit(fn, *args)
+                return future.result()
+            except BrokenProcessPool as e:
+                with self._pool_lock:
+                    # Every job in flight sees the same broken pool; the first one replaces it
+                    if self.pool is pool:
+                        pool.shutdown(wait=False)
+                        self.pool = self._make_pool()
+                if attempt == 2:
+                    raise Exception(f"Render worker crashed (out of memory?): {e}")
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _warm_pool(settings, workers, template_name=None):
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                               initargs=(worker_settings(settings, workers), template_name, True))
+    # Start (and warm) every worker now so the first requests don't pay for it
+    for future in [pool.submit(_ping) for _ in range(workers)]:
+        future.result()
+    return pool
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, settings=None, template_name=None):
+    """Run the render daemon until interrupted."""
+    settings = read_settings() if settings is None else settings
+    workers = workers or os.cpu_count() or 1
+    httpd = RenderServer((host, port), partial(_warm_pool, settings, workers, template_name), workers)
+    print(f"Serving on http://{host}:{httpd.server_address[1]} with {workers} workers", file=sys.stderr)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
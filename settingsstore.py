@@ -0,0 +1,125 @@
+import atexit
+import copy
+import json
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from engine import DEFAULT_SETTINGS, SETTINGS_PATH
+from filecache import write_atomic
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Seconds to wait for more changes before writing
+WRITE_DELAY = 1.0
+RECENT_FILES_MAX = 10
+
+
+@contextmanager
+def file_lock(lock_path):
+    """Exclusive lock on lock_path, held across processes for the duration of the block."""
+    with open(lock_path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class SettingsStore:
+    """settings.json for the GUI: writes are batched, atomic and safe between instances.
+
+    save() only takes a copy and (re)starts a timer, so opening or saving a
+    file doesn't wait on the disk; the write happens WRITE_DELAY seconds
+    after the last change, or at exit. A write holds settings.json.lock,
+    re-reads the file and only replaces the keys this instance changed, so
+    two running instances don't undo each other's settings (their recent
+    files lists are merged).
+    """
+
+    def __init__(self, path=SETTINGS_PATH, delay=WRITE_DELAY, on_error=None):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.delay = delay
+        self.on_error = on_error or (lambda error: None)
+        # The settings as last read or written, to tell which keys this instance changed
+        self._base = {}
+        self._pending = None
+        self._timer = None
+        self._lock = threading.Lock()
+        # Held while writing, so save() never waits on the disk
+        self._write_lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def load(self):
+        """Read the settings, creating the file with the defaults on first run."""
+        if not self.path.exists():
+            settings = dict(DEFAULT_SETTINGS)
+            with file_lock(self.lock_path):
+                if not self.path.exists():
+                    write_atomic(self.path, json.dumps(settings, indent=2), durable=True)
+            self._base = copy.deepcopy(settings)
+            return settings
+        try:
+            settings = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception as e:
+            raise ValueError(f"Failed to load settings: {e}")
+        self._base = copy.deepcopy(settings)
+        return settings
+
+    def save(self, settings):
+        """Schedule writing settings; calls within the delay are coalesced into one write."""
+        with self._lock:
+            self._pending = copy.deepcopy(settings)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write pending changes now (called by the timer and at exit)."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                settings, self._pending = self._pending, None
+            if settings is None:
+                return
+            try:
+                self._write(settings)
+            except Exception as e:
+                self.on_error(e)
+
+    def _write(self, settings):
+        changed = {k: v for k, v in settings.items() if k not in self._base or self._base[k] != v}
+        if not changed:
+            return
+        with file_lock(self.lock_path):
+            try:
+                on_disk = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                on_disk = {}
+            if "recent_files" in changed:
+                ours = list(changed["recent_files"])
+                theirs = [p for p in on_disk.get("recent_files", []) if p not in ours
+                          and p not in self._base.get("recent_files", [])]
+                changed["recent_files"] = (ours + theirs)[:RECENT_FILES_MAX]
+            on_disk.update(changed)
+            write_atomic(self.path, json.dumps(on_disk, indent=2), durable=True)
+        # Keys another instance changed stay theirs until this one changes them too
+        self._base = settings
@@ -0,0 +1,220 @@
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from io import BytesIO
+
+from pdfoutput import PX_TO_PT, layout, pdf_options
+
+try:
+    from pypdf import PdfWriter
+    from pypdf.annotations import Link
+    from pypdf.generic import Fit
+except ImportError:  # Optional: without pypdf every report takes the single-pass path
+    PdfWriter = None
+
+
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+class _SplitFinder(HTMLParser):
+    """Records where <body> content starts and every h1/h2 with the elements open around it."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.stack = []
+        self.body = None
+        self.headings = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("h1", "h2"):
+            self.headings.append((self.getpos(), tuple(self.stack)))
+        if tag not in VOID_ELEMENTS:
+            self.stack.append((tag, self.get_starttag_text()))
+        if tag == "body":
+            # Content starts right after the tag
+            line, col = self.getpos()
+            self.body = (line, col + len(self.get_starttag_text()))
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i][0] == tag:
+                del self.stack[i:]
+                break
+
+
+def _with_style(html, css):
+    """Add a <style> element at the end of the document's <head>."""
+    head_end = html.find("</head>")
+    style = f"<style>{css}</style>"
+    return html[:head_end] + style + html[head_end:] if head_end >= 0 else style + html
+
+
+def _offsets(html):
+    """Turn HTMLParser (line, column) positions into string offsets."""
+    line_starts = [0] + [m.end() for m in re.finditer("\n", html)]
+    return lambda pos: line_starts[pos[0] - 1] + pos[1]
+
+
+def split_document(html, shards):
+    """Split a rendered report into at most shards standalone documents at h1/h2 boundaries.
+
+    Every shard keeps the full <head> (so styles and @page rules apply) and
+    reopens the elements the split heading sits in. Shards after the first
+    also get the content before the first section in an absolutely positioned,
+    zero-height box, so running headers and string-set values taken from the
+    report header carry over. The box is out of the flow: the split heading is
+    still the first thing on the page, and a page-break-before on it doesn't
+    add a blank page. Returns a list of HTML strings (one item when there is
+    nothing to split).
+    """
+    finder = _SplitFinder()
+    finder.feed(html)
+    finder.close()
+    if finder.body is None or not finder.headings:
+        return [html]
+    offset = _offsets(html)
+    body_start = offset(finder.body)
+
+    # Section headings share a container; the report title usually sits elsewhere
+    container = finder.headings[-1][1]
+    candidates = [offset(pos) for pos, stack in finder.headings if stack == container]
+    candidates = [c for c in candidates if c > body_start]
+    if len(candidates) < 2:
+        return [html]
+    wrappers = [text for tag, text in container if tag not in ("html", "body")]
+    wrapper_tags = [tag for tag, text in container if tag not in ("html", "body")]
+
+    # Contiguous shards of about the same size
+    cuts = []
+    for k in range(1, shards):
+        target = body_start + (len(html) - body_start) * k // shards
+        best = min(candidates, key=lambda c: abs(c - target))
+        if best > (cuts[-1] if cuts else candidates[0]):
+            cuts.append(best)
+    if not cuts:
+        return [html]
+
+    prefix = html[:body_start]
+    later_prefix = prefix
+    hidden_prelude = ""
+    if not wrappers:
+        later_prefix = _with_style(prefix, ".shard-prelude, .shard-prelude * { bookmark-level: none !important }")
+        # Out of the flow: an in-flow sibling before the split heading would make
+        # WeasyPrint honour the heading's forced page break and start with a blank page
+        hidden_prelude = ('<div class="shard-prelude" style="position: absolute; top: 0; left: 0; '
+                          'height: 0; overflow: hidden; visibility: hidden">'
+                          f'{html[body_start:candidates[0]]}</div>')
+    closing = "".join(f"</{tag}>" for tag in reversed(wrapper_tags)) + "</body></html>"
+    bounds = [body_start] + cuts + [len(html)]
+    documents = []
+    for i in range(len(bounds) - 1):
+        start, end = bounds[i], bounds[i + 1]
+        head = prefix if i == 0 else later_prefix + hidden_prelude + "".join(wrappers)
+        tail = closing if end < len(html) else ""
+        documents.append(head + html[start:end] + tail)
+    return documents
+
+
+def _layout_shard(html, base_url, page_offset=0, settings=None):
+    """Worker: lay out one shard. Returns its PDF and what the merge needs to fix links."""
+    settings = settings or {}
+    if page_offset:
+        # Continue the page counter from the shards before this one (a page that
+        # resets it skips the implicit increment, hence the + 1)
+        html = _with_style(html, f"@page:first {{ counter-reset: page {page_offset + 1} }}")
+    document = layout(html, base_url, settings)
+    anchors = {}
+    links = []
+    heights = []
+    for index, page in enumerate(document.pages):
+        heights.append(page.height)
+        for name, (x1, y1, x2, y2) in page.anchors.items():
+            anchors.setdefault(name, (index, x1, y1))
+        for link_type, target, rectangle, _ in page.links:
+            if link_type == "internal":
+                links.append((index, target, rectangle))
+    return document.write_pdf(**pdf_options(settings)), anchors, links, heights
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def merge_shards(results):
+    """Concatenate shard PDFs, keeping outlines, and restore links that point into other shards."""
+    writer = PdfWriter()
+    page_starts = []
+    all_anchors = {}
+    for pdf, anchors, links, heights in results:
+        page_starts.append(len(writer.pages))
+        writer.append(BytesIO(pdf))
+        for name, (index, x, y) in anchors.items():
+            all_anchors.setdefault(name, (page_starts[-1] + index, x, y, heights[index]))
+
+    for (pdf, anchors, links, heights), first_page in zip(results, page_starts):
+        for index, target, (x1, y1, x2, y2) in links:
+            if target in anchors or target not in all_anchors:
+                continue  # Resolved by WeasyPrint already, or dangling in the full document too
+            height = heights[index]
+            dest_page, dest_x, dest_y, dest_height = all_anchors[target]
+            rect = (x1 * PX_TO_PT, (height - y2) * PX_TO_PT, x2 * PX_TO_PT, (height - y1) * PX_TO_PT)
+            fit = Fit.xyz(left=dest_x * PX_TO_PT, top=(dest_height - dest_y) * PX_TO_PT)
+            writer.add_annotation(first_page + index, Link(rect=rect, target_page_index=dest_page, fit=fit))
+
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def sharded_pdf(html, base_url, shards, on_warning=None, on_progress=None, settings=None):
+    """Lay out a long report in parallel processes and merge the PDFs.
+
+    Returns None when the report should take the single-pass path instead:
+    pypdf isn't installed, the document has no sections to split at, or the
+    template prints the total page count (counter(pages)), which a shard
+    can't know. on_progress(stage, detail) hears about each shard as its
+    layout finishes. settings supplies the pdf_* options for WeasyPrint.
+    """
+    if PdfWriter is None:
+        if on_warning:
+            on_warning("PDF sharding needs pypdf (pip install pypdf); rendering in one pass")
+        return None
+    if "counter(pages)" in html:
+        return None
+    documents = split_document(html, shards)
+    count = len(documents)
+    if count < 2:
+        return None
+
+    pool = _get_pool(min(shards, count))
+    base_url = str(base_url)
+    results = []
+    pages = 0
+    for result in pool.map(_layout_shard, documents, [base_url] * count, [0] * count, [settings] * count):
+        results.append(result)
+        pages += len(result[3])
+        if on_progress:
+            on_progress("pdf", f"shard {len(results)}/{count}, {pages} pages")
+    if "counter(page)" in html:
+        # Page numbers restart in every shard: lay the later shards out again with the right offset
+        offsets = []
+        pages = 0
+        for pdf, anchors, links, heights in results:
+            offsets.append(pages)
+            pages += len(heights)
+        results[1:] = pool.map(_layout_shard, documents[1:], [base_url] * (count - 1), offsets[1:],
+                               [settings] * (count - 1))
+    return merge_shards(results)
@@ -0,0 +1,75 @@
+import threading
+from pathlib import Path
+
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+BYTECODE_CACHE_DIR = SCRIPT_DIR / ".cache" / "jinja"
+
+# Report house-styles shipped with the app; settings["templates"] can add more
+BUILTIN_TEMPLATES = {
+    "default": "template.html",
+    "two": "template.html.TWO",
+}
+
+
+def _bytecode_cache():
+    from jinja2 import FileSystemBytecodeCache
+
+    try:
+        BYTECODE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        return FileSystemBytecodeCache(str(BYTECODE_CACHE_DIR))
+    except OSError:
+        return None
+
+
+class TemplateRegistry:
+    """Named report templates loaded through one Jinja2 Environment.
+
+    Compiled templates are kept by the Environment and their bytecode in
+    .cache/jinja, so new processes skip compilation. A template is reloaded
+    only when its file's mtime changes (Jinja's auto_reload check). The
+    Environment (and Jinja2 itself) is only loaded by the first get().
+    """
+
+    def __init__(self, settings=None):
+        # Kept by reference so a new default picked in the settings dialog applies at once
+        self.settings = settings if settings is not None else {}
+        self.paths = {name: SCRIPT_DIR / filename for name, filename in BUILTIN_TEMPLATES.items()}
+        for name, path in (self.settings.get("templates") or {}).items():
+            path = Path(path)
+            self.paths[name] = path if path.is_absolute() else SCRIPT_DIR / path
+        self._env = None
+        self._env_lock = threading.Lock()
+
+    @property
+    def env(self):
+        with self._env_lock:
+            if self._env is None:
+                from jinja2 import Environment, FileSystemLoader, PrefixLoader
+
+                # Each name gets its own loader, so templates in different folders can share a filename
+                loader = PrefixLoader({name: FileSystemLoader(str(path.parent)) for name, path in self.paths.items()})
+                self._env = Environment(loader=loader, auto_reload=True, bytecode_cache=_bytecode_cache())
+            return self._env
+
+    def names(self):
+        return sorted(self.paths)
+
+    def path_for(self, name=None):
+        """File of the template called name (or the default), without loading it."""
+        name = name or self.settings.get("template") or "default"
+        if name not in self.paths:
+            raise ValueError(f"Unknown template '{name}' (available: {', '.join(self.names())})")
+        return name, self.paths[name]
+
+    def get(self, name=None):
+        """Return the compiled template called name (or the default)."""
+        from jinja2 import TemplateNotFound
+
+        name, path = self.path_for(name)
+        try:
+            return self.env.get_template(f"{name}/{path.name}")
+        except TemplateNotFound:
+            raise FileNotFoundError(f"Template file not found: {path}")
+        except Exception as e:
+            raise ValueError(f"Failed to load template: {e}")
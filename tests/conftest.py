@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The modules live at the top of the repository, next to reportgen.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,25 @@
+from pathlib import Path
+
+from batch import collect_reports
+from incremental import input_root, output_base_for
+
+
+def test_reports_with_the_same_name_get_separate_outputs(tmp_path):
+    for folder in ("a", "b", "b/deeper"):
+        (tmp_path / "reports" / folder).mkdir(parents=True)
+        (tmp_path / "reports" / folder / "report.md").write_text("# x\n", encoding="utf-8")
+    target = str(tmp_path / "reports")
+    bases = [output_base_for(p, tmp_path / "out", input_root(target)) for p in collect_reports(target)]
+    assert bases == [tmp_path / "out" / "a" / "report", tmp_path / "out" / "b" / "deeper" / "report",
+                     tmp_path / "out" / "b" / "report"]
+
+
+def test_input_root_of_a_glob_is_the_part_before_the_wildcard():
+    assert input_root("reports/**/*.md") == Path("reports")
+    assert input_root("reports/2025-*/x.md") == Path("reports")
+    assert input_root("*.md") == Path()
+
+
+def test_without_output_dir_outputs_go_next_to_the_source(tmp_path):
+    md_path = tmp_path / "a" / "report.md"
+    assert output_base_for(md_path, None, tmp_path) == md_path
@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+import corpus
+import run_benchmarks
+from run_benchmarks import bench_render, compare
+
+
+def _metric(value, unit="s"):
+    return {"value": value, "unit": unit, "better": "higher" if unit == "reports/s" else "lower"}
+
+
+def _results(**values):
+    return {"metrics": {name.replace("_", ".", 1): _metric(*value) if isinstance(value, tuple) else _metric(value)
+                        for name, value in values.items()}}
+
+
+def test_corpus_has_the_requested_shape(tmp_path):
+    paths = corpus.generate(tmp_path, reports=2, images=4, image_size=(120, 80), code_blocks=2,
+                            table_rows=9, length_kb=40, fields=3)
+    assert [p.name for p in paths] == ["report_0000.md", "report_0001.md"]
+
+    text = paths[0].read_text(encoding="utf-8")
+    assert text.count("![](report_0000-media/") == 4
+    assert len(list((tmp_path / "report_0000-media").glob("*.png"))) == 4
+    assert text.count("\n``` ") == 2
+    assert text.count("| fallback C2 |") + text.count("| beacon |") + text.count("| dropped payload |") == 9
+    assert text.count("\nfield_") == 3
+    assert len(text) >= 40 * 1024
+
+
+def test_same_seed_gives_the_same_corpus(tmp_path):
+    first = corpus.generate(tmp_path / "a", reports=1, images=2, image_size=(60, 40))
+    second = corpus.generate(tmp_path / "b", reports=1, images=2, image_size=(60, 40))
+    assert first[0].read_text(encoding="utf-8") == second[0].read_text(encoding="utf-8")
+    other = corpus.generate(tmp_path / "c", reports=1, images=2, image_size=(60, 40), seed=1)
+    assert other[0].read_text(encoding="utf-8") != first[0].read_text(encoding="utf-8")
+
+
+def test_corpus_renders_without_warnings(tmp_path):
+    reports = corpus.generate(tmp_path / "corpus", reports=2, images=2, image_size=(60, 40))
+    metrics = bench_render(reports, tmp_path / "scratch", skip_pdf=True)
+    for name in ("stage.frontmatter", "stage.images", "stage.markdown", "stage.template", "render.total"):
+        assert metrics[name] > 0
+
+
+def test_compare_flags_only_real_regressions(capsys):
+    baseline = _results(stage_markdown=0.010, stage_pdf=0.100, stage_scan=0.0005,
+                        batch_reports_per_s=(10.0, "reports/s"))
+    current = _results(stage_markdown=0.020, stage_pdf=0.140, stage_scan=0.0010,
+                       batch_reports_per_s=(7.0, "reports/s"), stage_logo=0.001)
+
+    # pdf has its own 50% limit; scan doubled but by less than min_delta; throughput fell 30%
+    regressed = compare(current, baseline, 0.25, {"stage.pdf": 0.5}, min_delta=2)
+    assert regressed == ["stage.markdown", "batch.reports_per_s"]
+    out = capsys.readouterr().out
+    assert "REGRESSION" in out and "new" in out
+
+
+def test_faster_run_passes(capsys):
+    baseline = _results(render_total=0.5, batch_reports_per_s=(10.0, "reports/s"))
+    current = _results(render_total=0.3, batch_reports_per_s=(20.0, "reports/s"))
+    assert compare(current, baseline, 0.25, {}, min_delta=2) == []
+    assert run_benchmarks.format_value(current["metrics"]["render.total"]) == "300.0 ms"
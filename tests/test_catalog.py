@@ -0,0 +1,102 @@
+import json
+import os
+
+import pytest
+
+import catalog
+from catalog import connect, extract_iocs, index, run_index, run_search, search
+
+REPORT = """---
+title: Emotet loader
+family: Emotet
+tlp: AMBER
+tags: [loader, phishing]
+ioc_file: {ioc_file}
+---
+
+# Summary
+
+Beacons to evil[.]example and 198.51.100.7.
+"""
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect(tmp_path / "catalog.sqlite")
+    yield conn
+    conn.close()
+
+
+def _reports(tmp_path):
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    (reports / "c2.csv").write_text("type,value\nip,203.0.113.9\n", encoding="utf-8")
+    (reports / "hashes.jsonl").write_text(json.dumps({"sha256": "ab" * 32}) + "\n", encoding="utf-8")
+    (reports / "emotet.md").write_text(REPORT.format(ioc_file="[c2.csv, hashes.jsonl]"), encoding="utf-8")
+    (reports / "other.md").write_text(REPORT.format(ioc_file="c2.csv").replace("Emotet", "Qakbot"),
+                                      encoding="utf-8")
+    return reports
+
+
+def _paths(rows):
+    return sorted(os.path.basename(row["path"]) for row in rows)
+
+
+def test_extract_iocs_refangs_and_skips_file_names():
+    iocs = extract_iocs(f"hxxp://evil[.]example/a {'cd' * 20}.png 198.51.100.7 notes.txt")
+    assert iocs == {"evil.example": "domain", "198.51.100.7": "ipv4"}
+
+
+def test_index_reads_every_ioc_file_of_a_list(conn, tmp_path):
+    reports = _reports(tmp_path)
+    counts = index(conn, [str(reports)], workers=1)
+    assert counts["indexed"] == 2 and counts["errors"] == []
+
+    assert _paths(search(conn, ioc="ab" * 32)) == ["emotet.md"]
+    assert _paths(search(conn, ioc="203.0.113.9")) == ["emotet.md", "other.md"]
+    assert _paths(search(conn, ioc="evil[.]example")) == ["emotet.md", "other.md"]
+    sources = json.loads(search(conn, family="emotet")[0]["sources"])
+    assert [os.path.basename(s[0]) for s in sources] == ["emotet.md", "c2.csv", "hashes.jsonl"]
+
+
+def test_changed_sidecar_reindexes_only_its_reports(conn, tmp_path):
+    reports = _reports(tmp_path)
+    index(conn, [str(reports)], workers=1)
+    (reports / "hashes.jsonl").write_text(json.dumps({"sha256": "ef" * 32, "seen": "2024"}) + "\n", encoding="utf-8")
+
+    counts = index(conn, [str(reports)], workers=1)
+    assert (counts["indexed"], counts["unchanged"]) == (1, 1)
+    assert _paths(search(conn, ioc="ef" * 32)) == ["emotet.md"]
+    assert search(conn, ioc="ab" * 32) == []
+
+
+def test_search_by_text_tag_and_tlp(conn, tmp_path):
+    reports = _reports(tmp_path)
+    index(conn, [str(reports)], workers=1)
+
+    assert _paths(search(conn, text="emo")) == ["emotet.md"]
+    assert _paths(search(conn, tag="Phishing", tlp="amber")) == ["emotet.md", "other.md"]
+    assert search(conn, tlp="red") == []
+
+
+def test_removed_report_leaves_the_catalog(conn, tmp_path):
+    reports = _reports(tmp_path)
+    index(conn, [str(reports)], workers=1)
+    (reports / "other.md").unlink()
+
+    assert index(conn, [str(reports)], workers=1)["removed"] == 1
+    assert _paths(search(conn)) == ["emotet.md"]
+
+
+def test_cli_uses_the_catalog_path_setting_like_the_gui(tmp_path, monkeypatch, capsys):
+    reports = _reports(tmp_path)
+    configured = tmp_path / "shared" / "catalog.sqlite"
+    monkeypatch.setattr(catalog, "read_settings", lambda: {"catalog_path": str(configured)})
+
+    assert run_index([str(reports)], workers=1) == 0
+    assert str(configured) in capsys.readouterr().out
+    run_search(text="qakbot")
+    assert "other.md" in capsys.readouterr().out
+    # --db still wins
+    run_search(db_path=tmp_path / "empty.sqlite", text="qakbot")
+    assert capsys.readouterr().out.startswith("0 report(s)")
@@ -0,0 +1,26 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _run_without_tk(code):
+    # A None entry in sys.modules makes "import tkinter" raise ImportError, as on a Python built without Tk
+    return subprocess.run([sys.executable, "-c", "import sys; sys.modules['tkinter'] = None\n" + code],
+                          cwd=ROOT, capture_output=True, text=True)
+
+
+def test_subcommands_work_without_tkinter(tmp_path):
+    (tmp_path / "empty").mkdir()
+    result = _run_without_tk(
+        "import reportgen, batch, catalog, server\n"
+        f"reportgen.main(['catalog', '--db', {str(tmp_path / 'catalog.sqlite')!r}, 'search', 'nothing'])\n"
+        f"reportgen.main(['batch', {str(tmp_path / 'empty')!r}])\n")
+    assert "ImportError" not in result.stderr, result.stderr
+    assert "No markdown reports found" in result.stderr
+
+
+def test_gui_needs_tkinter():
+    result = _run_without_tk("import gui")
+    assert result.returncode != 0 and "tkinter" in result.stderr
@@ -0,0 +1,39 @@
+import pytest
+
+from editorbuffer import chunks, plan_sections
+
+HEXDUMP = "".join(f"{i:08x}  de ad be ef\n" for i in range(200))
+REPORT = f"---\ntitle: t\n---\n\n# Summary\n\nShort.\n\n## Appendix A\n{HEXDUMP}\n## Notes\n\nShort too.\n"
+
+
+def test_large_section_body_is_split_out():
+    pieces = plan_sections(REPORT, 1024)
+    assert "".join(piece for _, piece in pieces) == REPORT
+    large = [piece for is_large, piece in pieces if is_large]
+    assert large == [HEXDUMP]
+    # The heading stays editable, in the piece before
+    assert [piece for is_large, piece in pieces if not is_large][0].endswith("## Appendix A\n")
+
+
+@pytest.mark.parametrize("threshold", [0, 100_000])
+def test_nothing_is_large_below_the_threshold(threshold):
+    assert plan_sections(REPORT, threshold) == [(False, REPORT)]
+
+
+def test_headings_in_fenced_code_do_not_start_sections():
+    report = f"---\ntitle: t\n---\n\n# Dump\n```\n# not a heading\n{HEXDUMP}```\n"
+    pieces = plan_sections(report, 1024)
+    assert "".join(piece for _, piece in pieces) == report
+    assert [piece for is_large, piece in pieces if is_large] == [report[report.index("```"):]]
+
+
+def test_frontmatter_is_never_large():
+    report = f"---\ntitle: t\nnotes: |\n  {HEXDUMP.replace(chr(10), ' ')}\n---\n\nBody\n"
+    assert plan_sections(report, 1024) == [(False, report)]
+
+
+def test_chunks_cut_after_a_newline():
+    pieces = list(chunks(HEXDUMP, 100))
+    assert "".join(pieces) == HEXDUMP
+    assert all(len(piece) <= 100 and piece.endswith("\n") for piece in pieces)
+    assert list(chunks("x" * 250, 100)) == ["x" * 100, "x" * 100, "x" * 50]
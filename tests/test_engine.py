@@ -0,0 +1,116 @@
+import threading
+from collections import Counter
+
+import PIL.Image
+
+import engine
+from engine import DEFAULT_SETTINGS, RenderEngine, get_markdown_converter, pygments_css
+
+REPORT = "---\ntitle: t\n---\n\n# Findings\n\nBody\n\n```python\nprint(1)\n```\n"
+
+
+def _engine(tmp_path, **settings):
+    return RenderEngine(dict(DEFAULT_SETTINGS, image_cache_dir=str(tmp_path / "cache"),
+                             highlight_cache_dir=str(tmp_path / "highlight"), **settings))
+
+
+def test_converter_is_reused_and_reset_between_documents():
+    first = get_markdown_converter()
+    assert "footnote" in first.convert("Claim[^1]\n\n[^1]: Source\n")
+
+    second = get_markdown_converter()
+    assert second is first
+    assert "footnote" not in second.convert("Plain text\n")
+
+
+def test_each_thread_gets_its_own_converter():
+    here = get_markdown_converter()
+    there = []
+    worker = threading.Thread(target=lambda: there.append(get_markdown_converter()))
+    worker.start()
+    worker.join()
+    assert there[0] is not here
+
+
+def test_pygments_css_is_generated_once_per_style(monkeypatch):
+    pygments_css.cache_clear()
+    assert pygments_css("default") is pygments_css("default")
+    assert pygments_css("monokai") != pygments_css("default")
+    assert pygments_css.cache_info().misses == 2
+
+
+def test_repeated_renders_give_the_same_html(tmp_path):
+    render = _engine(tmp_path)
+    first = render.generate_html(REPORT, base_dir=tmp_path)
+    assert render.generate_html(REPORT, base_dir=tmp_path) == first
+    assert _engine(tmp_path).generate_html(REPORT, base_dir=tmp_path) == first
+    assert 'class="codehilite"' in first
+
+
+def _screenshots(folder, count):
+    names = []
+    for i in range(count):
+        PIL.Image.new("RGB", (40 + i, 30), (i * 40, 0, 0)).save(folder / f"shot{i}.png")
+        names.append(f"shot{i}.png")
+    return names
+
+
+def test_parallel_image_encoding_matches_serial(tmp_path):
+    names = _screenshots(tmp_path, 5)
+    body = "\n\n".join(f"![{name}]({name})" for name in names[:3] + ["missing.png"] + names[3:])
+    md = f"---\ntitle: t\n---\n\n{body}\n"
+
+    outputs = []
+    for workers in (1, 4):
+        warnings = []
+        render = RenderEngine(dict(DEFAULT_SETTINGS, image_cache_dir=str(tmp_path / f"cache{workers}"),
+                                   image_workers=workers), on_warning=warnings.append)
+        outputs.append((render.generate_html(md, base_dir=tmp_path), warnings))
+    assert outputs[0] == outputs[1]
+    assert [w for w in outputs[0][1] if "missing.png" in w]
+
+
+def test_each_image_is_encoded_once(tmp_path, monkeypatch):
+    names = _screenshots(tmp_path, 3)
+    encoded = Counter()
+    real_prepare_image = engine.prepare_image
+
+    def counting_prepare_image(path, box):
+        encoded[path.name] += 1
+        return real_prepare_image(path, box)
+
+    monkeypatch.setattr(engine, "prepare_image", counting_prepare_image)
+    body = "\n\n".join(f"![a]({name}) ![b](./{name})" for name in names)
+    html = _engine(tmp_path, image_workers=4).generate_html(f"---\ntitle: t\n---\n\n{body}\n", base_dir=tmp_path)
+
+    assert encoded == {name: 1 for name in names}
+    assert html.count("data:image/png;base64,") == 6
+
+
+def test_streamed_page_matches_the_rendered_one(tmp_path):
+    _screenshots(tmp_path, 2)
+    md = "---\ntitle: t\ntags: [rat]\nfamily: x\n---\n\n![a](shot0.png)\n\n![b](shot1.png)\n"
+    render = _engine(tmp_path)
+    page = render.generate_html(md, base_dir=tmp_path)
+    pieces = render.generate_html(md, base_dir=tmp_path, stream=True)
+    assert not isinstance(pieces, str)
+    assert "".join(pieces) == page
+
+    render.write_html(render.generate_html(md, base_dir=tmp_path, stream=True), tmp_path / "streamed.html")
+    assert (tmp_path / "streamed.html").read_text(encoding="utf-8") == page
+
+
+def test_written_page_inlines_each_referenced_image_once(tmp_path):
+    _screenshots(tmp_path, 2)
+    md = "---\ntitle: t\n---\n\n![a](shot0.png)\n\n![again](shot0.png)\n\n![b](shot1.png)\n"
+    render = _engine(tmp_path)
+    page = render.generate_html(md, base_dir=tmp_path, embed="reference")
+    assert "file://" in page
+
+    render.write_html(page, tmp_path / "report.html")
+    written = (tmp_path / "report.html").read_text(encoding="utf-8")
+    assert written == render.inline_references(page)
+    assert "file://" not in written
+    # shot0 is shared through one CSS rule, shot1 is inline
+    assert written.count("data:image/png;base64,") == 2
+    assert written.count('class="shared-img-0"') == 2
@@ -0,0 +1,93 @@
+import threading
+
+from engine import DEFAULT_SETTINGS
+from exporter import ExportJob, ExportQueue
+from imagecache import ImageCache
+
+REPORT = "---\ntitle: t\n---\n\n# Findings\n\nBody\n"
+
+
+def _queue(tmp_path, **settings):
+    return ExportQueue(dict(DEFAULT_SETTINGS, **settings), None, ImageCache(tmp_path / "cache"))
+
+
+def _fake_layout(engine, pages=2):
+    """Stand in for WeasyPrint's layout, which needs Pango, and report fixed pages and thumbnails."""
+    def render_pdf(html, base_url=None, thumbnail_width=0):
+        thumbnails = [b"png-%d" % page for page in range(pages)] if thumbnail_width else []
+        engine.pdf_info = {"pages": pages, "page_sizes": [(595.0, 842.0)] * pages, "thumbnails": []}
+        return {"pdf": b"%PDF-1.7 fake", "pages": pages, "page_sizes": engine.pdf_info["page_sizes"],
+                "thumbnails": thumbnails}
+
+    engine.render_pdf = render_pdf
+
+
+def _wait(job):
+    for _ in range(500):
+        if job.finished:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError(f"export still {job.status}")
+
+
+def test_export_writes_thumbnails_next_to_the_final_pdf(tmp_path):
+    exports = _queue(tmp_path, pdf_thumbnail_width=120)
+    _fake_layout(exports.engine)
+    (tmp_path / "out").mkdir()
+    job = exports.submit(ExportJob(REPORT, tmp_path / "out" / "report", base_dir=tmp_path))
+    _wait(job)
+
+    assert job.status == "done", job.error
+    thumbs = tmp_path / "out" / "report-thumbs"
+    assert sorted(p.name for p in thumbs.iterdir()) == ["page-001.png", "page-002.png"]
+    assert job.pdf_info["thumbnails"] == [str(thumbs / "page-001.png"), str(thumbs / "page-002.png")]
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["report-thumbs", "report.html", "report.pdf"]
+
+
+def test_failed_export_keeps_the_previous_files(tmp_path):
+    exports = _queue(tmp_path)
+    (tmp_path / "report.pdf").write_bytes(b"old")
+    job = exports.submit(ExportJob("no frontmatter, no content", tmp_path / "report"))
+    _wait(job)
+
+    assert job.status == "failed"
+    assert (tmp_path / "report.pdf").read_bytes() == b"old"
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_file()) == ["report.pdf"]
+
+
+def test_cancelled_job_never_runs(tmp_path):
+    exports = _queue(tmp_path)
+    _fake_layout(exports.engine)
+    job = ExportJob(REPORT, tmp_path / "report")
+    job.cancel()
+    exports.submit(job)
+    _wait(job)
+
+    assert job.status == "cancelled"
+    assert not (tmp_path / "report.pdf").exists()
+
+
+def test_take_finished_never_loses_a_job(tmp_path):
+    exports = _queue(tmp_path)
+    jobs = [ExportJob(REPORT, tmp_path / f"r{i}") for i in range(3)]
+    exports.jobs.extend(jobs)
+    jobs[0].status = "done"
+
+    class FinishesWhenRead(ExportJob):
+        """Finishes the moment take_finished() first looks at it, like a worker racing the GUI."""
+        reads = 0
+
+        @property
+        def finished(self):
+            self.reads += 1
+            if self.reads == 1:
+                return False
+            return True
+
+    racing = FinishesWhenRead(REPORT, tmp_path / "racing")
+    exports.jobs.append(racing)
+
+    taken = exports.take_finished()
+    assert taken == [jobs[0]]
+    assert exports.jobs == [jobs[1], jobs[2], racing]
+    assert exports.take_finished() == [racing]
@@ -0,0 +1,40 @@
+import os
+
+import filecache
+from filecache import prune_directory, write_atomic
+from highlight import HighlightCache
+
+
+def test_write_atomic_replaces_and_leaves_no_temp_files(tmp_path):
+    target = tmp_path / "settings.json"
+    write_atomic(target, "old")
+    write_atomic(target, "new", durable=True)
+    write_atomic(tmp_path / "entry.bin", b"\x00\x01")
+
+    assert target.read_text(encoding="utf-8") == "new"
+    assert (tmp_path / "entry.bin").read_bytes() == b"\x00\x01"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["entry.bin", "settings.json"]
+
+
+def test_prune_directory_drops_oldest_first(tmp_path):
+    for age, name in enumerate(["newest", "middle", "oldest"]):
+        path = tmp_path / "ab" / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1000 - age, 1000 - age))
+
+    assert prune_directory(tmp_path, 250) == 200
+    assert sorted(p.name for p in (tmp_path / "ab").iterdir()) == ["middle", "newest"]
+
+
+def test_highlight_cache_stays_under_its_disk_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(filecache, "PRUNE_INTERVAL", 0)
+    cache = HighlightCache(tmp_path, max_entries=4, max_disk_bytes=10 * 1024)
+    for i in range(40):
+        cache.put(f"{i:064x}", "<pre>" + "x" * 1024 + "</pre>")
+
+    on_disk = sum(p.stat().st_size for p in tmp_path.rglob("*.html"))
+    assert on_disk <= 10 * 1024
+    # Evicted from memory and pruned from disk: a miss, not an error
+    assert cache.get(f"{0:064x}") is None
+    assert cache.get(f"{39:064x}") is not None
@@ -0,0 +1,99 @@
+import PIL.Image
+
+import engine
+from engine import DEFAULT_SETTINGS, RenderEngine
+from imagecache import ImageCache
+
+
+def _screenshot(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    PIL.Image.new("RGB", (40, 30), "red").save(path)
+    return path
+
+
+def _engine(cache_dir):
+    return RenderEngine(dict(DEFAULT_SETTINGS, image_cache_dir=str(cache_dir)))
+
+
+def test_identical_files_are_stored_once(tmp_path):
+    cache_dir = tmp_path / "cache"
+    first = _screenshot(tmp_path / "a" / "shot.png")
+    second = tmp_path / "b" / "shot.png"
+    second.parent.mkdir()
+    second.write_bytes(first.read_bytes())
+
+    render = _engine(cache_dir)
+    src_a = render.image_src(first, embed="reference")
+    src_b = render.image_src(second, embed="reference")
+
+    assert src_a == src_b
+    assert len(list(cache_dir.rglob("*.png"))) == 1
+    assert len(list(cache_dir.rglob("*.ref"))) == 2
+
+
+def test_warm_render_skips_hashing(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    shot = _screenshot(tmp_path / "shot.png")
+    cold = _engine(cache_dir).image_src(shot, embed="reference")
+
+    def no_hashing(path):
+        raise AssertionError(f"hashed {path}")
+
+    monkeypatch.setattr(engine, "file_digest", no_hashing)
+    # A fresh engine and cache instance: the alias has to come from disk
+    assert _engine(cache_dir).image_src(shot, embed="reference") == cold
+
+
+def test_edited_file_gets_a_new_entry(tmp_path):
+    cache = ImageCache(tmp_path / "cache")
+    shot = _screenshot(tmp_path / "shot.png")
+    key = cache.key_for(shot, "1x1")
+    cache.link(key, cache.content_key("aa", "1x1"))
+
+    PIL.Image.new("RGB", (41, 30), "blue").save(shot)
+    new_key = cache.key_for(shot, "1x1")
+    assert new_key != key
+    assert cache.resolve(new_key) is None
+
+
+def test_unknown_image_type_is_found_again(tmp_path):
+    cache = ImageCache(tmp_path / "cache")
+    key = cache.content_key("bb", "1x1")
+    stored = cache.put(key, "bmp", b"BM fake bitmap")
+    assert stored.path.suffix == ".bin"
+
+    fresh = ImageCache(tmp_path / "cache")
+    entry = fresh.get(key)
+    assert (entry.mime, entry.data, entry.path) == ("bmp", b"BM fake bitmap", stored.path)
+    assert fresh.stats()["disk_hits"] == 1
+
+
+def test_second_engine_reads_the_encoded_image_from_disk(tmp_path):
+    shot = _screenshot(tmp_path / "shot.png")
+    first = _engine(tmp_path / "cache")
+    src = first.encode_image_base64(shot)
+    assert src.startswith("data:image/png;base64,")
+    assert first.image_cache.stats()["misses"] == 1
+
+    second = _engine(tmp_path / "cache")
+    assert second.encode_image_base64(shot) == src
+    assert second.image_cache.stats()["disk_hits"] == 1
+
+
+def test_edited_image_is_encoded_again(tmp_path):
+    shot = _screenshot(tmp_path / "shot.png")
+    before = _engine(tmp_path / "cache").encode_image_base64(shot)
+    PIL.Image.new("RGB", (40, 31), "blue").save(shot)
+    assert _engine(tmp_path / "cache").encode_image_base64(shot) != before
+
+
+def test_memory_lru_stays_within_its_byte_budget():
+    cache = ImageCache(None, max_bytes=250)
+    for i in range(5):
+        cache.put(f"{i:02d}", "png", b"x" * 100)
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["memory_bytes"] == 200
+    assert cache.get("00") is None and cache.get("04") is not None
+    # Larger than the whole budget: handed back, never kept
+    assert cache.put("big", "png", b"x" * 300).data == b"x" * 300
+    assert cache.get("big") is None
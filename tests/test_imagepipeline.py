@@ -0,0 +1,59 @@
+import os
+from io import BytesIO
+
+import PIL.Image
+import pytest
+
+from imagepipeline import css_length_to_inches, prepare_image, print_box
+
+
+def _decode(data):
+    return PIL.Image.open(BytesIO(data))
+
+
+@pytest.mark.parametrize("value, inches", [("1in", 1.0), ("2.54cm", 1.0), ("72pt", 1.0), ("96", 1.0),
+                                           ("6rem", 1.0), ("wide", 0.0)])
+def test_css_length_to_inches(value, inches):
+    assert css_length_to_inches(value) == pytest.approx(inches)
+
+
+def test_print_box_is_the_text_column_at_the_target_dpi():
+    # A4 (210mm) minus two 1.5cm margins is 7.09in; 500px max-height is 5.21in
+    assert print_box({}) == (1360, 1000)
+    assert print_box({"image_dpi": 96, "margin": "0"}) == (793, 500)
+    assert print_box({}, css_width="1in") == (192, 1000)
+
+
+def test_large_photo_is_downscaled_to_jpeg(tmp_path):
+    photo = tmp_path / "photo.png"
+    PIL.Image.frombytes("RGB", (800, 400), os.urandom(800 * 400 * 3)).save(photo)
+
+    data, mime = prepare_image(photo, (200, 200))
+    assert mime == "jpeg"
+    assert _decode(data).size == (200, 100)
+
+
+def test_screenshot_stays_png(tmp_path):
+    shot = tmp_path / "shot.png"
+    img = PIL.Image.new("RGB", (800, 400), "white")
+    img.paste("navy", (0, 0, 800, 40))
+    img.save(shot)
+
+    data, mime = prepare_image(shot, (400, 400))
+    assert mime == "png"
+    assert _decode(data).size == (400, 200)
+
+
+def test_transparent_image_keeps_its_alpha(tmp_path):
+    logo = tmp_path / "logo.png"
+    PIL.Image.frombytes("RGBA", (600, 600), os.urandom(600 * 600 * 4)).save(logo)
+
+    data, mime = prepare_image(logo, (100, 100))
+    assert mime == "png"
+    assert _decode(data).mode == "RGBA"
+
+
+def test_image_that_fits_is_embedded_untouched(tmp_path):
+    shot = tmp_path / "shot.png"
+    PIL.Image.new("RGB", (40, 30), "red").save(shot)
+    assert prepare_image(shot, (100, 100)) == (shot.read_bytes(), "png")
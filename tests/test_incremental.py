@@ -0,0 +1,48 @@
+import pytest
+
+import incremental
+from engine import DEFAULT_SETTINGS, RenderEngine
+from incremental import is_up_to_date, write_manifest
+
+
+@pytest.fixture(autouse=True)
+def manifest_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental, "MANIFEST_DIR", tmp_path / "manifests")
+
+
+def _build(tmp_path, md_text):
+    """Render-free stand-in for a batch build: generate the HTML and write the manifest."""
+    md_path = tmp_path / "report.md"
+    md_path.write_text(md_text, encoding="utf-8")
+    engine = RenderEngine(dict(DEFAULT_SETTINGS, image_cache_dir=str(tmp_path / "cache")))
+    html = engine.generate_html(md_text, base_dir=tmp_path, embed="reference")
+    output = tmp_path / "report.html"
+    output.write_text(html, encoding="utf-8")
+    write_manifest(md_path, tmp_path / "report", [output], engine.dependencies, "config")
+    return md_path
+
+
+def test_missing_image_goes_stale_when_it_appears(tmp_path):
+    md_path = _build(tmp_path, "---\ntitle: t\n---\n\n![shot](media/shot.png)\n")
+    assert is_up_to_date(md_path, tmp_path / "report", "config")
+
+    (tmp_path / "media").mkdir()
+    (tmp_path / "media" / "shot.png").write_bytes(b"not really a png")
+    assert not is_up_to_date(md_path, tmp_path / "report", "config")
+
+
+def test_missing_ioc_file_goes_stale_when_it_appears(tmp_path):
+    md_path = _build(tmp_path, "---\ntitle: t\nioc_file: iocs.csv\n---\n\nBody\n")
+    assert is_up_to_date(md_path, tmp_path / "report", "config")
+
+    (tmp_path / "iocs.csv").write_text("type,value\nip,10.0.0.1\n", encoding="utf-8")
+    assert not is_up_to_date(md_path, tmp_path / "report", "config")
+
+
+def test_deleted_input_is_stale(tmp_path):
+    (tmp_path / "iocs.csv").write_text("type,value\nip,10.0.0.1\n", encoding="utf-8")
+    md_path = _build(tmp_path, "---\ntitle: t\nioc_file: iocs.csv\n---\n\nBody\n")
+    assert is_up_to_date(md_path, tmp_path / "report", "config")
+
+    (tmp_path / "iocs.csv").unlink()
+    assert not is_up_to_date(md_path, tmp_path / "report", "config")
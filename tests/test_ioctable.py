@@ -0,0 +1,104 @@
+import gc
+import re
+import warnings
+
+import pytest
+
+from engine import get_markdown_converter
+from ioctable import find_tables, read_sidecar, render_table, split_row
+from preprocess import join, scan, table_blocks
+
+HEADER = "| Type | Value | Note |\n|----|:----:|---:|\n"
+
+
+def _table(rows):
+    return HEADER + "".join(f"| {a} | {b} | {c} |\n" for a, b, c in rows)
+
+
+def _markdown_cells(row):
+    html = get_markdown_converter().convert(HEADER + row + "\n")
+    return re.findall(r"<td[^>]*>(.*?)</td>", html, re.S)
+
+
+def _fast_cells(row):
+    return re.findall(r"<td[^>]*>(.*?)</td>", "".join(render_table(["a", "b", "c"], None, [split_row(row)])), re.S)
+
+
+def test_table_inside_fenced_code_is_left_alone():
+    code = "```\n" + _table([("ip", "10.0.0.1", "x")] * 3) + "```\n"
+    text = "Before\n\n" + code + "\nAfter\n"
+    parts = scan(text, 0, table_min_rows=2)
+    assert table_blocks(parts) == []
+    assert join(parts) == text
+
+
+def test_table_right_after_frontmatter():
+    text = "---\ntitle: t\n---\n" + _table([("ip", "10.0.0.1", "x"), ("ip", "10.0.0.2", "y")])
+    start = text.index("| Type")
+    ((table_start, end, header, aligns, body_start),) = find_tables(text, start, 2)
+    assert (table_start, end) == (start, len(text) - 1)
+    assert header == ["Type", "Value", "Note"]
+    assert aligns == [None, "center", "right"]
+    # The frontmatter's --- lines are not a separator row
+    assert list(find_tables(text, 0, 1)) == [(table_start, end, header, aligns, body_start)]
+
+
+def test_table_boundaries():
+    table = _table([("ip", "10.0.0.1", "x"), ("ip", "10.0.0.2", "y"), ("ip", "10.0.0.3", "z")])
+    text = "Intro line\n\n" + table + "\nAfter the table\n"
+    ((start, end, _, _, body_start),) = find_tables(text, 0, 3)
+    assert text[start:end] == table.rstrip("\n")
+    assert list(find_tables(text, 0, 4)) == []
+
+
+def test_escaped_pipes():
+    text = _table([("cmd", "a \\| b", "x"), ("regex", "`(a|b)`", "y")])
+    ((start, end, header, aligns, body_start),) = find_tables(text, 0, 2)
+    rows = [split_row(line) for line in text[body_start:end].split("\n")]
+    assert rows == [["cmd", "a | b", "x"], ["regex", "`(a|b)`", "y"]]
+
+
+@pytest.mark.parametrize("row", [
+    "| `e3b0c44298fc1c14` | evil[.]example[.]com | 10.0.0[.]1 |",
+    "| *.evil.com | C:\\Users\\x_y\\a.exe | AT&T |",
+    "| a < b | `<script>` | x \\| y |",
+    "| `a|b` | snake_case_name | foo_bar |",
+    "| hxxp://evil[.]com/a_b | \\*not emphasis\\* | 5 \\* 3 |",
+])
+def test_plain_rows_render_like_the_markdown_parser(row):
+    text = HEADER + row + "\n"
+    assert len(list(find_tables(text, 0, 1))) == 1
+    assert _fast_cells(row) == _markdown_cells(row)
+
+
+@pytest.mark.parametrize("row", [
+    "| **bold** | x | y |",
+    "| [link](http://example.com) | x | y |",
+    "| ![shot](x.png) | x | y |",
+    "| <b>raw html</b> | x | y |",
+    "| &amp; | x | y |",
+    "| _em_ | x | y |",
+    "| __init__ | x | y |",
+    "| *a* | x | y |",
+])
+def test_tables_with_other_markup_go_through_the_markdown_parser(row):
+    text = HEADER + "| ip | 10.0.0.1 | x |\n" * 3 + row + "\n"
+    assert list(find_tables(text, 0, 1)) == []
+    parts = scan(text, 0, table_min_rows=1)
+    assert table_blocks(parts) == [] and join(parts) == text
+
+
+@pytest.mark.parametrize("name", ["iocs.csv", "iocs.tsv"])
+def test_read_sidecar_header_only_leaves_no_open_file(tmp_path, name):
+    sep = "\t" if name.endswith(".tsv") else ","
+    path = tmp_path / name
+    path.write_text(f'type{sep}"value\nwrapped"\nip{sep}10.0.0.1\n', encoding="utf-8")
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", ResourceWarning)
+        header, rows = read_sidecar(path)
+        del rows
+        gc.collect()
+    assert header == ["type", "value\nwrapped"]
+    assert not [w for w in caught if issubclass(w.category, ResourceWarning)]
+    assert list(read_sidecar(path)[1]) == [["ip", "10.0.0.1"]]
@@ -0,0 +1,79 @@
+import http.client
+
+import pytest
+
+from engine import DEFAULT_SETTINGS
+from imagecache import ImageCache
+from livepreview import LivePreview, split_sections
+
+REPORT = """---
+title: Preview
+---
+
+# One
+
+First section.
+
+```markdown
+# not a section
+```
+
+## Two
+
+Second section.
+"""
+
+
+@pytest.fixture
+def preview(tmp_path):
+    preview = LivePreview(dict(DEFAULT_SETTINGS), None, ImageCache(tmp_path / "cache"))
+    preview.start()
+    yield preview
+    preview.stop()
+
+
+def _get(preview, path, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", preview._httpd.server_address[1], timeout=5)
+    conn.request("GET", path, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response.status, body
+
+
+def test_split_sections_ignores_headings_in_fenced_code():
+    sections = split_sections(REPORT.split("---\n", 2)[2].strip())
+    assert [s.split("\n", 1)[0] for s in sections] == ["# One", "## Two"]
+    assert "# not a section" in sections[0]
+
+
+def test_update_converts_only_changed_sections(preview, monkeypatch):
+    preview.update(REPORT)
+    converted = []
+    convert = preview.engine.convert_markdown
+    monkeypatch.setattr(preview.engine, "convert_markdown", lambda md: converted.append(md) or convert(md))
+
+    preview.update(REPORT.replace("Second section.", "Second section, edited."))
+    state = preview.wait_for_change(0, timeout=1)
+    assert len(converted) == 1 and "edited" in state["sections"][state["order"][1]]
+    assert "First section." in state["sections"][state["order"][0]]
+
+
+def test_title_change_asks_pages_to_reload(preview):
+    preview.update(REPORT)
+    head_key = preview.wait_for_change(0, timeout=1)["head_key"]
+    preview.update(REPORT.replace("title: Preview", "title: Renamed"))
+    assert preview.wait_for_change(1, timeout=1)["head_key"] != head_key
+
+
+def test_page_is_served_to_local_clients(preview):
+    preview.update(REPORT)
+    status, body = _get(preview, "/", {"Origin": preview.url.rstrip("/")})
+    assert status == 200 and b"First section." in body
+
+
+@pytest.mark.parametrize("headers", [{"Host": "attacker.example"}, {"Origin": "https://attacker.example"}])
+def test_rebound_or_cross_origin_requests_are_refused(preview, headers):
+    preview.update(REPORT)
+    status, body = _get(preview, "/", headers)
+    assert status == 403 and b"First section." not in body
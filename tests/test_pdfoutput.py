@@ -0,0 +1,50 @@
+import base64
+import os
+from io import BytesIO
+
+import pytest
+
+from pdfoutput import pdf_options, render_options
+
+SETTINGS = {"pdf_optimize_images": True, "pdf_jpeg_quality": 20, "pdf_full_fonts": True,
+            "pdf_variant": "pdf/a-3b"}
+
+
+def _weasyprint():
+    try:
+        import weasyprint
+    except (ImportError, OSError) as e:  # OSError: Pango isn't installed
+        pytest.skip(f"WeasyPrint is not usable here: {e}")
+    return weasyprint
+
+
+def test_image_options_go_to_render_and_font_options_to_write_pdf():
+    assert render_options(SETTINGS) == {"optimize_images": True, "jpeg_quality": 20, "pdf_variant": "pdf/a-3b"}
+    assert pdf_options(SETTINGS) == {"full_fonts": True, "hinting": False, "pdf_variant": "pdf/a-3b"}
+    assert "jpeg_quality" not in render_options({})
+
+
+def test_jpeg_quality_shrinks_the_pdf():
+    _weasyprint()
+    PIL_Image = pytest.importorskip("PIL.Image")
+    from pdfoutput import layout
+
+    photo = BytesIO()
+    PIL_Image.frombytes("RGB", (400, 300), os.urandom(400 * 300 * 3)).save(photo, format="JPEG", quality=95)
+    html = f'<img src="data:image/jpeg;base64,{base64.b64encode(photo.getvalue()).decode()}">'
+
+    default = layout(html, ".", {}).write_pdf(**pdf_options({}))
+    recompressed = layout(html, ".", {"pdf_jpeg_quality": 10}).write_pdf(**pdf_options({}))
+    assert len(recompressed) < len(default)
+
+
+def test_layout_keeps_the_template_style_in_the_author_cascade():
+    weasyprint = _weasyprint()
+    from pdfoutput import layout, page_sizes
+
+    # The body's <style> comes later at the same origin, so it wins; as a user-origin sheet the
+    # template's !important rule would have won instead
+    html = ("<html><head><style>@page { size: A5 !important }</style></head><body>"
+            "<style>@page { size: A4 !important }</style><p>x</p></body></html>")
+    expected = weasyprint.HTML(string=html).render()
+    assert page_sizes(layout(html, ".", {})) == page_sizes(expected)
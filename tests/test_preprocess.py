@@ -0,0 +1,85 @@
+import re
+
+import pytest
+
+from preprocess import image_refs, join, scan
+
+# What prepare_markdown did before the single-pass scan: two regex passes over the whole body
+OLD_HEADER_RE = re.compile(r"\\(#+)")
+OLD_IMAGE_RE = re.compile(r'!\[(.*?)\]\((.*?)\)')
+
+
+def _src(path):
+    """Stand-in for the engine's image loading: URLs keep their reference, files get a new src."""
+    return None if path.startswith(("http://", "https://", "data:")) else f"SRC[{path}]"
+
+
+def old_prepare(text):
+    text = OLD_HEADER_RE.sub(r"\1", text)
+
+    def replace_image(match):
+        src = _src(match.group(2))
+        return f"![{match.group(1)}]({src})" if src else match.group(0)
+
+    return OLD_IMAGE_RE.sub(replace_image, text)
+
+
+def new_prepare(text, start=0):
+    parts = scan(text, start)
+    for ref in image_refs(parts):
+        ref.src = _src(ref.path)
+    return join(parts)
+
+
+@pytest.mark.parametrize("text", [
+    "\\## Static Analysis\n\nSee ![shot](media/a.png) and ![](media/b.png).\n\\### Deeper\n",
+    "![one](a.png) ![two](b.png)\n![url](https://example.com/x.png) ![inline](data:image/png;base64,AAAA)\n",
+    "![spaced](media/shot 1.png)\n![encoded](media/shot%201.png)\n",
+    "![a [b] c](media/x.png)\n",
+    "Not a header: a \\# b, \\#### four\n",
+    "Unclosed fence\n```\n![shot](a.png)\n\\## heading\n",
+    "No images or headers at all.\n",
+])
+def test_same_as_the_old_regexes(text):
+    assert new_prepare(text) == old_prepare(text)
+
+
+@pytest.mark.parametrize("fence", ["```", "~~~", "````"])
+def test_fenced_code_is_copied_untouched(fence):
+    before = "\\## Before\n![shot](a.png)\n"
+    code = f"{fence} markdown\n\\## not a header\n![not an image](b.png)\n{fence}\n"
+    after = "\\## After\n![shot](c.png)\n"
+    # The old passes rewrote inside code blocks too; outside them the result is the same
+    assert new_prepare(before + code + after) == old_prepare(before) + code + old_prepare(after)
+
+
+def test_fence_at_the_start_of_the_body():
+    text = "---\ntitle: t\n---\n```\n\\## code\n```\n\\## Heading\n"
+    start = text.index("```")
+    assert new_prepare(text, start) == text[start:].replace("\n\\## Heading", "\n## Heading")
+
+
+@pytest.mark.parametrize("reference, path, title", [
+    # The old regex stopped at the first ")", leaving "media/shot (1" and a stray ".png)"
+    ("![s](media/shot (1).png)", "media/shot (1).png", None),
+    ("![s](media/a (copy) (2).png)", "media/a (copy) (2).png", None),
+    # <...> paths: the old regex kept the brackets as part of the path
+    ("![s](<media/my shot.png>)", "media/my shot.png", None),
+    ("![s](<media/shot (1).png>)", "media/shot (1).png", None),
+    # Titles: the old regex made the title part of the path
+    ('![s](media/a.png "A title")', "media/a.png", '"A title"'),
+    ("![s](media/my shot.png 'Single')", "media/my shot.png", "'Single'"),
+    ('![s](<media/my shot.png> "T")', "media/my shot.png", '"T"'),
+])
+def test_paths_the_old_regex_got_wrong(reference, path, title):
+    parts = scan(f"Before {reference} after\n")
+    (ref,) = image_refs(parts)
+    assert (ref.path, ref.title, ref.original) == (path, title, reference)
+    ref.src = "SRC"
+    expected = f"![s](SRC {title})" if title else "![s](SRC)"
+    assert join(parts) == f"Before {expected} after\n"
+
+
+def test_failed_images_keep_their_original_reference():
+    text = '![s](<media/missing shot.png> "T") and \\## x'
+    assert join(scan(text)) == '![s](<media/missing shot.png> "T") and ## x'
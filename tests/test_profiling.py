@@ -0,0 +1,57 @@
+import json
+import pstats
+
+import PIL.Image
+
+from engine import DEFAULT_SETTINGS, RenderEngine
+from profiling import RenderProfile, profiled
+
+REPORT = "---\ntitle: t\n---\n\n# Findings\n\n![shot](shot.png)\n"
+
+
+def _engine(tmp_path):
+    PIL.Image.new("RGB", (40, 30), "red").save(tmp_path / "shot.png")
+    return RenderEngine(dict(DEFAULT_SETTINGS, image_cache_dir=str(tmp_path / "cache")))
+
+
+def test_render_records_each_stage_and_image(tmp_path):
+    render = _engine(tmp_path)
+    with profiled(render, "report.md") as profile:
+        render.generate_html(REPORT, base_dir=tmp_path)
+
+    assert render.profile is None
+    stages = [entry["stage"] for entry in profile.stages]
+    for stage in ("frontmatter", "scan", "images", "markdown", "template"):
+        assert stage in stages
+    image = profile.images[0]
+    assert image["path"] == str((tmp_path / "shot.png").resolve())
+    assert image["source_bytes"] == (tmp_path / "shot.png").stat().st_size
+    assert image["encoded_bytes"] > 0 and not image["cache_hit"]
+
+    report = json.loads(json.dumps(profile.to_dict()))
+    assert report["label"] == "report.md" and report["wall_s"] >= sum(profile.totals().values())
+
+
+def test_second_render_is_a_cache_hit(tmp_path):
+    render = _engine(tmp_path)
+    render.generate_html(REPORT, base_dir=tmp_path)
+    with profiled(render) as profile:
+        render.generate_html(REPORT, base_dir=tmp_path)
+    assert [image["cache_hit"] for image in profile.images] == [True]
+
+
+def test_summary_adds_up_repeated_stages():
+    profile = RenderProfile()
+    for name, seconds in (("images", 0.2), ("markdown", 0.05), ("images", 0.3)):
+        profile.stages.append({"stage": name, "wall_s": seconds, "cpu_s": seconds, "peak_mem_delta_bytes": 0})
+    profile.record_image("a.png", 0.1, False, 10, 5)
+
+    assert profile.totals() == {"images": 0.5, "markdown": 0.05}
+    assert profile.summary() == "550ms total: images (1) 500ms, markdown 50ms"
+
+
+def test_cprofile_dump_can_be_read_by_pstats(tmp_path):
+    render = _engine(tmp_path)
+    with profiled(render, cprofile_path=tmp_path / "report.pstats"):
+        render.generate_html(REPORT, base_dir=tmp_path)
+    assert pstats.Stats(str(tmp_path / "report.pstats")).total_calls > 0
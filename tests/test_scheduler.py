@@ -0,0 +1,85 @@
+import json
+
+import PIL.Image
+import pytest
+
+import scheduler
+from engine import DEFAULT_SETTINGS
+from scheduler import Scheduler, _Job, estimate_cost, memory_budget
+
+MB = 1024 * 1024
+
+
+def _scheduler(budget_mb, workers=2, **kwargs):
+    return Scheduler(dict(DEFAULT_SETTINGS), workers=workers, budget_bytes=budget_mb * MB, **kwargs)
+
+
+def _queue(sched, *costs_mb):
+    sched._queue = [_Job((f"r{i}.md", f"r{i}"), cost * MB) for i, cost in enumerate(costs_mb)]
+
+
+def test_memory_budget_parses_megabytes():
+    assert memory_budget("512") == 512 * MB
+    assert memory_budget(1.5) == int(1.5 * MB)
+
+
+def test_estimate_counts_text_images_and_table_rows(tmp_path):
+    PIL.Image.new("RGB", (100, 50)).save(tmp_path / "shot.png")
+    md = tmp_path / "r.md"
+    md.write_text("---\ntitle: t\n---\n\n![a](shot.png)\n![again](shot.png)\n\n| a |\n|---|\n| 1 |\n",
+                  encoding="utf-8")
+
+    cost = estimate_cost(md)
+    assert (cost["images"], cost["pixels"], cost["table_rows"]) == (1, 5000, 3)
+    assert cost["estimate"] > scheduler.WORKER_BASE_BYTES
+
+
+def test_first_job_always_starts():
+    sched = _scheduler(100)
+    _queue(sched, 500)
+    assert sched._next_job() == 0
+
+
+def test_smaller_job_overtakes_one_that_does_not_fit():
+    sched = _scheduler(1000)
+    _queue(sched, 300, 250, 100)
+    sched._busy, sched._in_flight = [object()], 800 * MB
+    # 200 MB free: the 300 MB head waits, the 100 MB job goes
+    assert sched._next_job() == 2
+    assert sched._queue[0].passed_over == 1
+
+
+def test_big_job_is_not_overtaken_forever():
+    sched = _scheduler(1000, workers=2)
+    _queue(sched, 300, 100)
+    sched._busy, sched._in_flight = [object()], 800 * MB
+    sched._queue[0].passed_over = 4
+    assert sched._next_job() is None
+
+
+def test_unreadable_report_fails_alone(tmp_path, monkeypatch):
+    stats = tmp_path / "stats.jsonl"
+    good = tmp_path / "good.md"
+    good.write_text("---\ntitle: t\n---\n\nBody\n", encoding="utf-8")
+    missing = tmp_path / "missing.md"
+
+    def render_one(md_path, output_base, *args):
+        return {"path": md_path, "result": None, "warnings": [], "profile": None,
+                "error": None if md_path == str(good) else "No such file"}
+
+    # Workers are forked, so they pick up the stand-in for the renderer
+    monkeypatch.setattr("batch._render_one", render_one)
+    with _scheduler(4096, workers=1, stats_path=stats) as sched:
+        outcomes = {o["path"]: o for o in sched.run([(str(missing), str(tmp_path / "m")),
+                                                      (str(good), str(tmp_path / "g"))])}
+
+    assert outcomes[str(good)]["error"] is None
+    assert outcomes[str(missing)]["error"] == "No such file"
+    events = [json.loads(line) for line in stats.read_text().splitlines()]
+    assert [e["event"] for e in events if e["path"] == str(missing)][0] == "estimate_failed"
+
+
+@pytest.mark.parametrize("value", ["lots", ""])
+def test_bad_budget_is_an_error(value):
+    with pytest.raises(ValueError):
+        memory_budget(value)
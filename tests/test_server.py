@@ -0,0 +1,132 @@
+import http.client
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from server import RenderServer, forbidden_reason
+
+
+@pytest.fixture(scope="module")
+def daemon():
+    # The checks under test run before a job reaches the pool, whose workers are never started
+    httpd = RenderServer(("127.0.0.1", 0), lambda: ProcessPoolExecutor(1), 1)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _request(port, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    payload = response.read()
+    conn.close()
+    return response.status, payload
+
+
+def test_health_from_localhost(daemon):
+    status, body = _request(daemon, "GET", "/health")
+    assert status == 200 and json.loads(body)["status"] == "ok"
+
+
+def test_plain_text_body_is_refused(daemon):
+    # What a web page can send cross-origin without a preflight
+    status, _ = _request(daemon, "POST", "/render", json.dumps({"path": "/etc/passwd"}),
+                         {"Content-Type": "text/plain"})
+    assert status == 415
+
+
+def test_browser_origin_is_refused(daemon):
+    status, _ = _request(daemon, "POST", "/render", json.dumps({"path": "/etc/passwd"}),
+                         {"Content-Type": "application/json", "Origin": "https://evil.example"})
+    assert status == 403
+
+
+@pytest.mark.parametrize("host", ["evil.example", "evil.example:8765", "127.0.0.1.evil.example"])
+def test_foreign_host_is_refused(daemon, host):
+    status, _ = _request(daemon, "GET", "/health", headers={"Host": host})
+    assert status == 403
+
+
+@pytest.mark.parametrize("host", ["localhost", "localhost:8765", "127.0.0.1:8765", "[::1]:8765"])
+def test_local_hosts_are_accepted(daemon, host):
+    status, _ = _request(daemon, "GET", "/health", headers={"Host": host})
+    assert status == 200
+
+
+@pytest.mark.parametrize("peer", ["192.168.1.20", "::ffff:10.0.0.5", "2001:db8::1"])
+def test_remote_client_is_refused_even_with_a_local_host_header(peer):
+    # Bound to 0.0.0.0, a remote client can send "Host: localhost" itself
+    handler = SimpleNamespace(client_address=(peer, 50000), headers={"Host": "localhost:8765"},
+                              server=SimpleNamespace(server_address=("0.0.0.0", 8765)))
+    assert forbidden_reason(handler) == "only local clients are accepted"
+
+
+@pytest.mark.parametrize("peer", ["127.0.0.1", "::1", "::ffff:127.0.0.1"])
+def test_loopback_client_is_accepted_on_any_bind_address(peer):
+    handler = SimpleNamespace(client_address=(peer, 50000), headers={"Host": "localhost:8765"},
+                              server=SimpleNamespace(server_address=("0.0.0.0", 8765)))
+    assert forbidden_reason(handler) is None
+
+
+def _crash_once(flag_path):
+    """Kill the worker the first time, as the OOM killer would; succeed after that."""
+    if not os.path.exists(flag_path):
+        open(flag_path, "w").close()
+        os._exit(1)
+    return os.getpid()
+
+
+def test_pool_is_replaced_after_a_worker_crash(tmp_path):
+    httpd = RenderServer(("127.0.0.1", 0), lambda: ProcessPoolExecutor(1), 1)
+    try:
+        first_pool = httpd.pool
+        # Retried on a new pool
+        assert httpd.submit(_crash_once, str(tmp_path / "crashed")) != os.getpid()
+        assert httpd.pool is not first_pool
+        # A job that crashes every time fails alone, and the daemon keeps working
+        with pytest.raises(Exception, match="crashed"):
+            httpd.submit(os._exit, 1)
+        assert httpd.submit(os.getpid) != os.getpid()
+    finally:
+        httpd.server_close()
+
+
+
+class _SlowSubmitPool(ProcessPoolExecutor):
+    """A pool whose submit() is slow to start, widening the window a replacement can hit."""
+
+    def __init__(self, entered):
+        super().__init__(1)
+        self.entered = entered
+
+    def submit(self, fn, *args):
+        self.entered.set()
+        time.sleep(0.2)
+        return super().submit(fn, *args)
+
+
+def test_pool_is_not_replaced_under_a_submitting_job():
+    entered = threading.Event()
+    httpd = RenderServer(("127.0.0.1", 0), lambda: _SlowSubmitPool(entered), 1)
+    results = []
+    try:
+        submitter = threading.Thread(target=lambda: results.append(httpd.submit(os.getpid)))
+        submitter.start()
+        entered.wait(5)
+        # What a job that saw the pool break does
+        with httpd._pool_lock:
+            httpd.pool.shutdown()
+            httpd.pool = ProcessPoolExecutor(1)
+        submitter.join(10)
+        # Not "cannot schedule new futures after shutdown" from the old pool
+        assert len(results) == 1 and results[0] != os.getpid()
+    finally:
+        httpd.server_close()
@@ -0,0 +1,88 @@
+import json
+import threading
+
+import pytest
+
+import settingsstore
+from engine import DEFAULT_SETTINGS
+from settingsstore import SettingsStore
+
+
+def _store(tmp_path, delay=60, **kwargs):
+    return SettingsStore(tmp_path / "settings.json", delay=delay, **kwargs)
+
+
+def _on_disk(tmp_path):
+    return json.loads((tmp_path / "settings.json").read_text(encoding="utf-8"))
+
+
+def test_first_load_writes_the_defaults(tmp_path):
+    assert _store(tmp_path).load() == DEFAULT_SETTINGS
+    assert _on_disk(tmp_path) == DEFAULT_SETTINGS
+
+
+def test_saves_are_coalesced_into_one_write(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    settings = store.load()
+    writes = []
+    monkeypatch.setattr(settingsstore, "write_atomic", lambda path, data, durable=False: writes.append(data))
+
+    for style in ("monokai", "friendly", "native"):
+        settings["style"] = style
+        store.save(settings)
+    assert writes == []
+    store.flush()
+    assert len(writes) == 1 and json.loads(writes[0])["style"] == "native"
+
+
+def test_timer_writes_after_the_delay(tmp_path):
+    store = _store(tmp_path, delay=0.05)
+    settings = store.load()
+    settings["style"] = "monokai"
+    store.save(settings)
+    for _ in range(200):
+        if _on_disk(tmp_path)["style"] == "monokai":
+            break
+        threading.Event().wait(0.01)
+    assert _on_disk(tmp_path)["style"] == "monokai"
+    # Written through a temporary file that was renamed into place
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["settings.json", "settings.json.lock"]
+
+
+def test_two_instances_keep_each_others_changes(tmp_path):
+    first, second = _store(tmp_path), _store(tmp_path)
+    ours, theirs = first.load(), second.load()
+
+    ours["style"] = "monokai"
+    ours["recent_files"] = ["/a.md"]
+    first.save(ours)
+    first.flush()
+    theirs["margin"] = "2cm"
+    theirs["recent_files"] = ["/b.md"]
+    second.save(theirs)
+    second.flush()
+
+    merged = _on_disk(tmp_path)
+    assert (merged["style"], merged["margin"]) == ("monokai", "2cm")
+    assert merged["recent_files"] == ["/b.md", "/a.md"]
+
+
+def test_failed_write_is_reported(tmp_path, monkeypatch):
+    errors = []
+    store = _store(tmp_path, on_error=errors.append)
+    settings = store.load()
+
+    def disk_full(path, data, durable=False):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(settingsstore, "write_atomic", disk_full)
+    settings["style"] = "monokai"
+    store.save(settings)
+    store.flush()
+    assert [str(e) for e in errors] == ["No space left on device"]
+
+
+def test_corrupt_settings_are_an_error(tmp_path):
+    (tmp_path / "settings.json").write_text("{not json", encoding="utf-8")
+    with pytest.raises(ValueError, match="Failed to load settings"):
+        _store(tmp_path).load()
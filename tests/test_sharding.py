@@ -0,0 +1,49 @@
+import re
+
+import pytest
+
+from engine import DEFAULT_SETTINGS, RenderEngine
+from sharding import split_document
+
+
+def _report(sections=6, paragraphs=12):
+    parts = ["---\ntitle: Sharding test\ntlp: GREEN\n---\n"]
+    for n in range(sections):
+        parts.append(f"\n## Section {n}\n\n")
+        parts.extend(f"Paragraph {i} of section {n}, long enough to wrap onto a second line of the page. " * 4 + "\n\n"
+                     for i in range(paragraphs))
+    return "".join(parts)
+
+
+def _html(tmp_path):
+    engine = RenderEngine(dict(DEFAULT_SETTINGS, image_cache_dir=str(tmp_path / "cache")))
+    return engine.generate_html(_report(), base_dir=tmp_path, embed="reference")
+
+
+def test_split_document_cuts_at_h2_and_keeps_every_section(tmp_path):
+    html = _html(tmp_path)
+    documents = split_document(html, 3)
+    assert len(documents) == 3
+    for document in documents[1:]:
+        body = document[document.index("<body>") + len("<body>"):]
+        # The prelude is the only thing before the split heading, and it is out of the flow
+        assert re.match(r'\s*<div class="shard-prelude" style="position: absolute;', body)
+        assert "</div><h2" in body
+    sections = [re.findall(r"<h2[^>]*>Section \d+</h2>", document) for document in documents]
+    assert sum(sections, []) == re.findall(r"<h2[^>]*>Section \d+</h2>", html)
+
+
+def test_sharded_render_has_the_single_pass_page_count(tmp_path):
+    try:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError) as e:  # OSError: Pango isn't installed
+        pytest.skip(f"WeasyPrint is not usable here: {e}")
+    pytest.importorskip("pypdf")
+    from pdfoutput import layout, pdf_page_sizes
+    from sharding import sharded_pdf
+
+    html = _html(tmp_path)
+    single = len(layout(html, tmp_path, {}).pages)
+    data = sharded_pdf(html, tmp_path, 3)
+    assert data is not None
+    assert len(pdf_page_sizes(data)) == single
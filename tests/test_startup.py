@@ -0,0 +1,13 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+import bench_startup
+
+
+def test_startup_defers_rendering_libraries_and_stays_in_budget():
+    total_ms, slowest, loaded = bench_startup.check(runs=3)
+    assert loaded == [], f"imported at startup: {loaded}"
+    assert {"weasyprint", "markdown", "pygments", "PIL", "jinja2", "yaml"} <= set(bench_startup.DEFERRED_MODULES)
+    assert total_ms <= bench_startup.BUDGET_MS, \
+        f"startup imports took {total_ms:.1f} ms, budget {bench_startup.BUDGET_MS:g} ms; slowest: {slowest[:5]}"
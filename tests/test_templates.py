@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+import templates
+from engine import DEFAULT_SETTINGS, RenderEngine
+from templates import TemplateRegistry
+
+
+@pytest.fixture(autouse=True)
+def bytecode_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(templates, "BYTECODE_CACHE_DIR", tmp_path / "jinja")
+
+
+def _registry(tmp_path, **texts):
+    for name, text in texts.items():
+        (tmp_path / f"{name}.html").write_text(text, encoding="utf-8")
+    return TemplateRegistry({"templates": {name: str(tmp_path / f"{name}.html") for name in texts}})
+
+
+def test_unchanged_template_is_not_reloaded(tmp_path):
+    registry = _registry(tmp_path, plain="<h1>{{ title }}</h1>")
+    template = registry.get("plain")
+    assert template.render(title="t") == "<h1>t</h1>"
+    assert registry.get("plain") is template
+
+
+def test_edited_template_is_reloaded(tmp_path):
+    registry = _registry(tmp_path, plain="<h1>{{ title }}</h1>")
+    registry.get("plain")
+
+    path = tmp_path / "plain.html"
+    path.write_text("<h2>{{ title }}</h2>", encoding="utf-8")
+    mtime = path.stat().st_mtime + 5
+    os.utime(path, (mtime, mtime))
+    assert registry.get("plain").render(title="t") == "<h2>t</h2>"
+
+
+def test_templates_with_the_same_filename_stay_apart(tmp_path):
+    for folder, text in (("a", "A {{ title }}"), ("b", "B {{ title }}")):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "report.html").write_text(text, encoding="utf-8")
+    registry = TemplateRegistry({"templates": {"a": str(tmp_path / "a" / "report.html"),
+                                               "b": str(tmp_path / "b" / "report.html")}})
+    assert [registry.get(name).render(title="t") for name in ("a", "b")] == ["A t", "B t"]
+
+
+def test_frontmatter_selects_the_template(tmp_path):
+    registry = _registry(tmp_path, plain="PLAIN {{ title }}")
+    render = RenderEngine(dict(DEFAULT_SETTINGS, image_cache_dir=str(tmp_path / "cache")), templates=registry)
+    assert render.select_template({"template": "plain"}) is registry.get("plain")
+    assert render.select_template({}) is registry.get("default")
+
+
+def test_unknown_and_missing_templates_are_errors(tmp_path):
+    registry = TemplateRegistry({"templates": {"gone": str(tmp_path / "gone.html")}})
+    with pytest.raises(ValueError, match="Unknown template 'nope'"):
+        registry.get("nope")
+    with pytest.raises(FileNotFoundError):
+        registry.get("gone")